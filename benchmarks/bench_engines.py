@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Head to head parse time of the LALR and recursive descent engines.
+
+    $ python benchmarks/bench_engines.py [funcs]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import source, commented_source  # noqa: E402
+from gopygo.parser import parse  # noqa: E402
+
+
+def best_of(func, runs=5):
+    best = None
+    for _ in range(runs):
+        t = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(funcs=200):
+    for corpus, text in (('source', source(funcs)), ('commented_source', commented_source(funcs))):
+        size = len(text.encode('utf-8'))
+        lalr = best_of(lambda: parse(text, engine='lalr'))
+        descent = best_of(lambda: parse(text, engine='descent'))
+        for name, elapsed in (('lalr', lalr), ('descent', descent)):
+            print('%-18s %-8s %8.1f ms %7.2f MB/s %6.2fx lalr' % (
+                corpus, name, elapsed * 1000, size / elapsed / 1e6, lalr / elapsed
+            ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Throughput and peak memory of ``parse_events`` against ``parse`` followed
+by a walk over the tree yielding the same events.
+
+    $ python benchmarks/bench_events.py [funcs]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import source  # noqa: E402
+from gopygo.parser import parse, parse_events, _walk  # noqa: E402
+
+
+def parse_walk(text):
+    for _ in _walk(parse(text), True):
+        pass
+
+
+def events(text):
+    for _ in parse_events(text):
+        pass
+
+
+def best_of(func, runs=3):
+    best = None
+    for _ in range(runs):
+        t = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(funcs=500):
+    text = source(funcs)
+    for name, func in (('parse + walk', parse_walk), ('parse_events', events)):
+        elapsed = best_of(lambda: func(text))
+        print('%-13s %8.1f ms %8.1f KB/s %10.1f KB peak' % (
+            name, elapsed * 1e3, len(text) / elapsed / 1e3, peak(lambda: func(text)) / 1e3
+        ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Building tuples of the nodes straight from the parser with a factory,
+against parsing the ast nodes and converting the tree to tuples afterwards.
+
+    $ python benchmarks/bench_factory.py [funcs]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import source  # noqa: E402
+from gopygo import ast  # noqa: E402
+from gopygo.parser import parse, _factory_nodes  # noqa: E402
+
+
+class Tuples():
+    """Factory building ``(kind, *args)`` tuples."""
+
+
+for _name in _factory_nodes:
+    setattr(Tuples, _name, staticmethod(lambda *args, _kind=_name, **kwargs: (_kind,) + args + tuple(kwargs.values())))
+
+
+def to_tuples(node):
+    """Convert an ast tree the way a second walk over it would."""
+    if isinstance(node, ast.Node):
+        return (type(node).__name__,) + tuple(to_tuples(value) for value in vars(node).values())
+    if isinstance(node, (list, tuple)):
+        return [to_tuples(value) for value in node]
+    return node
+
+
+def best_of(func, runs=5):
+    best = None
+    for _ in range(runs):
+        t = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(funcs=200):
+    text = source(funcs)
+    plain = best_of(lambda: parse(text))
+    walk = best_of(lambda: to_tuples(parse(text)))
+    factory = best_of(lambda: parse(text, factory=Tuples))
+    print('parse             %8.1f ms' % (plain * 1e3))
+    print('parse + to_tuples %8.1f ms' % (walk * 1e3))
+    print('parse(factory=)   %8.1f ms %6.2fx' % (factory * 1e3, walk / factory))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Per call time of the fragment entry points on small inputs, against the
+same fragment wrapped in a source file for ``parse``.
+
+    $ python benchmarks/bench_fragments.py [calls]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gopygo.parser import parse, parse_expr, parse_stmt, parse_type, parse_decl  # noqa: E402
+
+FRAGMENTS = (
+    (parse_expr, 'a + b*c', 'package p\nvar _ = a + b*c\n'),
+    (parse_stmt, 'x := f(a, b)', 'package p\nfunc _() {\n    x := f(a, b)\n}\n'),
+    (parse_type, '[]int', 'package p\nvar _ []int\n'),
+    (parse_decl, 'var x int = 1', 'package p\nvar x int = 1\n'),
+)
+
+
+def best_of(func, calls, runs=5):
+    best = None
+    for _ in range(runs):
+        t = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = (time.perf_counter() - t) / calls
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(calls=2000):
+    for engine in ('lalr', 'descent'):
+        for entry, fragment, wrapped in FRAGMENTS:
+            direct = best_of(lambda: entry(fragment, engine=engine), calls)
+            full = best_of(lambda: parse(wrapped, engine=engine), calls)
+            print('%-8s %-11s %7.1f us   parse %7.1f us %6.2fx' % (
+                engine, entry.__name__, direct * 1e6, full * 1e6, full / direct
+            ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
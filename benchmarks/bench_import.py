@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Startup benchmark: cold (tables rebuilt) vs. warm (tables loaded) import of gopygo.parser,
+and the unparse-only ``import gopygo`` that does not load the parser at all.
+
+    $ python benchmarks/bench_import.py [runs]
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import time
+t = time.perf_counter()
+import %s
+print(time.perf_counter() - t)
+"""
+
+
+def import_time(cache_dir, module='gopygo.parser'):
+    env = dict(os.environ, GOPYGO_CACHE_DIR=cache_dir, PYTHONPATH=ROOT)
+    out = subprocess.check_output([sys.executable, '-c', SNIPPET % module], env=env, cwd=ROOT)
+    return float(out.decode().strip())
+
+
+def main(runs=3):
+    cold = []
+    warm = []
+    light = []
+    for _ in range(runs):
+        cache_dir = tempfile.mkdtemp(prefix='gopygo-bench-')
+        try:
+            cold.append(import_time(cache_dir))
+            warm.append(import_time(cache_dir))
+            light.append(import_time(cache_dir, 'gopygo'))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    print('cold import: %8.1f ms (best of %d)' % (min(cold) * 1000, runs))
+    print('warm import: %8.1f ms (best of %d)' % (min(warm) * 1000, runs))
+    print('speedup:     %8.1fx' % (min(cold) / min(warm)))
+    print('import gopygo (unparse only): %8.1f ms' % (min(light) * 1000))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
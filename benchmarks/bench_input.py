@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Peak memory of getting a generated source file into the lexer: reading it and
+preparing it the way parse() used to (strip and re-terminate), vs. parse_file's
+memory map decoded once. Only the input handling is measured, the tokens are
+drained without being parsed.
+
+    $ python benchmarks/bench_input.py [funcs]
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+import mmap
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import source  # noqa: E402
+from gopygo.parser import GoLexer  # noqa: E402
+
+
+def copied(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    start = len(text) - len(text.lstrip())
+    return text.rstrip() + '\n', start
+
+
+def mapped(path):
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return str(buf, 'utf-8'), 0
+
+
+def peak(prepare, path):
+    tracemalloc.start()
+    try:
+        text, start = prepare(path)
+        for _ in GoLexer().scan(text, start):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(funcs=20000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'generated.go')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n\n' + source(funcs) + '\n\n')
+        size = os.path.getsize(path)
+        print('file size: %.1f MB' % (size / 1e6))
+        for name, prepare in (('read + strip + newline', copied), ('mmap + decode', mapped)):
+            used = peak(prepare, path)
+            print('%-24s peak %7.1f MB  %5.2fx file size' % (name, used / 1e6, used / size))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Lexing throughput of the hand-written GoLexer against the original SLY regex lexer,
+and of the array-backed tokenize_compact.
+
+    $ python benchmarks/bench_lexer.py [funcs]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import source  # noqa: E402
+from benchmarks.regex_lexer import RegexGoLexer  # noqa: E402
+from gopygo.parser import GoLexer  # noqa: E402
+
+
+def count_tokens(lexer, text):
+    return sum(1 for _ in lexer.tokenize(text))
+
+
+def count_compact(lexer, text):
+    return len(lexer.tokenize_compact(text))
+
+
+def measure(func, lexer, text, runs=5):
+    best = None
+    count = 0
+    for _ in range(runs):
+        t = time.perf_counter()
+        count = func(lexer, text)
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return count, best
+
+
+def peak_bytes(func):
+    tracemalloc.start()
+    try:
+        result = func()
+        return tracemalloc.get_traced_memory()[1], len(result)
+    finally:
+        tracemalloc.stop()
+
+
+def main(funcs=500):
+    text = source(funcs)
+    size = len(text.encode('utf-8'))
+    results = {}
+    for name, func, lexer in (
+        ('sly regex', count_tokens, RegexGoLexer()),
+        ('hand-written', count_tokens, GoLexer()),
+        ('compact', count_compact, GoLexer()),
+    ):
+        count, elapsed = measure(func, lexer, text)
+        results[name] = elapsed
+        print('%-13s %8d tokens %9.0f tokens/s %7.2f MB/s' % (
+            name, count, count / elapsed, size / elapsed / 1e6
+        ))
+    print('speedup: %.1fx (compact: %.1fx)' % (
+        results['sly regex'] / results['hand-written'],
+        results['sly regex'] / results['compact']
+    ))
+
+    lexer = GoLexer()
+    for name, func in (
+        ('token list', lambda: list(lexer.tokenize(text))),
+        ('compact', lambda: lexer.tokenize_compact(text)),
+    ):
+        peak, count = peak_bytes(func)
+        print('%-13s %6.1f bytes/token' % (name, peak / count))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Parse throughput under different parse() options.
+
+    $ python benchmarks/bench_parse.py [funcs]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import source, commented_source  # noqa: E402
+from gopygo.parser import GoParser, parse  # noqa: E402
+
+
+def measure(text, runs=5, **kwargs):
+    best = None
+    for _ in range(runs):
+        t = time.perf_counter()
+        parse(text, **kwargs)
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(text, variants):
+    """Print the best time of each ``(name, kwargs)`` variant relative to the first one."""
+    size = len(text.encode('utf-8'))
+    baseline = None
+    for name, kwargs in variants:
+        elapsed = measure(text, **kwargs)
+        baseline = baseline or elapsed
+        print('%-24s %8.1f ms %7.2f MB/s %+7.1f%%' % (
+            name, elapsed * 1000, size / elapsed / 1e6, (elapsed / baseline - 1) * 100
+        ))
+
+
+def table_size():
+    lrtable = GoParser._lrtable
+    print('%d productions, %d states, %d action entries, %d goto entries' % (
+        len(GoParser._grammar.Productions),
+        len(lrtable.lr_action),
+        sum(len(actions) for actions in lrtable.lr_action.values()),
+        sum(len(gotos) for gotos in lrtable.lr_goto.values()),
+    ))
+
+
+def main(funcs=200):
+    print('tables:')
+    table_size()
+    print('positions:')
+    report(source(funcs), [
+        ('positions=False', {'positions': False}),
+        ('positions=True', {'positions': True}),
+    ])
+    print('comment-heavy source:')
+    report(commented_source(funcs), [
+        ('comments=True', {'comments': True}),
+        ('comments=False', {'comments': False}),
+    ])
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Throughput of the public gopygo.scanner API compared to a full parse.
+
+    $ python benchmarks/bench_scanner.py [funcs]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import commented_source  # noqa: E402
+from gopygo.scanner import scan  # noqa: E402
+from gopygo.parser import parse  # noqa: E402
+
+
+def drain(tokens):
+    for _ in tokens:
+        pass
+
+
+def best_of(func, runs=5):
+    best = None
+    for _ in range(runs):
+        t = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(funcs=200):
+    text = commented_source(funcs)
+    size = len(text.encode('utf-8'))
+    variants = [
+        ('scan()', lambda: drain(scan(text))),
+        ('scan(comments=False)', lambda: drain(scan(text, comments=False))),
+        ('parse()', lambda: parse(text)),
+    ]
+    results = [(name, best_of(func)) for name, func in variants]
+    parse_time = results[-1][1]
+    for name, elapsed in results:
+        print('%-24s %8.1f ms %7.2f MB/s %6.1fx parse' % (
+            name, elapsed * 1000, size / elapsed / 1e6, parse_time / elapsed
+        ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,175 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+The original SLY regex lexer of gopygo, kept as the baseline for the lexer benchmarks.
+"""
+
+from sly import Lexer
+
+from gopygo.exceptions import LexerError
+
+
+class RegexGoLexer(Lexer):
+    tokens = {
+        # Keywords
+        PACKAGE, FUNC, RETURN,
+        IMPORT, VAR, CONST, TYPE,
+        FOR, RANGE, BREAK, CONTINUE, GOTO, FALLTHROUGH,
+        IF, ELSE,
+        SWITCH, CASE, DEFAULT,
+        MAP,
+        STRUCT, INTERFACE,
+
+        # Data types
+        BOOL,
+        INT8, INT16, INT32, INT64,
+        UINT8, UINT16, UINT32, UINT64,
+        INT, UINT, RUNE, BYTE, UINTPTR,
+        FLOAT32, FLOAT64,
+        COMPLEX64, COMPLEX128,
+        STRING,
+
+        # Identifiers and basic type literals
+        IDENT, IMAG_LITERAL, FLOAT_LITERAL, INT_LITERAL, CHAR_LITERAL, STRING_LITERAL, TRUE, FALSE,
+
+        # Comment
+        COMMENT,
+
+        # Operators
+        ADD_ASSIGN, SUB_ASSIGN, MUL_ASSIGN, QUO_ASSIGN, REM_ASSIGN,
+        AND_ASSIGN, OR_ASSIGN, XOR_ASSIGN, AND_NOT_ASSIGN, SHL_ASSIGN, SHR_ASSIGN,
+        LAND, LOR, ARROW, INC, DEC, EQL, SHL, SHR, AND_NOT,
+        NEQ, LEQ, GEQ, DEFINE, ELLIPSIS,
+        ADD, SUB, MUL, QUO, REM, AND, OR, XOR, LSS, GTR, ASSIGN, NOT,
+
+        # Delimiters
+        LPAREN, LBRACK, LBRACE, COMMA, PERIOD,
+        RPAREN, RBRACK, RBRACE, SEMICOLON, COLON,
+        NEWLINE,
+    }
+
+    ignore = ' \t'
+
+    # Keywords
+    PACKAGE = 'package'
+    FUNC = 'func'
+    RETURN = 'return'
+    IMPORT = 'import'
+    VAR = 'var'
+    CONST = 'const'
+    TYPE = 'type'
+    FOR = 'for'
+    RANGE = 'range'
+    BREAK = 'break'
+    CONTINUE = 'continue'
+    GOTO = 'goto'
+    FALLTHROUGH = 'fallthrough'
+    IF = 'if'
+    ELSE = 'else'
+    SWITCH = 'switch'
+    CASE = 'case'
+    DEFAULT = 'DEFAULT'
+    MAP = 'map'
+    STRUCT = 'struct'
+    INTERFACE = 'interface'
+
+    # Data types
+    BOOL = 'bool'
+    INT8 = 'int8'
+    INT16 = 'int16'
+    INT32 = 'int32'
+    INT64 = 'int64'
+    UINT8 = 'uint8'
+    UINT16 = 'uint16'
+    UINT32 = 'uint32'
+    UINT64 = 'uint64'
+    INT = 'int'
+    UINT = 'uint'
+    RUNE = 'rune'
+    BYTE = 'byte'
+    UINTPTR = 'uintptr'
+    FLOAT32 = 'float32'
+    FLOAT64 = 'float64'
+    COMPLEX64 = 'complex64'
+    COMPLEX128 = 'complex128'
+    STRING = 'string'
+
+    # Identifiers and basic type literals
+    IMAG_LITERAL = r'[0-9]+\.[0-9]+i|[0-9]+i'
+    FLOAT_LITERAL = r'[0-9]+\.[0-9]+'
+    INT_LITERAL = r'[0-9]+e[0-9]+|[0-9]+'
+    CHAR_LITERAL = r'\'(\$\{.*\}|\\.|[^\'\\])*\''
+    STRING_LITERAL = r'\"(\$\{.*\}|\\.|[^\"\\])*\"'
+    TRUE = r'true'
+    FALSE = r'false'
+    IDENT = r'[a-zA-Z_][a-zA-Z0-9_]*'
+
+    # Comment
+    COMMENT = r'//.*\n'
+
+    # Operators
+    ADD_ASSIGN = r'\+='
+    SUB_ASSIGN = r'-='
+    MUL_ASSIGN = r'\*='
+    QUO_ASSIGN = r'/='
+    REM_ASSIGN = r'%='
+    AND_ASSIGN = r'&='
+    OR_ASSIGN = r'\|='
+    XOR_ASSIGN = r'\^='
+    AND_NOT_ASSIGN = r'&\^='
+    SHL_ASSIGN = r'<<='
+    SHR_ASSIGN = r'>>='
+
+    LAND = r'&&'
+    LOR = r'\|\|'
+    ARROW = r'<-'
+    INC = r'\+\+'
+    DEC = r'--'
+    EQL = r'=='
+    SHL = r'<<'
+    SHR = r'>>'
+    AND_NOT = r'&\^'
+    NEQ = r'!='
+    LEQ = r'<='
+    GEQ = r'>='
+    DEFINE = r':='
+    ELLIPSIS = r'\.\.\.'
+
+    ADD = r'\+'
+    SUB = r'-'
+    MUL = r'\*'
+    QUO = r'/'
+    REM = r'%'
+    AND = r'&'
+    OR = r'\|'
+    XOR = r'\^'
+    LSS = r'<'
+    GTR = r'>'
+    ASSIGN = r'='
+    NOT = r'\!'
+
+    # Delimiters
+    LPAREN = r'\('
+    LBRACK = r'\['
+    LBRACE = r'{'
+    COMMA = r'\,'
+    PERIOD = r'\.'
+
+    RPAREN = r'\)'
+    RBRACK = r'\]'
+    RBRACE = r'}'
+    SEMICOLON = r';'
+    COLON = r':'
+
+    NEWLINE = r'\n'
+
+    # # Ignored pattern
+    # ignore_newline = r'\n+'
+
+    # # Extra action for newlines
+    # def ignore_newline(self, t):
+    #     self.lineno += t.value.count('\n')
+
+    def error(self, t):
+        raise LexerError("Illegal character '%s'" % t.value[0])
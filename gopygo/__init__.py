@@ -1,4 +1,33 @@
-from gopygo.parser import parse
 from gopygo.unparser import unparse
 
 __version__ = '0.3.2'
+
+# gopygo.parser pulls in sly and builds the lexer and parser classes on import,
+# so it is only loaded once one of these names is first looked up.
+_lazy = {
+    'parse': 'gopygo.parser',
+    'parse_bytes': 'gopygo.parser',
+    'parse_file': 'gopygo.parser',
+    'parse_expr': 'gopygo.parser',
+    'parse_stmt': 'gopygo.parser',
+    'parse_type': 'gopygo.parser',
+    'parse_decl': 'gopygo.parser',
+    'reparse': 'gopygo.parser',
+    'StreamParser': 'gopygo.parser',
+    'parse_events': 'gopygo.parser',
+    'tokenize_compact': 'gopygo.parser',
+    'ParseProfile': 'gopygo.profiling',
+}
+
+
+def __getattr__(name):
+    if name in _lazy:
+        import importlib
+        value = getattr(importlib.import_module(_lazy[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy))
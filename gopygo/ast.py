@@ -6,160 +6,305 @@
     :synopsis: Go AST classes.
 """
 
+from array import array
+from collections.abc import Sequence
+from functools import cached_property
+from itertools import accumulate
 from typing import List, Union
 
+from gopygo.enums import Token
 
-class Ident():
+
+class Node():
+    """Base class of the AST nodes.
+
+    When positions are tracked by the parser, ``pos`` is the offset of the
+    first character of the node in the source text and ``end`` the offset
+    right after its last character. Both are packed into ``_span``, which
+    stays unset (``None``) otherwise. The nodes of a top level declaration
+    moved by ``gopygo.reparse`` share an ``_Offset`` added to their spans.
+    """
+
+    _span = None
+    _offset = None
+
+    @property
+    def pos(self):
+        if self._span is None:
+            return None
+        if self._offset is None:
+            return self._span >> 32
+        return (self._span >> 32) + self._offset.delta
+
+    @property
+    def end(self):
+        if self._span is None:
+            return None
+        if self._offset is None:
+            return self._span & 0xFFFFFFFF
+        return (self._span & 0xFFFFFFFF) + self._offset.delta
+
+
+class _Offset():
+    """Distance a top level declaration has moved by since it was parsed.
+    """
+
+    __slots__ = ('delta',)
+
+    def __init__(self):
+        self.delta = 0
+
+
+class Ident(Node):
     def __init__(self, name: str):
         self.name = name
 
 
-class BasicLit():
-    def __init__(self, kind, value: Union[str, None]):
+class BasicLit(Node):
+    def __init__(self, kind, value: Union[str, None], raw=False):
         self.kind = kind
         self.value = value
+        self.raw = raw
 
 
-class CompositeLit():
+class CompositeLit(Node):
     def __init__(self, _type, elts: list, incomplete: bool):
         self.type = _type
         self.elts = elts
         self.incomplete = incomplete
 
 
-class GenDecl():
+class BasicLitList(Sequence):
+    """Compact, read-only list of ``BasicLit``, used by the parser as the
+    ``elts`` of composite literals made of literals only (e.g. ``[]byte{...}``
+    tables).
+
+    ``kinds`` holds the ``Token`` value of each element, ``values`` their
+    source texts back to back, split at the ``bounds`` offsets, and
+    ``starts`` their offsets in the parsed text (``None`` without positions),
+    moved by an ``_Offset`` like the spans of ``Node``. The ``BasicLit``
+    nodes are built on access, a number whose text starts with ``-`` as the
+    ``UnaryExpr`` negating it.
+    """
+
+    _offset = None
+
+    def __init__(self, kinds: List[int], values: List[str], starts: Union[List[int], None] = None):
+        self.kinds = array('B', kinds)
+        self.values = ''.join(values)
+        self.bounds = array(_offset_type(len(self.values)), accumulate(len(value) for value in values))
+        self.starts = None if starts is None else array(_offset_type(starts[-1] if starts else 0), starts)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('BasicLitList index out of range')
+        start = self.bounds[i - 1] if i else 0
+        end = self.bounds[i]
+        value = self.values[start:end]
+        kind = Token(self.kinds[i])
+        if kind == Token.STRING:
+            lit = BasicLit(kind, value[1:-1], raw=value[0] == '`')
+        elif kind == Token.CHAR:
+            lit = BasicLit(kind, value[1:-1])
+        elif value[0] == '-':
+            lit = BasicLit(kind, value[1:])
+            if self.starts is not None:
+                pos = self.starts[i] if self._offset is None else self.starts[i] + self._offset.delta
+                lit._span = pos + 1 << 32 | pos + end - start
+                expr = UnaryExpr('-', lit)
+                expr._span = pos << 32 | pos + end - start
+                return expr
+            return UnaryExpr('-', lit)
+        else:
+            lit = BasicLit(kind, value)
+        if self.starts is not None:
+            pos = self.starts[i] if self._offset is None else self.starts[i] + self._offset.delta
+            lit._span = pos << 32 | pos + end - start
+        return lit
+
+
+def _offset_type(largest):
+    return 'I' if largest < 2 ** 32 else 'Q'
+
+
+class GenDecl(Node):
     def __init__(self, tok: str, specs: list):
         self.tok = tok
         self.specs = specs
 
 
-class DeclStmt():
+class DeclStmt(Node):
     def __init__(self, decl: GenDecl):
         self.decl = decl
 
 
-class Package():
+class Package(Node):
     def __init__(self, name: str):
         self.name = name
 
 
-class File():
+class File(Node):
     def __init__(self, name: Package):
         self.name = name
         self.imports = []  # unused, use GenDecl in self.decls instead
         self.decls = []
 
 
-class ImportSpec():
+class ImportSpec(Node):
     def __init__(self, name: Union[Ident, str, None], path: Union[BasicLit, List[BasicLit]]):
         self.name = name
         self.path = path
 
 
-class Field():
+class Field(Node):
     def __init__(self, name: str, _type):
         self.name = name
         self.type = _type
 
 
-class FieldList():
+class FieldList(Node):
     def __init__(self, _list: List[Field]):
         self.list = _list
 
 
-class FuncType():
+class FuncType(Node):
     def __init__(self, params: FieldList, results: FieldList):
         self.params = params
         self.results = results
 
 
-class BlockStmt():
+class BlockStmt(Node):
     def __init__(self, _list: list):
         self.list = _list
 
 
-class FuncDecl():
-    def __init__(self, name: str, _type: FuncType, body: BlockStmt, recv=None):
+class LazyBody():
+    """Function body skipped by ``parse(..., mode='lazy_bodies')``: the span
+    ``start:end`` of its braces in the source and the ``parse`` callable
+    turning it into a ``BlockStmt``.
+    """
+
+    __slots__ = ('parse', 'start', 'end')
+
+    def __init__(self, parse, start: int, end: int):
+        self.parse = parse
+        self.start = start
+        self.end = end
+
+
+class _Func(Node):
+    """Base class of the nodes with a function body, which may be a ``LazyBody``
+    parsed on first access to ``body``.
+    """
+
+    def _set_body(self, body):
+        if isinstance(body, LazyBody):
+            self._lazy_body = body
+        else:
+            self.body = body
+
+    @cached_property
+    def body(self):
+        lazy = self._lazy_body
+        return lazy.parse(lazy.start, lazy.end)
+
+    def unload_body(self):
+        """Drop the body parsed from a ``LazyBody`` to release its memory, it is
+        parsed again on next access. Other bodies are kept.
+        """
+        if '_lazy_body' in vars(self):
+            vars(self).pop('body', None)
+
+
+class FuncDecl(_Func):
+    def __init__(self, name: str, _type: FuncType, body: Union[BlockStmt, LazyBody], recv=None):
         self.name = name
         self.type = _type
-        self.body = body
+        self._set_body(body)
         self.recv = recv
 
 
-class SelectorExpr():
+class SelectorExpr(Node):
     def __init__(self, x: str, sel: str):
         self.x = x
         self.sel = sel
 
 
-class CallExpr():
+class CallExpr(Node):
     def __init__(self, fun: str, args: list, ellipsis=False):
         self.fun = fun
         self.args = args
         self.ellipsis = ellipsis
 
 
-class ArrayType():
+class ArrayType(Node):
     def __init__(self, _len, elt: str):
         self.len = _len
         self.elt = elt
 
 
-class ValueSpec():
+class ValueSpec(Node):
     def __init__(self, names: list, _type: Union[str, ArrayType], values: list):
         self.names = names
         self.type = _type
         self.values = values
 
 
-class Comment():
+class Comment(Node):
     def __init__(self, text: str):
         self.text = text
 
 
-class ExprStmt():
+class ExprStmt(Node):
     def __init__(self, expr):
         self.expr = expr
 
 
-class AssignStmt():
+class AssignStmt(Node):
     def __init__(self, lhs: list, token: str, rhs: list):
         self.lhs = lhs
         self.token = token
         self.rhs = rhs
 
 
-class FuncLit():
-    def __init__(self, _type: FuncType, body: BlockStmt):
+class FuncLit(_Func):
+    def __init__(self, _type: FuncType, body: Union[BlockStmt, LazyBody]):
         self.type = _type
-        self.body = body
+        self._set_body(body)
 
 
-class ReturnStmt():
+class ReturnStmt(Node):
     def __init__(self, results: List[Union[str, FuncLit]]):
         self.results = results
 
 
-class BinaryExpr():
+class BinaryExpr(Node):
     def __init__(self, x, op: str, y):
         self.x = x
         self.op = op
         self.y = y
 
 
-class UnaryExpr():
+class UnaryExpr(Node):
     def __init__(self, op: str, x, right=False):
         self.op = op
         self.x = x
         self.right = right
 
 
-class ParenExpr():
+class ParenExpr(Node):
     def __init__(self, x):
         self.x = x
 
 
-class ForStmt():
+class ForStmt(Node):
     def __init__(self, body: BlockStmt, init=None, cond=None, post=None):
         self.init = init
         self.cond = cond
@@ -167,18 +312,18 @@ class ForStmt():
         self.body = body
 
 
-class BranchStmt():
+class BranchStmt(Node):
     def __init__(self, tok: str, label=None):
         self.tok = tok
         self.label = label
 
 
-class LabeledStmt():
+class LabeledStmt(Node):
     def __init__(self, label: str):
         self.label = label
 
 
-class IfStmt():
+class IfStmt(Node):
     def __init__(self, cond, body: BlockStmt, init=None, _else=None):
         self.init = init
         self.cond = cond
@@ -186,32 +331,32 @@ class IfStmt():
         self._else = _else
 
 
-class SwitchStmt():
+class SwitchStmt(Node):
     def __init__(self, body: BlockStmt, init=None, tag=None):
         self.init = init
         self.tag = tag
         self.body = body
 
 
-class CaseClause():
+class CaseClause(Node):
     def __init__(self, _list: list, body: list):
         self.list = _list
         self.body = body
 
 
-class IndexExpr():
+class IndexExpr(Node):
     def __init__(self, x, index):
         self.x = x
         self.index = index
 
 
-class TypeAssertExpr():
+class TypeAssertExpr(Node):
     def __init__(self, x, _type):
         self.x = x
         self.type = _type
 
 
-class SliceExpr():
+class SliceExpr(Node):
     def __init__(self, x, low, high, _max, slice3: bool):
         self.x = x
         self.low = low
@@ -220,19 +365,19 @@ class SliceExpr():
         self.slice3 = slice3
 
 
-class MapType():
+class MapType(Node):
     def __init__(self, key, value):
         self.key = key
         self.value = value
 
 
-class KeyValueExpr():
+class KeyValueExpr(Node):
     def __init__(self, key, value):
         self.key = key
         self.value = value
 
 
-class RangeStmt():
+class RangeStmt(Node):
     def __init__(self, key, value, tok: str, x, body: BlockStmt):
         self.key = key
         self.value = value
@@ -241,29 +386,29 @@ class RangeStmt():
         self.body = body
 
 
-class Ellipsis():
+class Ellipsis(Node):
     def __init__(self, _type: str):
         self.type = _type
 
 
-class StarExpr():
+class StarExpr(Node):
     def __init__(self, x):
         self.x = x
 
 
-class StructType():
+class StructType(Node):
     def __init__(self, fields: FieldList, incomplete: bool):
         self.fields = fields
         self.incomplete = incomplete
 
 
-class TypeSpec():
+class TypeSpec(Node):
     def __init__(self, name: Ident, _type):
         self.name = name
         self.type = _type
 
 
-class InterfaceType():
+class InterfaceType(Node):
     def __init__(self, methods: FieldList, incomplete: bool):
         self.methods = methods
         self.incomplete = incomplete
@@ -0,0 +1,1034 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: __init__
+    :synopsis: recursive descent parser engine.
+
+A hand written alternative to the LALR engine of :mod:`gopygo.parser`. It
+accepts the same language and builds the same :mod:`gopygo.ast` nodes, with
+the same positions, but does not depend on SLY nor on parser tables. Binary
+operators are parsed by precedence climbing, with the operator levels and
+associativities the LALR tables end up with (see ``GoParser.precedence``):
+``+ -`` bind tighter than every other binary operator, ``* /`` tighter
+still, and the operators without a declared precedence (including ``,``,
+indexing and ``++``/``--``) group to the right.
+"""
+
+from functools import partial
+from itertools import takewhile
+
+from gopygo.ast import (
+    Ident,
+    BasicLit,
+    BasicLitList,
+    LazyBody,
+    CompositeLit,
+    GenDecl,
+    DeclStmt,
+    Package,
+    File,
+    ImportSpec,
+    FuncDecl,
+    FuncType,
+    FieldList,
+    Field,
+    BlockStmt,
+    SelectorExpr,
+    CallExpr,
+    ValueSpec,
+    Comment,
+    ExprStmt,
+    AssignStmt,
+    ReturnStmt,
+    BinaryExpr,
+    UnaryExpr,
+    ParenExpr,
+    ForStmt,
+    BranchStmt,
+    LabeledStmt,
+    IfStmt,
+    SwitchStmt,
+    CaseClause,
+    ArrayType,
+    IndexExpr,
+    TypeAssertExpr,
+    SliceExpr,
+    MapType,
+    KeyValueExpr,
+    RangeStmt,
+    Ellipsis,
+    FuncLit,
+    StarExpr,
+    StructType,
+    TypeSpec,
+    InterfaceType
+)
+from gopygo.enums import Token
+from gopygo.exceptions import LimitError, ParserError
+from gopygo.position import LineTable
+from gopygo.scanner import Scanner
+
+_types = frozenset(Scanner.types.values())
+
+_literals = {
+    'INT_LITERAL': Token.INT,
+    'FLOAT_LITERAL': Token.FLOAT,
+    'IMAG_LITERAL': Token.IMAG,
+    'CHAR_LITERAL': Token.CHAR,
+    'STRING_LITERAL': Token.STRING,
+}
+
+# Literals an element of a BasicLitList may negate
+_signed_literals = ('INT_LITERAL', 'FLOAT_LITERAL', 'IMAG_LITERAL')
+
+# Binary operators and their level, ``expr COMMA expr``, indexing, slicing,
+# type assertions and the postfix ``++``/``--`` all are at level 0.
+_binary = {
+    'LAND': 0, 'LOR': 0, 'ARROW': 0, 'EQL': 0, 'SHL': 0, 'SHR': 0, 'AND_NOT': 0,
+    'NEQ': 0, 'LEQ': 0, 'GEQ': 0, 'REM': 0, 'AND': 0, 'OR': 0, 'XOR': 0, 'LSS': 0, 'GTR': 0,
+    'ADD': 1, 'SUB': 1,
+    'MUL': 2, 'QUO': 2,
+}
+
+_postfix = frozenset(('COMMA', 'LBRACK', 'PERIOD', 'INC', 'DEC'))
+
+# Unary operators bind tighter than any binary one.
+_unary = frozenset(('SUB', 'XOR', 'NOT', 'AND'))
+_prefix = _unary | {'INC', 'DEC'}
+
+_assign = frozenset((
+    'DEFINE', 'ASSIGN', 'ADD_ASSIGN', 'SUB_ASSIGN', 'MUL_ASSIGN', 'QUO_ASSIGN', 'REM_ASSIGN',
+    'AND_ASSIGN', 'OR_ASSIGN', 'XOR_ASSIGN', 'AND_NOT_ASSIGN', 'SHL_ASSIGN', 'SHR_ASSIGN',
+))
+
+_expr_first = frozenset(
+    {'IDENT', 'TRUE', 'FALSE', 'LPAREN', 'LBRACK', 'MAP', 'MUL', 'INC', 'DEC'}
+    | _unary | set(_literals) | _types
+)
+
+_field_first = frozenset({'IDENT', 'FUNC', 'MUL', 'ELLIPSIS'} | _types)
+
+# Tokens that close a statement list.
+_stmts_end = frozenset(('RBRACE', 'CASE', 'DEFAULT', '$end'))
+
+
+def _items(x):
+    return x if isinstance(x, list) else [x]
+
+
+class DescentParser():
+    """Recursive descent parser over the token stream of :class:`Scanner`.
+
+    The tokens are scanned upfront into parallel ``types``, ``starts`` and
+    ``ends`` lists ending with a ``'$end'`` sentinel and ``i`` is the index
+    of the current token, so looking ahead is plain indexing.
+    """
+
+    def __init__(self):
+        self.text = None
+        self.types = None
+        self.starts = None
+        self.ends = None
+        self.i = 0
+        self.positions = True
+        self.bodies = None
+        self.limits = None
+
+    def parse(self, text, positions=True, comments=True, lazy=False, limits=None):
+        """Parse ``text``, with function bodies left as ``LazyBody`` if ``lazy``,
+        within the :class:`gopygo.limits.Limits` ``limits`` if any.
+        """
+        scanner = Scanner()
+        tokens = (scanner.scan_bodies if lazy else scanner.scan)(text, 0, comments)
+        if limits is not None:
+            tokens = limits.tokens(tokens)
+        items, _ = self.run(self.line, text, tokens, len(text), positions, comments, lazy, limits)
+        if len(items) == 1:
+            return items[0]
+        return tuple(items)
+
+    def parse_body(self, text, start, end, positions=True, comments=True):
+        """Parse the function body spanning ``text[start:end]`` of a lazy parse.
+        """
+        tokens = takewhile(lambda tok: tok[1] < end, Scanner().scan_bodies(text, start, comments))
+        return self.run(self.block_stmt, text, tokens, end, positions, comments, True)
+
+    def run(self, rule, text, tokens, end, positions, comments, lazy, limits=None):
+        """Parse all the ``tokens`` of ``text``, ending at ``end``, with the ``rule`` method.
+
+        The deadline and cancellation of ``limits`` are checked at each
+        statement. Nesting too deep for the interpreter stack raises
+        ``LimitError`` as exceeding ``max_depth`` does.
+        """
+        self.text = text
+        tokens = list(tokens)
+        self.types = [t[0] for t in tokens] + ['$end']
+        self.starts = [t[1] for t in tokens] + [end]
+        self.ends = [t[2] for t in tokens] + [end]
+        self.i = 0
+        self.positions = positions
+        self.bodies = partial(_parse_body, text, positions, comments) if lazy else None
+        self.limits = limits
+        try:
+            result = rule()
+            if self.types[self.i] != '$end':
+                self.error()
+        except RecursionError:
+            raise LimitError('Nesting too deep', self.starts[self.i], 'max_depth') from None
+        finally:
+            self.types = self.starts = self.ends = self.limits = None
+        return result
+
+    def fragment(self, rule):
+        """Parse a fragment of source with the ``rule`` method, ended by an
+        optional semicolon.
+        """
+        x = rule()
+        if self.types[self.i] == 'SEMICOLON':
+            self.i += 1
+        return x
+
+    # Helpers
+
+    def value(self):
+        """Return the text of the current token and move past it.
+        """
+        i = self.i
+        self.i = i + 1
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def expect(self, _type):
+        if self.types[self.i] != _type:
+            self.error()
+        return self.value()
+
+    def node(self, node, start, end=None):
+        """Record the span of ``node``, which ends with the last consumed token by default.
+        """
+        if self.positions:
+            if end is None:
+                end = self.ends[self.i - 1]
+            node._span = start << 32 | end
+        return node
+
+    def error(self):
+        i = self.i
+        if self.types[i] == '$end':
+            raise ParserError('Unexpected end of input', len(self.text))
+        start = self.starts[i]
+        line, column = LineTable(self.text).position(start)
+        raise ParserError(
+            'Unexpected %r at line %d, column %d' % (self.text[start:self.ends[i]], line, column),
+            start
+        )
+
+    # Top level
+
+    def line(self):
+        """Parse the top level items up to the end of input.
+
+        Return them along with the end offset of the last one. A package
+        clause swallows every item after it into its ``File``.
+        """
+        types = self.types
+        items = []
+        end = None
+        while types[self.i] != '$end':
+            start = self.starts[self.i]
+            if self.limits is not None:
+                self.limits.check(start)
+            t = types[self.i]
+            if t == 'PACKAGE':
+                self.i += 1
+                package = self.node(Package(self.expect('IDENT')), start)
+                end = self.ends[self.i - 1]
+                self.expect('SEMICOLON')
+                file = File(package)
+                decls, decls_end = self.line()
+                file.decls.extend(decls)
+                if decls_end is not None:
+                    end = decls_end
+                items.append(self.node(file, start, end))
+                break
+            if t == 'COMMENT':
+                item = self.comment()
+                item.text += '\n'
+                items.append(item)
+                end = self.ends[self.i - 1]
+                continue
+            if t == 'IDENT' and types[self.i + 1] == 'COLON':
+                items.append(self.labeled_stmt())
+                end = self.ends[self.i - 1]
+                continue
+            if t == 'FUNC' and types[self.i + 1] == 'IDENT':
+                item = self.func_decl()
+            elif t == 'IMPORT' and (
+                types[self.i + 1] in ('STRING_LITERAL', 'LPAREN', 'PERIOD')
+                or (types[self.i + 1] == 'IDENT' and types[self.i + 2] == 'STRING_LITERAL')
+            ):
+                item = self._import()
+            else:
+                item = self.stmt()
+            items.append(item)
+            end = self.ends[self.i - 1]
+            self.expect('SEMICOLON')
+        return items, end
+
+    def _import(self):
+        types = self.types
+        start = self.starts[self.i]
+        self.i += 1
+        if types[self.i] == 'LPAREN':
+            self.i += 1
+            specs = [self.import_spec()]
+            while types[self.i] == 'SEMICOLON':
+                self.i += 1
+                if types[self.i] == 'RPAREN':
+                    break
+                specs.append(self.import_spec())
+            self.expect('RPAREN')
+        else:
+            specs = [self.import_spec()]
+        return self.node(GenDecl('import', specs), start)
+
+    def import_spec(self):
+        start = self.starts[self.i]
+        name = None
+        if self.types[self.i] in ('IDENT', 'PERIOD'):
+            name = self.value()
+        path_start = self.starts[self.i]
+        path = self.node(BasicLit(Token.STRING, self.expect('STRING_LITERAL')[1:-1]), path_start)
+        return self.node(ImportSpec(name, path), start)
+
+    def func_decl(self):
+        start = self.starts[self.i]
+        self.i += 1
+        name = self.expect('IDENT')
+        _type = self.func_type()
+        return self.node(FuncDecl(name, _type, self.block_stmt()), start)
+
+    def func_lit(self):
+        start = self.starts[self.i]
+        self.expect('FUNC')
+        _type = self.func_type()
+        return self.node(FuncLit(_type, self.block_stmt()), start)
+
+    def func_type(self):
+        start = self.starts[self.i]
+        self.expect('LPAREN')
+        params = self.field_list()
+        self.expect('RPAREN')
+        if self.types[self.i] == 'LPAREN':
+            self.i += 1
+            results = self.field_list()
+            self.expect('RPAREN')
+        else:
+            results = self.field_list()
+        return self.node(FuncType(params, results), start)
+
+    def field_list(self):
+        types = self.types
+        start = self.starts[self.i]
+        fields = []
+        while types[self.i] in _field_first:
+            fields.append(self.field())
+            end = None
+            t = types[self.i]
+            if t not in ('COMMA', 'SEMICOLON'):
+                break
+            self.i += 1
+            # A trailing comma is part of the list, a trailing semicolon is not.
+            end = self.ends[self.i - (t == 'SEMICOLON') - 1]
+        if not fields:
+            # Empty, right after the previous token
+            end = self.ends[self.i - 1]
+            return self.node(FieldList([]), end, end)
+        return self.node(FieldList(fields), start, end)
+
+    def field(self):
+        types = self.types
+        start = self.starts[self.i]
+        name = None
+        t = types[self.i]
+        if t == 'IDENT':
+            name = self.value()
+            t = types[self.i]
+        if (t == 'FUNC' and name is None) or (t == 'LPAREN' and name is not None):
+            type_start = self.starts[self.i]
+            if t == 'FUNC':
+                self.i += 1
+            self.expect('LPAREN')
+            params = self.node(FieldList([]), self.ends[self.i - 1], self.ends[self.i - 1])
+            self.expect('RPAREN')
+            results_start = self.starts[self.i]
+            if types[self.i] == 'ELLIPSIS':
+                self.i += 1
+            results = self.node(FieldList([self.node(Field(None, self.field_type()), results_start)]), results_start)
+            return self.node(Field(name, self.node(FuncType(params, results), type_start)), start)
+        ellipsis_start = self.starts[self.i]
+        ellipsis = t == 'ELLIPSIS'
+        if ellipsis:
+            self.i += 1
+        _type = self.field_type()
+        if ellipsis:
+            _type = self.node(Ellipsis(_type), ellipsis_start)
+        return self.node(Field(name, _type), start)
+
+    def field_type(self):
+        t = self.types[self.i]
+        if t in _types:
+            return self.value()
+        if t != 'MUL':
+            self.error()
+        start = self.starts[self.i]
+        self.i += 1
+        if self.types[self.i] in _types:
+            return self.node(StarExpr(self.value()), start)
+        return self.node(StarExpr(self.operand()), start)
+
+    def type_expr(self):
+        """Parse a type, named types being expressions as in the fields.
+        """
+        types = self.types
+        t = types[self.i]
+        if t in _types:
+            return self.value()
+        if t == 'MUL' and types[self.i + 1] in _types:
+            start = self.starts[self.i]
+            self.i += 1
+            return self.node(StarExpr(self.value()), start)
+        if t == 'INTERFACE':
+            return self.interface_type()
+        return self.expr()
+
+    def decl(self):
+        """Parse a function, import, variable, constant or type declaration.
+        """
+        types = self.types
+        t = types[self.i]
+        if t == 'FUNC':
+            return self.func_decl()
+        if t == 'IMPORT' and (
+            types[self.i + 1] in ('STRING_LITERAL', 'LPAREN', 'PERIOD')
+            or (types[self.i + 1] == 'IDENT' and types[self.i + 2] == 'STRING_LITERAL')
+        ):
+            return self._import()
+        if t not in ('VAR', 'CONST', 'IMPORT', 'TYPE'):
+            self.error()
+        start = self.starts[self.i]
+        return self.node(self.decl_stmt().decl, start)
+
+    # Statements
+
+    def block_stmt(self):
+        start = self.starts[self.i]
+        if self.types[self.i] == 'BODY':
+            self.i += 1
+            return LazyBody(self.bodies, start, self.ends[self.i - 1])
+        self.expect('LBRACE')
+        t = self.types[self.i]
+        if t == 'RBRACE':
+            body = []
+        elif t in ('CASE', 'DEFAULT'):
+            body = []
+            while self.types[self.i] in ('CASE', 'DEFAULT'):
+                body.append(self.case_clause())
+        else:
+            body, _ = self.stmts()
+            if not body:
+                self.error()
+        self.expect('RBRACE')
+        return self.node(BlockStmt(body), start)
+
+    def stmts(self):
+        """Parse statements up to a closing brace or the next case clause.
+
+        Return them along with the end offset of the last one.
+        """
+        types = self.types
+        body = []
+        end = None
+        while True:
+            t = types[self.i]
+            if t == 'COMMENT':
+                start = self.starts[self.i]
+                body.append(self.node(ExprStmt(self.comment()), start))
+            elif t == 'IDENT' and types[self.i + 1] == 'COLON':
+                body.append(self.labeled_stmt())
+            elif t in _stmts_end:
+                break
+            else:
+                if self.limits is not None:
+                    self.limits.check(self.starts[self.i])
+                body.append(self.stmt())
+                end = self.ends[self.i - 1]
+                if types[self.i] == 'SEMICOLON':
+                    self.i += 1
+                elif types[self.i] not in _stmts_end:
+                    self.error()
+                continue
+            end = self.ends[self.i - 1]
+        return body, end
+
+    def case_clause(self):
+        types = self.types
+        start = self.starts[self.i]
+        if types[self.i] == 'DEFAULT':
+            self.i += 1
+            _list = []
+        else:
+            self.expect('CASE')
+            if types[self.i] in _types and types[self.i + 1] in ('COMMA', 'COLON'):
+                _list = [self.value()]
+                while types[self.i] == 'COMMA':
+                    self.i += 1
+                    if types[self.i] not in _types:
+                        self.error()
+                    _list.append(self.value())
+            else:
+                _list = _items(self.expr())
+        self.expect('COLON')
+        end = self.ends[self.i - 1]
+        body, body_end = self.stmts()
+        if body:
+            end = body_end
+        return self.node(CaseClause(_list, body), start, end)
+
+    def comment(self):
+        start = self.starts[self.i]
+        text = self.value()
+        return self.node(Comment(text[2:].lstrip().rstrip()), start)
+
+    def labeled_stmt(self):
+        start = self.starts[self.i]
+        label = self.value()
+        self.i += 1
+        return self.node(LabeledStmt(label), start)
+
+    def stmt(self):
+        t = self.types[self.i]
+        if t == 'FOR':
+            return self.for_stmt()
+        if t == 'IF':
+            return self.if_stmt()
+        if t == 'SWITCH':
+            return self.switch_stmt()
+        if t == 'RETURN':
+            return self.return_stmt()
+        if t in ('VAR', 'CONST', 'IMPORT', 'TYPE'):
+            return self.decl_stmt()
+        if t in ('BREAK', 'CONTINUE', 'FALLTHROUGH', 'GOTO'):
+            start = self.starts[self.i]
+            tok = self.value()
+            label = self.expect('IDENT') if t == 'GOTO' else None
+            return self.node(BranchStmt(tok, label), start)
+        return self.simple_stmt()
+
+    def simple_stmt(self):
+        start = self.starts[self.i]
+        return self.assign_or_expr(self.expr(), start)
+
+    def assign_or_expr(self, x, start):
+        """Complete the simple statement started at ``start`` by the expression ``x``.
+        """
+        if self.types[self.i] in _assign:
+            tok = self.value()
+            return self.node(AssignStmt(x, tok, self.expr()), start)
+        return self.node(ExprStmt(x), start)
+
+    def for_stmt(self):
+        types = self.types
+        start = self.starts[self.i]
+        self.i += 1
+        t = types[self.i]
+        if t == 'LBRACE':
+            return self.node(ForStmt(self.block_stmt()), start)
+        if t == 'RANGE':
+            self.i += 1
+            x = self.expr()
+            return self.node(RangeStmt(None, None, Token.ILLEGAL, x, self.block_stmt()), start)
+        init_start = self.starts[self.i]
+        key = self.expr(0, 'COMMA')
+        t = types[self.i]
+        if t == 'LBRACE':
+            return self.node(ForStmt(self.block_stmt(), cond=key), start)
+        if t == 'COMMA' or (t in ('DEFINE', 'ASSIGN') and types[self.i + 1] == 'RANGE'):
+            value = None
+            if t == 'COMMA':
+                self.i += 1
+                value = self.expr()
+                if types[self.i] not in ('DEFINE', 'ASSIGN'):
+                    self.error()
+            tok = self.value()
+            self.expect('RANGE')
+            x = self.expr()
+            return self.node(RangeStmt(key, value, tok, x, self.block_stmt()), start)
+        init = self.assign_or_expr(key, init_start)
+        self.expect('SEMICOLON')
+        cond = self.expr()
+        self.expect('SEMICOLON')
+        post = self.simple_stmt()
+        return self.node(ForStmt(self.block_stmt(), init=init, cond=cond, post=post), start)
+
+    def if_stmt(self):
+        # The if statements followed by else if, nested once all are parsed
+        chain = []
+        while True:
+            start = self.starts[self.i]
+            self.i += 1
+            init_start = self.starts[self.i]
+            init = None
+            cond = self.expr()
+            if self.types[self.i] != 'LBRACE':
+                init = self.assign_or_expr(cond, init_start)
+                self.expect('SEMICOLON')
+                cond = self.expr()
+            body = self.block_stmt()
+            _else = None
+            if self.types[self.i] == 'ELSE':
+                self.i += 1
+                if self.types[self.i] == 'IF':
+                    chain.append((start, cond, body, init))
+                    continue
+                _else = self.block_stmt()
+            break
+        x = self.node(IfStmt(cond, body, init=init, _else=_else), start)
+        for start, cond, body, init in reversed(chain):
+            x = self.node(IfStmt(cond, body, init=init, _else=x), start)
+        return x
+
+    def switch_stmt(self):
+        start = self.starts[self.i]
+        self.i += 1
+        init = tag = None
+        if self.types[self.i] != 'LBRACE':
+            init_start = self.starts[self.i]
+            tag = self.expr()
+            if self.types[self.i] != 'LBRACE':
+                init = self.assign_or_expr(tag, init_start)
+                tag = None
+                if self.types[self.i] == 'SEMICOLON':
+                    self.i += 1
+                    tag = self.expr()
+        return self.node(SwitchStmt(self.block_stmt(), init=init, tag=tag), start)
+
+    def return_stmt(self):
+        start = self.starts[self.i]
+        self.i += 1
+        if self.types[self.i] == 'FUNC':
+            results = [self.func_lit()]
+            while self.types[self.i] == 'COMMA':
+                self.i += 1
+                results.append(self.func_lit())
+        else:
+            results = self.args()
+        return self.node(ReturnStmt(results), start)
+
+    def decl_stmt(self):
+        types = self.types
+        start = self.starts[self.i]
+        tok = self.value()
+        if tok == 'type' and types[self.i] == 'IDENT' and types[self.i + 1] in ('STRUCT', 'INTERFACE'):
+            spec_start = self.starts[self.i]
+            name = self.value()
+            type_start = self.starts[self.i]
+            kind = self.value()
+            self.expect('LBRACE')
+            fields = self.field_list()
+            self.expect('RBRACE')
+            _type = StructType(fields, False) if kind == 'struct' else InterfaceType(fields, False)
+            spec = self.node(TypeSpec(name, self.node(_type, type_start)), spec_start)
+        else:
+            spec = self.value_spec()
+        return self.node(DeclStmt(self.node(GenDecl(tok, [spec]), start)), start)
+
+    def value_spec(self):
+        types = self.types
+        start = self.starts[self.i]
+        names = [self.expect('IDENT')]
+        while types[self.i] == 'COMMA':
+            self.i += 1
+            names.append(self.expect('IDENT'))
+        t = types[self.i]
+        _type = None
+        if t in _types:
+            _type = self.value()
+        elif t == 'LBRACK':
+            _type = self.array_type()
+        elif t != 'ASSIGN':
+            self.error()
+        values = []
+        if types[self.i] == 'ASSIGN':
+            self.i += 1
+            values = _items(self.expr())
+        return self.node(ValueSpec(names, _type, values), start)
+
+    # Expressions
+
+    def args(self):
+        """Parse the possibly empty, comma separated arguments of a call.
+        """
+        types = self.types
+        args = []
+        while True:
+            t = types[self.i]
+            if t == 'TYPE':
+                args.append(self.value())
+            elif t in _expr_first:
+                args.append(self.expr(0, 'COMMA'))
+            else:
+                break
+            if types[self.i] != 'COMMA':
+                break
+            self.i += 1
+        return args
+
+    def expr(self, level=0, stop=None, x=None, start=None):
+        """Parse an expression, consuming the operators of at least ``level``.
+
+        ``stop`` is a token ending the expression where it would otherwise
+        continue it, e.g. the comma between call arguments. It does not
+        apply to the operands of the expression. ``x`` is its first operand,
+        starting at ``start``, when already parsed.
+        """
+        types = self.types
+        if x is None:
+            start = self.starts[self.i]
+            x = self.operand()
+        # Level 0 operators and commas take the rest of the expression as
+        # right operand: the (operand, operator, start) before them are
+        # grouped once it is parsed, the operator of commas being None.
+        heads = None
+        while True:
+            t = types[self.i]
+            if t == stop:
+                break
+            op_level = _binary.get(t)
+            if op_level is not None:
+                if op_level < level:
+                    break
+                op = self.value()
+                if op_level:
+                    x = self.node(BinaryExpr(x, op, self.expr(op_level + 1)), start)
+                    continue
+                head = (x, op, start)
+            elif t in _postfix:
+                if level:
+                    break
+                if t == 'COMMA':
+                    self.i += 1
+                    if types[self.i] not in _expr_first:
+                        continue
+                    head = (x, None, start)
+                else:
+                    if t == 'LBRACK':
+                        x = self.index(x, start)
+                    elif t == 'PERIOD':
+                        self.i += 1
+                        x = self.type_assert(x, start)
+                    else:
+                        x = self.node(UnaryExpr(self.value(), x, right=True), start)
+                    continue
+            else:
+                break
+            if heads is None:
+                heads = [head]
+            else:
+                heads.append(head)
+            stop = None
+            start = self.starts[self.i]
+            x = self.operand()
+        if heads:
+            x = self.group(heads, x)
+        return x
+
+    def group(self, heads, x):
+        """Group the ``(operand, operator, start)`` ``heads`` of a level 0
+        expression to the right, ``x`` being its last operand.
+        """
+        # Items of the comma separated list being built, in reverse order
+        items = None
+        for head, op, start in reversed(heads):
+            if op is None:
+                if items is None:
+                    items = _items(x)[::-1]
+                items.append(head)
+                continue
+            if items is not None:
+                x = items[::-1]
+                items = None
+            x = self.node(BinaryExpr(head, op, x), start)
+        if items is not None:
+            x = items[::-1]
+        return x
+
+    def operand(self):
+        types = self.types
+        start = self.starts[self.i]
+        t = types[self.i]
+        if t == 'IDENT':
+            return self.primary(start)
+        if t in _literals:
+            value = self.value()
+            if t == 'STRING_LITERAL':
+                return self.node(BasicLit(Token.STRING, value[1:-1], raw=value[0] == '`'), start)
+            if t == 'CHAR_LITERAL':
+                value = value[1:-1]
+            return self.node(BasicLit(_literals[t], value), start)
+        if t in _prefix:
+            # Unary operators apply to the operand after them and INC or DEC
+            # to the rest of the expression, parsed from the innermost one.
+            ops = []
+            while types[self.i] in _prefix:
+                ops.append((self.starts[self.i], types[self.i], self.value()))
+            inner = self.starts[self.i]
+            x = self.operand()
+            for start, t, op in reversed(ops):
+                if t in _unary:
+                    x = self.node(UnaryExpr(op, x), start)
+                else:
+                    x = self.node(UnaryExpr(op, self.expr(x=x, start=inner), right=False), start)
+                inner = start
+            return x
+        if t == 'LPAREN':
+            # Parentheses right inside parentheses in a loop as well
+            starts = []
+            while types[self.i] == 'LPAREN':
+                starts.append(self.starts[self.i])
+                self.i += 1
+            x = self.expr()
+            for k in range(len(starts) - 1, -1, -1):
+                self.expect('RPAREN')
+                x = self.node(ParenExpr(x), starts[k])
+                if k:
+                    x = self.expr(x=x, start=starts[k])
+            return x
+        if t == 'TRUE' or t == 'FALSE':
+            self.i += 1
+            return self.node(BasicLit(Token.TRUE if t == 'TRUE' else Token.FALSE, None), start)
+        if t == 'MUL':
+            self.i += 1
+            return self.node(StarExpr(self.node(Ident(self.expect('IDENT')), self.starts[self.i - 1])), start)
+        if t == 'LBRACK':
+            _type = self.array_type()
+            if types[self.i] != 'LBRACE':
+                return _type
+            self.i += 1
+            if types[self.i] == 'RBRACE':
+                elts = []
+            else:
+                elts = self.literals()
+                if elts is None:
+                    elts = _items(self.expr())
+            self.expect('RBRACE')
+            return self.node(CompositeLit(_type, elts, False), start)
+        if t == 'MAP':
+            _type = self.map_type()
+            if types[self.i] != 'LBRACE':
+                return _type
+            self.i += 1
+            elts = [] if types[self.i] == 'RBRACE' else self.key_value_list()
+            self.expect('RBRACE')
+            return self.node(CompositeLit(_type, elts, False), start)
+        if t in _types and types[self.i + 1] == 'LPAREN':
+            return self.primary(start)
+        self.error()
+
+    def primary(self, start):
+        """Parse an identifier or a conversion and the selectors and calls chained to it.
+
+        Like the LALR engine, the operand of these stays a plain string
+        while it is an identifier or a type name.
+        """
+        types = self.types
+        x = self.value()
+        called = False
+        while True:
+            t = types[self.i]
+            if t == 'PERIOD':
+                t = types[self.i + 1]
+                if t == 'IDENT':
+                    self.i += 1
+                    x = self.node(SelectorExpr(x, self.value()), start)
+                    called = False
+                    continue
+                if t == 'LPAREN' and isinstance(x, str):
+                    self.i += 1
+                    return self.type_assert(x, start)
+            elif t == 'LPAREN' and not called:
+                self.i += 1
+                args = self.args()
+                ellipsis = types[self.i] == 'ELLIPSIS'
+                if ellipsis:
+                    self.i += 1
+                self.expect('RPAREN')
+                x = self.node(CallExpr(x, args, ellipsis=ellipsis), start)
+                called = True
+                continue
+            break
+        if isinstance(x, str):
+            return self.node(Ident(x), start)
+        return x
+
+    def type_assert(self, x, start):
+        self.expect('LPAREN')
+        _type = self.value() if self.types[self.i] == 'TYPE' else self.expr()
+        self.expect('RPAREN')
+        return self.node(TypeAssertExpr(x, _type), start)
+
+    def index(self, x, start):
+        types = self.types
+        self.i += 1
+        if types[self.i] == 'COLON':
+            self.i += 1
+            high = self.expr()
+            self.expect('RBRACK')
+            return self.node(SliceExpr(x, None, high, None, False), start)
+        low = self.expr()
+        if types[self.i] == 'RBRACK':
+            self.i += 1
+            return self.node(IndexExpr(x, low), start)
+        self.expect('COLON')
+        if types[self.i] == 'RBRACK':
+            self.i += 1
+            return self.node(SliceExpr(x, low, None, None, False), start)
+        high = self.expr()
+        _max = None
+        if types[self.i] == 'COLON':
+            self.i += 1
+            _max = self.expr()
+        self.expect('RBRACK')
+        return self.node(SliceExpr(x, low, high, _max, _max is not None), start)
+
+    def array_type(self):
+        start = self.starts[self.i]
+        self.expect('LBRACK')
+        _len = ''
+        if self.types[self.i] != 'RBRACK':
+            _len = self.expr()
+        self.expect('RBRACK')
+        t = self.types[self.i]
+        if t in _types:
+            elt = self.value()
+        elif t == 'LBRACK':
+            elt = self.array_type()
+        else:
+            self.error()
+        return self.node(ArrayType(_len, elt), start)
+
+    def literals(self):
+        """Return the elements of an array literal as a ``BasicLitList`` if they
+        are literals only, numbers possibly negated, like ``GoParser.literals``
+        does, else ``None``.
+        """
+        types = self.types
+        starts = self.starts
+        ends = self.ends
+        # Index of the first token of each element, and of its literal
+        elements = []
+        i = self.i
+        while True:
+            first = i
+            if types[i] == 'SUB' and types[i + 1] in _signed_literals and ends[i] == starts[i + 1]:
+                i += 1
+            if types[i] not in _literals:
+                return None
+            elements.append((first, i))
+            i += 1
+            t = types[i]
+            if t == 'COMMA':
+                i += 1
+                if types[i] == 'RBRACE':
+                    break
+            elif t == 'RBRACE':
+                break
+            else:
+                return None
+        text = self.text
+        self.i = i
+        return BasicLitList(
+            [_literals[types[j]].value for _, j in elements],
+            [text[starts[first]:ends[j]] for first, j in elements],
+            [starts[first] for first, _ in elements] if self.positions else None
+        )
+
+    def map_type(self):
+        types = self.types
+        start = self.starts[self.i]
+        self.i += 1
+        self.expect('LBRACK')
+        if types[self.i] in _types and types[self.i + 1] == 'RBRACK':
+            key = self.value()
+            self.i += 1
+            t = types[self.i]
+            if t in _types:
+                value = self.value()
+            elif t == 'INTERFACE':
+                value = self.interface_type()
+            else:
+                self.error()
+        else:
+            key = self.expr()
+            self.expect('RBRACK')
+            value = self.expr()
+        return self.node(MapType(key, value), start)
+
+    def interface_type(self):
+        start = self.starts[self.i]
+        self.i += 1
+        self.expect('LBRACE')
+        methods = self.field_list()
+        self.expect('RBRACE')
+        return self.node(InterfaceType(methods, False), start)
+
+    def key_value_list(self):
+        """Parse the ``key: value`` elements of a map literal.
+
+        A comma after a value starts either the next element or, when no
+        colon follows, a list of values, as in the LALR grammar.
+        """
+        types = self.types
+        elts = []
+        start = self.starts[self.i]
+        key = self.expr()
+        self.expect('COLON')
+        value = self.expr(0, 'COMMA')
+        end = self.ends[self.i - 1]
+        while types[self.i] == 'COMMA':
+            self.i += 1
+            if types[self.i] not in _expr_first:
+                break
+            x_start = self.starts[self.i]
+            x = self.expr()
+            if types[self.i] == 'COLON':
+                self.i += 1
+                elts.append(self.node(KeyValueExpr(key, value), start, end))
+                start = x_start
+                key = x
+                value = self.expr(0, 'COMMA')
+            else:
+                value = [value] + _items(x)
+            end = self.ends[self.i - 1]
+        elts.append(self.node(KeyValueExpr(key, value), start, end))
+        return elts
+
+
+_parser = DescentParser()
+
+
+def parse(text, positions=True, comments=True, lazy=False, limits=None):
+    return _parser.parse(text, positions=positions, comments=comments, lazy=lazy, limits=limits)
+
+
+def parse_fragment(rule, text, positions=True):
+    """Parse ``text`` with the ``rule`` method of :class:`DescentParser`
+    (``'expr'``, ``'stmt'``, ``'type_expr'`` or ``'decl'``), comments aside.
+    """
+    parser = DescentParser()
+    rule = partial(parser.fragment, getattr(parser, rule))
+    return parser.run(rule, text, Scanner().scan(text, 0, False), len(text), positions, False, False)
+
+
+def _parse_body(text, positions, comments, start, end):
+    return DescentParser().parse_body(text, start, end, positions=positions, comments=comments)
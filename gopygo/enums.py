@@ -89,3 +89,8 @@ class Token(Enum):
     VAR = 76
     TRUE = 77
     FALSE = 78
+    ADD_ASSIGN = 79
+    SUB_ASSIGN = 80
+    MUL_ASSIGN = 81
+    QUO_ASSIGN = 82
+    REM_ASSIGN = 83
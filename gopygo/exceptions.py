@@ -11,5 +11,27 @@ class LexerError(Exception):
     """Raised in case of a tokenizer error.
     """
 
-    def __init__(self, message):
+    def __init__(self, message, offset=None):
         super().__init__(message)
+        self.offset = offset
+
+
+class ParserError(Exception):
+    """Raised in case of a syntax error.
+    """
+
+    def __init__(self, message, offset=None):
+        super().__init__(message)
+        self.offset = offset
+
+
+class LimitError(Exception):
+    """Raised when a parse exceeds one of its resource limits or is
+    cancelled, see :class:`gopygo.limits.Limits`. ``limit`` is the name of
+    the limit: ``'max_tokens'``, ``'max_depth'``, ``'deadline'`` or ``'cancel'``.
+    """
+
+    def __init__(self, message, offset=None, limit=None):
+        super().__init__(message)
+        self.offset = offset
+        self.limit = limit
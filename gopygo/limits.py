@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: __init__
+    :synopsis: resource limits of a parse.
+"""
+
+import time
+
+from gopygo.exceptions import LimitError
+
+_opening = frozenset(('LPAREN', 'LBRACK', 'LBRACE'))
+_brackets = _opening | {'RPAREN', 'RBRACK', 'RBRACE'}
+
+# Tokens scanned between two looks at the clock and at the cancel flag
+CHECK_INTERVAL = 256
+
+
+class Limits():
+    """Resource limits of a parse, checked as its tokens are scanned.
+
+    ``max_tokens`` bounds the number of tokens, ``max_depth`` the nesting of
+    parentheses, brackets and braces, ``deadline`` is the
+    ``time.monotonic()`` value past which the parse stops and ``cancel`` an
+    object with an ``is_set()`` method (e.g. a ``threading.Event``) set from
+    another thread to stop it. ``None`` leaves a limit out.
+    """
+
+    def __init__(self, max_tokens=None, max_depth=None, deadline=None, cancel=None):
+        self.max_tokens = max_tokens
+        self.max_depth = max_depth
+        self.deadline = deadline
+        self.cancel = cancel
+        self.count = 0
+
+    def tokens(self, tokens):
+        """Yield the ``(type, start, end)`` ``tokens``, raising ``LimitError``
+        as soon as one of the limits is exceeded.
+        """
+        max_tokens = float('inf') if self.max_tokens is None else self.max_tokens
+        max_depth = float('inf') if self.max_depth is None else self.max_depth
+        count = self.count
+        # Next count at which to check the token count, deadline and cancel flag
+        check = count + 1
+        depth = 0
+        try:
+            for tok in tokens:
+                count += 1
+                if tok[0] in _brackets:
+                    if tok[0] in _opening:
+                        depth += 1
+                        if depth > max_depth:
+                            raise LimitError('Nesting deeper than %d' % self.max_depth, tok[1], 'max_depth')
+                    else:
+                        depth -= 1
+                if count >= check:
+                    if count > max_tokens:
+                        raise LimitError('More than %d tokens' % self.max_tokens, tok[1], 'max_tokens')
+                    self.check(tok[1])
+                    check = min(count + CHECK_INTERVAL, max_tokens + 1)
+                yield tok
+        finally:
+            self.count = count
+
+    def check(self, offset=None):
+        """Raise ``LimitError`` if the parse is cancelled or past its deadline.
+        """
+        if self.cancel is not None and self.cancel.is_set():
+            raise LimitError('Parse cancelled', offset, 'cancel')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise LimitError('Deadline exceeded', offset, 'deadline')
@@ -7,14 +7,33 @@
 """
 
 import os
-
-from sly import Lexer, Parser
-from sly.yacc import SlyLogger
+import re
+import gc
+import mmap
+import codecs
+import pickle
+import weakref
+from collections import deque
+from functools import partial
+from itertools import chain, repeat, takewhile
+from array import array
+from time import perf_counter
+from types import FunctionType
+
+from sly import Parser
+from sly.yacc import SlyLogger, YaccError, YaccSymbol, YaccProduction, LRTable, ERROR_COUNT
+
+from gopygo import tables, descent
+from gopygo.position import LineTable
 
 from gopygo.ast import (
+    Node,
     Ident,
     BasicLit,
+    BasicLitList,
+    _Offset,
     CompositeLit,
+    LazyBody,
     GenDecl,
     DeclStmt,
     Package,
@@ -55,10 +74,10 @@ from gopygo.ast import (
     TypeSpec,
     InterfaceType
 )
-from gopygo.exceptions import (
-    LexerError
-)
 from gopygo.enums import Token
+from gopygo.exceptions import LexerError, ParserError
+from gopygo.limits import Limits
+from gopygo.scanner import Scanner, KINDS
 
 
 def flatten(p):
@@ -74,175 +93,171 @@ def flatten(p):
     return tuple(new)
 
 
-class GoLexer(Lexer):
+class _Backward(list):
+    """Operands of ``expr COMMA expr`` in reverse order, see GoParser.parse().
+    """
+
+
+class LexToken():
+    """A token as consumed by ``GoParser``, positioned by its start and end offsets.
+    """
+
+    __slots__ = ('type', 'value', 'index', 'end')
+
+    def __repr__(self):
+        return 'LexToken(type=%r, value=%r, index=%r, end=%r)' % (self.type, self.value, self.index, self.end)
+
+
+class GoLexer(Scanner):
+    """The scanner producing the token stream consumed by ``GoParser``.
+    """
+
     tokens = {
         # Keywords
-        PACKAGE, FUNC, RETURN,
-        IMPORT, VAR, CONST, TYPE,
-        FOR, RANGE, BREAK, CONTINUE, GOTO, FALLTHROUGH,
-        IF, ELSE,
-        SWITCH, CASE, DEFAULT,
-        MAP,
-        STRUCT, INTERFACE,
+        'PACKAGE', 'FUNC', 'RETURN',
+        'IMPORT', 'VAR', 'CONST', 'TYPE',
+        'FOR', 'RANGE', 'BREAK', 'CONTINUE', 'GOTO', 'FALLTHROUGH',
+        'IF', 'ELSE',
+        'SWITCH', 'CASE', 'DEFAULT',
+        'MAP',
+        'STRUCT', 'INTERFACE',
 
         # Data types
-        BOOL,
-        INT8, INT16, INT32, INT64,
-        UINT8, UINT16, UINT32, UINT64,
-        INT, UINT, RUNE, BYTE, UINTPTR,
-        FLOAT32, FLOAT64,
-        COMPLEX64, COMPLEX128,
-        STRING,
+        'BOOL',
+        'INT8', 'INT16', 'INT32', 'INT64',
+        'UINT8', 'UINT16', 'UINT32', 'UINT64',
+        'INT', 'UINT', 'RUNE', 'BYTE', 'UINTPTR',
+        'FLOAT32', 'FLOAT64',
+        'COMPLEX64', 'COMPLEX128',
+        'STRING',
 
         # Identifiers and basic type literals
-        IDENT, IMAG_LITERAL, FLOAT_LITERAL, INT_LITERAL, CHAR_LITERAL, STRING_LITERAL, TRUE, FALSE,
+        'IDENT', 'IMAG_LITERAL', 'FLOAT_LITERAL', 'INT_LITERAL', 'CHAR_LITERAL', 'STRING_LITERAL', 'TRUE', 'FALSE',
 
         # Comment
-        COMMENT,
+        'COMMENT',
 
         # Operators
-        ADD_ASSIGN, SUB_ASSIGN, MUL_ASSIGN, QUO_ASSIGN, REM_ASSIGN,
-        AND_ASSIGN, OR_ASSIGN, XOR_ASSIGN, AND_NOT_ASSIGN, SHL_ASSIGN, SHR_ASSIGN,
-        LAND, LOR, ARROW, INC, DEC, EQL, SHL, SHR, AND_NOT,
-        NEQ, LEQ, GEQ, DEFINE, ELLIPSIS,
-        ADD, SUB, MUL, QUO, REM, AND, OR, XOR, LSS, GTR, ASSIGN, NOT,
+        'ADD_ASSIGN', 'SUB_ASSIGN', 'MUL_ASSIGN', 'QUO_ASSIGN', 'REM_ASSIGN',
+        'AND_ASSIGN', 'OR_ASSIGN', 'XOR_ASSIGN', 'AND_NOT_ASSIGN', 'SHL_ASSIGN', 'SHR_ASSIGN',
+        'LAND', 'LOR', 'ARROW', 'INC', 'DEC', 'EQL', 'SHL', 'SHR', 'AND_NOT',
+        'NEQ', 'LEQ', 'GEQ', 'DEFINE', 'ELLIPSIS',
+        'ADD', 'SUB', 'MUL', 'QUO', 'REM', 'AND', 'OR', 'XOR', 'LSS', 'GTR', 'ASSIGN', 'NOT',
 
         # Delimiters
-        LPAREN, LBRACK, LBRACE, COMMA, PERIOD,
-        RPAREN, RBRACK, RBRACE, SEMICOLON, COLON,
-        NEWLINE,
+        'LPAREN', 'LBRACK', 'LBRACE', 'COMMA', 'PERIOD',
+        'RPAREN', 'RBRACK', 'RBRACE', 'SEMICOLON', 'COLON',
     }
 
-    ignore = ' \t'
-
-    # Keywords
-    PACKAGE = 'package'
-    FUNC = 'func'
-    RETURN = 'return'
-    IMPORT = 'import'
-    VAR = 'var'
-    CONST = 'const'
-    TYPE = 'type'
-    FOR = 'for'
-    RANGE = 'range'
-    BREAK = 'break'
-    CONTINUE = 'continue'
-    GOTO = 'goto'
-    FALLTHROUGH = 'fallthrough'
-    IF = 'if'
-    ELSE = 'else'
-    SWITCH = 'switch'
-    CASE = 'case'
-    DEFAULT = 'DEFAULT'
-    MAP = 'map'
-    STRUCT = 'struct'
-    INTERFACE = 'interface'
-
-    # Data types
-    BOOL = 'bool'
-    INT8 = 'int8'
-    INT16 = 'int16'
-    INT32 = 'int32'
-    INT64 = 'int64'
-    UINT8 = 'uint8'
-    UINT16 = 'uint16'
-    UINT32 = 'uint32'
-    UINT64 = 'uint64'
-    INT = 'int'
-    UINT = 'uint'
-    RUNE = 'rune'
-    BYTE = 'byte'
-    UINTPTR = 'uintptr'
-    FLOAT32 = 'float32'
-    FLOAT64 = 'float64'
-    COMPLEX64 = 'complex64'
-    COMPLEX128 = 'complex128'
-    STRING = 'string'
-
-    # Identifiers and basic type literals
-    IMAG_LITERAL = r'[0-9]+\.[0-9]+i|[0-9]+i'
-    FLOAT_LITERAL = r'[0-9]+\.[0-9]+'
-    INT_LITERAL = r'[0-9]+e[0-9]+|[0-9]+'
-    CHAR_LITERAL = r'\'(\$\{.*\}|\\.|[^\'\\])*\''
-    STRING_LITERAL = r'\"(\$\{.*\}|\\.|[^\"\\])*\"'
-    TRUE = r'true'
-    FALSE = r'false'
-    IDENT = r'[a-zA-Z_][a-zA-Z0-9_]*'
-
-    # Comment
-    COMMENT = r'//.*\n'
-
-    # Operators
-    ADD_ASSIGN = r'\+='
-    SUB_ASSIGN = r'-='
-    MUL_ASSIGN = r'\*='
-    QUO_ASSIGN = r'/='
-    REM_ASSIGN = r'%='
-    AND_ASSIGN = r'&='
-    OR_ASSIGN = r'\|='
-    XOR_ASSIGN = r'\^='
-    AND_NOT_ASSIGN = r'&\^='
-    SHL_ASSIGN = r'<<='
-    SHR_ASSIGN = r'>>='
-
-    LAND = r'&&'
-    LOR = r'\|\|'
-    ARROW = r'<-'
-    INC = r'\+\+'
-    DEC = r'--'
-    EQL = r'=='
-    SHL = r'<<'
-    SHR = r'>>'
-    AND_NOT = r'&\^'
-    NEQ = r'!='
-    LEQ = r'<='
-    GEQ = r'>='
-    DEFINE = r':='
-    ELLIPSIS = r'\.\.\.'
-
-    ADD = r'\+'
-    SUB = r'-'
-    MUL = r'\*'
-    QUO = r'/'
-    REM = r'%'
-    AND = r'&'
-    OR = r'\|'
-    XOR = r'\^'
-    LSS = r'<'
-    GTR = r'>'
-    ASSIGN = r'='
-    NOT = r'\!'
-
-    # Delimiters
-    LPAREN = r'\('
-    LBRACK = r'\['
-    LBRACE = r'{'
-    COMMA = r'\,'
-    PERIOD = r'\.'
-
-    RPAREN = r'\)'
-    RBRACK = r'\]'
-    RBRACE = r'}'
-    SEMICOLON = r';'
-    COLON = r':'
-
-    NEWLINE = r'\n'
-
-    # # Ignored pattern
-    # ignore_newline = r'\n+'
-
-    # # Extra action for newlines
-    # def ignore_newline(self, t):
-    #     self.lineno += t.value.count('\n')
-
-    def error(self, t):
-        raise LexerError("Illegal character '%s'" % t.value[0])
+    def __init__(self):
+        super().__init__()
+        self.text = None
+
+    def tokenize(self, text, index=0, comments=True, lazy=False):
+        """Yield the tokens of ``text`` as expected by ``GoParser``, function
+        bodies as single BODY tokens if ``lazy`` (see :meth:`Scanner.scan_bodies`).
+        """
+        scan = self.scan_bodies if lazy else self.scan
+        return self.lex(text, scan(text, index, comments))
+
+    def lex(self, text, tokens):
+        """Turn the ``(type, start, end)`` ``tokens`` of ``text`` into ``LexToken``.
+        """
+        self.text = text
+        for _type, start, end in tokens:
+            tok = LexToken()
+            tok.type = _type
+            tok.value = text[start:end]
+            tok.index = start
+            tok.end = end
+            yield tok
+
+    def tokenize_compact(self, text, index=0, comments=True):
+        """Tokenize ``text`` in bulk into parallel arrays, see :class:`CompactTokens`.
+        """
+        codes = _kind_codes
+        offset_type = 'I' if len(text) < 2 ** 32 else 'Q'
+        kinds = array('B')
+        starts = array(offset_type)
+        ends = array(offset_type)
+        kinds_append = kinds.append
+        starts_append = starts.append
+        ends_append = ends.append
+        for _type, start, end in self.scan(text, index, comments):
+            kinds_append(codes[_type])
+            starts_append(start)
+            ends_append(end)
+        return CompactTokens(text, kinds, starts, ends)
+
+
+# Lexer token type -> gopygo.enums.Token value
+_kind_codes = {_type: kind.value for _type, kind in KINDS.items()}
+
+# gopygo.enums.Token value -> lexer token type, IDENT depends on the text
+_kind_types = {code: _type for _type, code in _kind_codes.items() if code != Token.IDENT.value}
+
+# Literal token type -> gopygo.enums.Token value, for BasicLitList
+_literal_codes = {
+    _type: _kind_codes[_type]
+    for _type in ('INT_LITERAL', 'FLOAT_LITERAL', 'IMAG_LITERAL', 'CHAR_LITERAL', 'STRING_LITERAL')
+}
+
+# Literals a BasicLitList element may negate, with the sign right before them
+_signed_literals = ('INT_LITERAL', 'FLOAT_LITERAL', 'IMAG_LITERAL')
+
+
+class CompactTokens():
+    """Token stream stored as parallel arrays instead of one object per token.
+
+    ``kinds[i]`` is the ``gopygo.enums.Token`` value of the i-th token and
+    ``text[starts[i]:ends[i]]`` its text, which is only sliced on demand.
+    """
+
+    def __init__(self, text, kinds, starts, ends):
+        self.text = text
+        self.kinds = kinds
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def kind(self, i):
+        return Token(self.kinds[i])
+
+    def value(self, i):
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def count(self, kind):
+        return self.kinds.count(kind.value)
+
+    def tokens(self):
+        """Yield SLY tokens, so the arrays can be fed to ``GoParser.parse``.
+        """
+        text = self.text
+        ident = Token.IDENT.value
+        types = GoLexer.types
+        for code, start, end in zip(self.kinds, self.starts, self.ends):
+            tok = LexToken()
+            tok.value = value = text[start:end]
+            if code == ident:
+                tok.type = types.get(value, 'IDENT')
+            else:
+                tok.type = _kind_types[code]
+            tok.index = start
+            tok.end = end
+            yield tok
 
 
 class GoParser(Parser):
     log = SlyLogger(open(os.devnull, 'w'))  # To enable logging: SlyLogger(sys.stderr)
 
-    tokens = GoLexer.tokens
+    # LITERALS is not produced by the lexer but by GoParser.literals(), BODY
+    # by GoLexer.tokenize(lazy=True) and BLOCK starts the tokens of a BODY.
+    # The START_* tokens select the fragment parsed by parse_expr() & co.
+    tokens = GoLexer.tokens | {
+        'LITERALS', 'BODY', 'BLOCK', 'START_EXPR', 'START_STMT', 'START_TYPE', 'START_DECL'
+    }
 
     precedence = (
         ('left', ADD, SUB),
@@ -253,42 +268,328 @@ class GoParser(Parser):
     def __init__(self):
         self.names = { }
 
+    @classmethod
+    def _build(cls, definitions):
+        # Same steps as sly.Parser._build, except that the LALR tables are loaded
+        # from the persisted artifact unless the grammar has changed since it was written.
+        rules = cls._Parser__collect_rules(definitions)
+        if not cls._Parser__validate_specification():
+            raise YaccError('Invalid parser specification')
+        cls._Parser__build_grammar(rules)
+
+        sig = tables.grammar_signature(cls)
+        data = tables.load(cls.__name__, sig)
+        if data is None:
+            cls._lrtable = LRTable(cls._grammar)
+            tables.save(cls.__name__, sig, tables.dump_lrtable(cls._lrtable))
+        else:
+            cls._lrtable = tables.load_lrtable(cls._grammar, data)
+        cls._comma = next(p.number for p in cls._grammar.Productions if p.prod == ('expr', 'COMMA', 'expr'))
+
+    def span(self, node, p, first=0, last=-1):
+        """Set the span of a ``node`` a rule builds besides the one it returns
+        to that of its symbols ``first`` to ``last``.
+        """
+        if self.positions and isinstance(node, Node):
+            start = p._slice[first].index
+            end = p._slice[last].end
+            if start is not None and end is not None:
+                node._span = start << 32 | end
+        return node
+
+    def parse(self, tokens, positions=True, bodies=None, profile=None, factory=None):
+        """Parse the ``tokens`` iterable. This is SLY's LALR driver, but the
+        ``(index, end)`` span of each reduction is stored on the ``Node`` it
+        returns (if ``positions``) instead of in per-parser position dicts.
+
+        ``bodies`` is the ``LazyBody.parse`` of the BODY tokens. The reductions
+        are recorded in ``profile``, a :class:`gopygo.profiling.ParseProfile`,
+        and build their nodes with the constructors of ``factory``, see
+        :func:`parse`.
+        """
+        lookahead = None
+        lookaheadstack = []
+        actions = self._lrtable.lr_action
+        goto = self._lrtable.lr_goto
+        prod = self._grammar.Productions
+        # Literals are only compacted into a BasicLitList for the ast nodes
+        compact = factory is None
+        if not compact:
+            prod = _factory_productions(prod, factory)
+        if profile is not None:
+            prod = profile.productions(prod)
+        defaulted_states = self._lrtable.defaulted_states
+        pslice = YaccProduction(None)
+        errorcount = 0
+
+        self.tokens = tokens
+        self.bodies = bodies
+        self.positions = positions
+        self.backward = 0
+        comma = self._comma
+        self.statestack = statestack = []
+        self.symstack = symstack = []
+        pslice._stack = symstack
+        self.restart()
+
+        errtoken = None
+        while True:
+            if self.state not in defaulted_states:
+                if not lookahead:
+                    if not lookaheadstack:
+                        lookahead = next(tokens, None)
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                t = actions[self.state].get(lookahead.type)
+            else:
+                t = defaulted_states[self.state]
+
+            if t is not None:
+                if t > 0:
+                    # Shift
+                    statestack.append(t)
+                    self.state = t
+                    symstack.append(lookahead)
+                    if lookahead.type == 'LBRACE' and symstack[-2].type == 'array_type' and not lookaheadstack and compact:
+                        lookahead = self.literals(tokens, lookaheadstack, positions)
+                    else:
+                        lookahead = None
+                    if errorcount:
+                        errorcount -= 1
+                    continue
+
+                if t < 0:
+                    # Reduce
+                    self.production = p = prod[-t]
+                    pname = p.name
+                    plen = p.len
+                    pslice._namemap = p.namemap
+                    pslice._slice = targ = symstack[-plen:] if plen else []
+
+                    if self.backward and -t != comma:
+                        # Lists of expressions taken by another rule
+                        for s in targ:
+                            if type(s.value) is _Backward:
+                                s.value.reverse()
+                                s.value = list(s.value)
+                                self.backward -= 1
+
+                    sym = YaccSymbol()
+                    sym.type = pname
+                    value = p.func(self, pslice)
+                    if value is pslice:
+                        value = (pname, *(s.value for s in targ))
+                    sym.value = value
+
+                    if plen:
+                        # Span of the reduced symbols, ignoring empty productions
+                        # at either side and a trailing SEMICOLON.
+                        start = targ[0].index
+                        if start is None:
+                            start = next((s.index for s in targ if s.index is not None), None)
+                        last = targ[-1]
+                        if last.type == 'SEMICOLON' and plen > 1:
+                            last = targ[-2]
+                        end = last.end
+                        if end is None:
+                            end = next((s.end for s in reversed(targ) if s.end is not None), None)
+                        sym.index = start
+                        sym.end = end
+                        if positions and start is not None and isinstance(value, Node) and value._span is None:
+                            value._span = start << 32 | end
+                        del symstack[-plen:]
+                        del statestack[-plen:]
+                    else:
+                        sym.index = sym.end = None
+                        if positions and isinstance(value, Node) and value._span is None:
+                            # Empty, right after the previous token
+                            end = getattr(symstack[-1], 'end', None)
+                            if end is not None:
+                                value._span = end << 32 | end
+
+                    symstack.append(sym)
+                    self.state = goto[statestack[-1]][pname]
+                    statestack.append(self.state)
+                    continue
+
+                if t == 0:
+                    return getattr(symstack[-1], 'value', None)
+
+            if t is None:
+                # Syntax error, same recovery as SLY
+                if errorcount == 0 or self.errorok:
+                    errorcount = ERROR_COUNT
+                    self.errorok = False
+                    if lookahead.type == '$end':
+                        errtoken = None
+                    else:
+                        errtoken = lookahead
+
+                    tok = self.error(errtoken)
+                    if tok:
+                        lookahead = tok
+                        self.errorok = True
+                        continue
+                    elif not errtoken:
+                        return
+                else:
+                    errorcount = ERROR_COUNT
+
+                if len(statestack) <= 1 and lookahead.type != '$end':
+                    lookahead = None
+                    self.state = 0
+                    del lookaheadstack[:]
+                    continue
+
+                if lookahead.type == '$end':
+                    return
+
+                if lookahead.type != 'error':
+                    sym = symstack[-1]
+                    if sym.type == 'error':
+                        lookahead = None
+                        continue
+                    t = YaccSymbol()
+                    t.type = 'error'
+                    t.index = getattr(lookahead, 'index', None)
+                    t.end = getattr(lookahead, 'end', None)
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    sym = symstack.pop()
+                    statestack.pop()
+                    self.state = statestack[-1]
+                continue
+
+            raise RuntimeError('sly: internal parser error!!!\n')
+
+    def literals(self, tokens, lookaheadstack, positions):
+        """Read ahead the elements of an array literal, right after its LBRACE.
+
+        If they are literals only, numbers possibly negated, return them as a
+        single LITERALS token holding a ``BasicLitList``, and push back the
+        RBRACE. Otherwise push back every token read and return ``None``.
+        """
+        kinds = []
+        values = []
+        starts = []
+        read = []
+        codes = _literal_codes
+        element = True
+        sign = None
+        for tok in tokens:
+            read.append(tok)
+            if tok.type == 'RBRACE':
+                if kinds:
+                    lookaheadstack.append(tok)
+                    lits = LexToken()
+                    lits.type = 'LITERALS'
+                    lits.value = BasicLitList(kinds, values, starts if positions else None)
+                    lits.index = read[0].index
+                    lits.end = read[-2].end
+                    return lits
+                break
+            if element:
+                if tok.type == 'SUB' and sign is None:
+                    sign = tok
+                    continue
+                code = codes.get(tok.type)
+                if code is None:
+                    break
+                if sign is None:
+                    values.append(tok.value)
+                    starts.append(tok.index)
+                elif tok.type in _signed_literals and sign.end == tok.index:
+                    values.append('-' + tok.value)
+                    starts.append(sign.index)
+                    sign = None
+                else:
+                    break
+                kinds.append(code)
+            elif tok.type != 'COMMA':
+                break
+            element = not element
+        lookaheadstack.extend(reversed(read))
+        return None
+
+    @_('BLOCK block_stmt')
+    def start(self, p):
+        return p.block_stmt
+
+    @_(
+        'START_EXPR expr',
+        'START_EXPR expr SEMICOLON',
+        'START_STMT stmt',
+        'START_STMT stmt SEMICOLON',
+        'START_TYPE _type',
+        'START_TYPE _type SEMICOLON',
+        'START_TYPE interface_type',
+        'START_TYPE interface_type SEMICOLON',
+        'START_TYPE expr',
+        'START_TYPE expr SEMICOLON',
+        'START_DECL func_decl',
+        'START_DECL func_decl SEMICOLON',
+        'START_DECL _import',
+        'START_DECL _import SEMICOLON',
+    )
+    def start(self, p):
+        return p[1]
+
+    @_(
+        'START_TYPE MUL _type',
+        'START_TYPE MUL _type SEMICOLON',
+    )
+    def start(self, p):
+        return StarExpr(p._type)
+
+    @_(
+        'START_DECL stmt',
+        'START_DECL stmt SEMICOLON',
+    )
+    def start(self, p):
+        return p.stmt.decl if isinstance(p.stmt, DeclStmt) else p.stmt
+
     @_(
         'line'
     )
     def start(self, p):
-        if isinstance(p.line, tuple) and len(p.line) == 1:
-            return p.line[0]
-        else:
-            return p.line
+        return _top_level(p.line)
 
     @_(
-        'package NEWLINE line',
-        'package NEWLINE',
-        'NEWLINE line',
-        '_import NEWLINE line',
-        '_import NEWLINE',
-        'comment line',
+        'package SEMICOLON',
+        '_import SEMICOLON',
         'comment',
-        'func_decl NEWLINE line',
-        'func_decl NEWLINE',
-        'stmt line',
-        'stmt'
+        'func_decl SEMICOLON',
+        'stmt SEMICOLON',
+        'labeled_stmt',
+        'line package SEMICOLON',
+        'line _import SEMICOLON',
+        'line comment',
+        'line func_decl SEMICOLON',
+        'line stmt SEMICOLON',
+        'line labeled_stmt'
     )
     def line(self, p):
-        if isinstance(p[0], Package):
-            file = File(p[0])
-            if len(p) > 2:
-                for i in p.line:
-                    file.decls.append(i)
-            return file
+        if hasattr(p, 'line'):
+            items = p.line
+            item = p[1]
         else:
-            if isinstance(p[0], Comment):
-                p[0].text += '\n'
-            if len(p) > 1:
-                return tuple(filter(lambda x: x!= '\n', flatten(p)))
-            else:
-                return p[0]
+            items = []
+            item = p[0]
+        # Everything after a package clause is a declaration of its File.
+        decls = items
+        while decls and isinstance(decls[-1], File):
+            decls = decls[-1].decls
+        if isinstance(item, Package):
+            item = File(item)
+        elif isinstance(item, Comment):
+            item.text += '\n'
+        decls.append(item)
+        return items
 
     @_('PACKAGE IDENT')
     def package(self, p):
@@ -298,10 +599,8 @@ class GoParser(Parser):
         'IMPORT STRING_LITERAL',
         'IMPORT IDENT STRING_LITERAL',
         'IMPORT PERIOD STRING_LITERAL',
-        'IMPORT LPAREN _import_list NEWLINE RPAREN',
         'IMPORT LPAREN _import_list RPAREN',
-        'IMPORT LPAREN NEWLINE _import_list NEWLINE RPAREN',
-        'IMPORT LPAREN NEWLINE _import_list RPAREN',
+        'IMPORT LPAREN _import_list SEMICOLON RPAREN',
     )
     def _import(self, p):
         if hasattr(p, 'STRING_LITERAL'):
@@ -311,9 +610,10 @@ class GoParser(Parser):
             elif hasattr(p, 'PERIOD'):
                 ident = p.PERIOD
 
+            path = self.span(BasicLit(Token.STRING, p.STRING_LITERAL[1:-1]), p, -1)
             return GenDecl(
                 p[0],
-                [ImportSpec(ident, BasicLit(Token.STRING, p.STRING_LITERAL[1:-1]))]
+                [self.span(ImportSpec(ident, path), p, 1)]
             )
         else:
             return GenDecl(
@@ -321,19 +621,16 @@ class GoParser(Parser):
                 p._import_list
             )
 
+    # The lists below are left recursive and appended to in place, so that they
+    # are built in linear time without piling their items up on the parser stack.
+
     @_(
         'STRING_LITERAL',
-        'STRING_LITERAL NEWLINE',
-        'STRING_LITERAL _import_list',
-        'STRING_LITERAL NEWLINE _import_list',
         'IDENT STRING_LITERAL',
-        'IDENT STRING_LITERAL NEWLINE',
-        'IDENT STRING_LITERAL _import_list',
-        'IDENT STRING_LITERAL NEWLINE _import_list',
         'PERIOD STRING_LITERAL',
-        'PERIOD STRING_LITERAL NEWLINE',
-        'PERIOD STRING_LITERAL _import_list',
-        'PERIOD STRING_LITERAL NEWLINE _import_list'
+        '_import_list SEMICOLON STRING_LITERAL',
+        '_import_list SEMICOLON IDENT STRING_LITERAL',
+        '_import_list SEMICOLON PERIOD STRING_LITERAL',
     )
     def _import_list(self, p):
         ident = None
@@ -342,10 +639,13 @@ class GoParser(Parser):
         elif hasattr(p, 'PERIOD'):
             ident = p.PERIOD
 
+        path = self.span(BasicLit(Token.STRING, p.STRING_LITERAL[1:-1]), p, -1)
+        spec = self.span(ImportSpec(ident, path), p, 2 if hasattr(p, '_import_list') else 0)
         if hasattr(p, '_import_list'):
-            return [ImportSpec(ident, BasicLit(Token.STRING, p.STRING_LITERAL[1:-1]))] + p._import_list
+            p._import_list.append(spec)
+            return p._import_list
         else:
-            return [ImportSpec(ident, BasicLit(Token.STRING, p.STRING_LITERAL[1:-1]))]
+            return [spec]
 
     @_('FUNC IDENT func_type block_stmt')
     def func_decl(self, p):
@@ -374,18 +674,28 @@ class GoParser(Parser):
 
     @_(
         '',
-        'field',
-        'field COMMA field_list',
-        'field NEWLINE field_list'
+        'fields',
+        'fields COMMA',
+        'fields SEMICOLON'
     )
     def field_list(self, p):
-        if len(p) > 2:
-            return FieldList([p.field] + p.field_list.list)
-        elif len(p) == 1:
-            return FieldList([p.field])
+        if len(p):
+            return FieldList(p.fields)
         else:
             return FieldList([])
 
+    @_(
+        'field',
+        'fields COMMA field',
+        'fields SEMICOLON field'
+    )
+    def fields(self, p):
+        if len(p) > 1:
+            p.fields.append(p.field)
+            return p.fields
+        else:
+            return [p.field]
+
     @_(
         '_type',
         'ELLIPSIS _type',
@@ -413,28 +723,34 @@ class GoParser(Parser):
         'IDENT LPAREN RPAREN ELLIPSIS MUL expr',
     )
     def field(self, p):
+        types = [symbol.type for symbol in p._slice]
         _type = None
         if not hasattr(p, '_type'):
-            _type = StarExpr(p.expr)
+            _type = self.span(StarExpr(p.expr), p, types.index('MUL'))
         else:
-            _type = StarExpr(p._type) if hasattr(p, 'MUL') else p._type
+            _type = self.span(StarExpr(p._type), p, types.index('MUL')) if hasattr(p, 'MUL') else p._type
 
         if hasattr(p, 'LPAREN'):
             name = None
             if hasattr(p, 'IDENT'):
                 name = p.IDENT
+            lparen = types.index('LPAREN')
+            params = FieldList([])
+            if self.positions and p._slice[lparen].end is not None:
+                # Empty, right after the parenthesis
+                params._span = p._slice[lparen].end << 32 | p._slice[lparen].end
             return Field(
                 name,
-                FuncType(
-                    FieldList([]),
-                    FieldList([
-                        Field(None, _type)
-                    ])
-                )
+                self.span(FuncType(
+                    params,
+                    self.span(FieldList([
+                        self.span(Field(None, _type), p, lparen + 2)
+                    ]), p, lparen + 2)
+                ), p, 0 if hasattr(p, 'FUNC') else lparen)
             )
 
         if hasattr(p, 'ELLIPSIS'):
-            _type = Ellipsis(_type)
+            _type = self.span(Ellipsis(_type), p, types.index('ELLIPSIS'))
 
         if (hasattr(p, '_type') or hasattr(p, 'expr')) and hasattr(p, 'IDENT'):
             return Field(p.IDENT, _type)
@@ -443,45 +759,70 @@ class GoParser(Parser):
 
     @_(
         'LBRACE stmts RBRACE',
-        'LBRACE NEWLINE stmts RBRACE',
         'LBRACE case_clause_list RBRACE',
-        'LBRACE NEWLINE case_clause_list RBRACE',
+        'LBRACE RBRACE',
     )
     def block_stmt(self, p):
         if hasattr(p, 'stmts'):
             return BlockStmt(p.stmts)
         elif hasattr(p, 'case_clause_list'):
             return BlockStmt(p.case_clause_list)
+        else:
+            return BlockStmt([])
+
+    @_('BODY')
+    def block_stmt(self, p):
+        return LazyBody(self.bodies, p.index, p.end)
 
     @_(
         'case_clause',
-        'case_clause case_clause_list',
+        'case_clause_list case_clause',
     )
     def case_clause_list(self, p):
         if len(p) > 1:
-            return [p.case_clause] + p.case_clause_list
+            p.case_clause_list.append(p.case_clause)
+            return p.case_clause_list
         else:
             return [p.case_clause]
 
     @_(
-        'stmt',
-        'stmt stmts',
-        'NEWLINE stmts'
+        'open_stmts',
+        'closed_stmts'
     )
     def stmts(self, p):
-        if p[0] == '\n':
-            return p.stmts
-        elif len(p) > 1:
-            if isinstance(p.stmt, LabeledStmt) and p.stmt.label == 'default':
-                return [CaseClause([], p.stmts)]
-            return [p.stmt] + p.stmts
+        return p[0]
+
+    # A statement needs a SEMICOLON before the next one, a comment or a label does not.
+
+    @_(
+        'stmt',
+        'closed_stmts stmt'
+    )
+    def open_stmts(self, p):
+        if len(p) > 1:
+            p.closed_stmts.append(p.stmt)
+            return p.closed_stmts
         else:
             return [p.stmt]
 
     @_(
-        'expr',
-        'expr NEWLINE'
+        'open_stmts SEMICOLON',
+        'comment',
+        'closed_stmts comment',
+        'labeled_stmt',
+        'closed_stmts labeled_stmt'
     )
+    def closed_stmts(self, p):
+        if hasattr(p, 'open_stmts'):
+            return p.open_stmts
+        stmt = self.span(ExprStmt(p.comment), p, -1) if hasattr(p, 'comment') else p.labeled_stmt
+        if hasattr(p, 'closed_stmts'):
+            p.closed_stmts.append(stmt)
+            return p.closed_stmts
+        else:
+            return [stmt]
+
+    @_('expr')
     def stmt(self, p):
         return ExprStmt(p.expr)
 
@@ -503,6 +844,7 @@ class GoParser(Parser):
     )
     def call_expr(self, p):
         ellipsis = True if hasattr(p, 'ELLIPSIS') else False
+        p.args.reverse()
         return CallExpr(p[0], p.args, ellipsis=ellipsis)
 
     @_('selector_expr')
@@ -524,33 +866,26 @@ class GoParser(Parser):
         'expr PERIOD LPAREN TYPE RPAREN',
     )
     def expr(self, p):
-        _type = p[3] if p[3] != GoLexer.TYPE else None
+        _type = p[3] if p[3] != 'type' else None
         return TypeAssertExpr(p[0], p[3])
 
-    @_('comment')
-    def expr(self, p):
-        return p.comment
-
-    @_(
-        'assign_stmt NEWLINE',
-        'assign_stmt'
-    )
+    @_('assign_stmt')
     def stmt(self, p):
         return p.assign_stmt
 
-    @_('for_stmt NEWLINE')
+    @_('for_stmt')
     def stmt(self, p):
         return p.for_stmt
 
-    @_('range_stmt NEWLINE')
+    @_('range_stmt')
     def stmt(self, p):
         return p.range_stmt
 
-    @_('if_stmt NEWLINE')
+    @_('if_stmt')
     def stmt(self, p):
         return p.if_stmt
 
-    @_('switch_stmt NEWLINE')
+    @_('switch_stmt')
     def stmt(self, p):
         return p.switch_stmt
 
@@ -643,9 +978,12 @@ class GoParser(Parser):
         )
 
     @_(
-        'CASE expr COLON NEWLINE stmts',
-        'CASE _type_list COLON NEWLINE stmts',
-        'DEFAULT COLON NEWLINE stmts',
+        'CASE expr COLON stmts',
+        'CASE _type_list COLON stmts',
+        'DEFAULT COLON stmts',
+        'CASE expr COLON',
+        'CASE _type_list COLON',
+        'DEFAULT COLON',
     )
     def case_clause(self, p):
         expr = p.expr if hasattr(p, 'expr') else []
@@ -653,7 +991,7 @@ class GoParser(Parser):
         expr = [expr] if not isinstance(expr, list) else expr
         _type_list = [_type_list] if not isinstance(_type_list, list) else _type_list
         expr += _type_list
-        return CaseClause(expr, p.stmts)
+        return CaseClause(expr, p.stmts if hasattr(p, 'stmts') else [])
 
     @_(
         '_type',
@@ -666,25 +1004,21 @@ class GoParser(Parser):
             return [p._type]
 
     @_(
-        'RETURN args NEWLINE',
-        'RETURN func_lits NEWLINE'
+        'RETURN args',
+        'RETURN func_lits'
     )
     def stmt(self, p):
+        if hasattr(p, 'args'):
+            p.args.reverse()
         return ReturnStmt(p[1])
 
     @_(
-        'TYPE IDENT STRUCT LBRACE field_list RBRACE NEWLINE',
-        'TYPE IDENT STRUCT LBRACE NEWLINE field_list RBRACE NEWLINE',
-        'TYPE IDENT STRUCT LBRACE field_list NEWLINE RBRACE NEWLINE',
-        'TYPE IDENT STRUCT LBRACE NEWLINE field_list NEWLINE RBRACE NEWLINE',
-        'TYPE IDENT INTERFACE LBRACE field_list RBRACE NEWLINE',
-        'TYPE IDENT INTERFACE LBRACE NEWLINE field_list RBRACE NEWLINE',
-        'TYPE IDENT INTERFACE LBRACE field_list NEWLINE RBRACE NEWLINE',
-        'TYPE IDENT INTERFACE LBRACE NEWLINE field_list NEWLINE RBRACE NEWLINE',
-        'VAR value_spec NEWLINE',
-        'CONST value_spec NEWLINE',
-        'IMPORT value_spec NEWLINE',
-        'TYPE value_spec NEWLINE',
+        'TYPE IDENT STRUCT LBRACE field_list RBRACE',
+        'TYPE IDENT INTERFACE LBRACE field_list RBRACE',
+        'VAR value_spec',
+        'CONST value_spec',
+        'IMPORT value_spec',
+        'TYPE value_spec',
     )
     def stmt(self, p):
         if hasattr(p, 'IDENT'):
@@ -694,29 +1028,29 @@ class GoParser(Parser):
             else:
                 _type = StructType(p.field_list, False)
             return DeclStmt(
-                GenDecl(
+                self.span(GenDecl(
                     p[0],
                     [
-                        TypeSpec(
+                        self.span(TypeSpec(
                             p.IDENT,
-                            _type
-                        )
+                            self.span(_type, p, 2)
+                        ), p, 1)
                     ]
-                )
+                ), p)
             )
         else:
             return DeclStmt(
-                GenDecl(
+                self.span(GenDecl(
                     p[0],
                     [p.value_spec]
-                )
+                ), p)
             )
 
     @_(
-        'BREAK NEWLINE',
-        'CONTINUE NEWLINE',
-        'GOTO IDENT NEWLINE',
-        'FALLTHROUGH NEWLINE'
+        'BREAK',
+        'CONTINUE',
+        'GOTO IDENT',
+        'FALLTHROUGH'
     )
     def stmt(self, p):
         if hasattr(p, 'GOTO'):
@@ -727,7 +1061,7 @@ class GoParser(Parser):
     @_(
         'IDENT COLON'
     )
-    def stmt(self, p):
+    def labeled_stmt(self, p):
         return LabeledStmt(p.IDENT)
 
     @_(
@@ -738,8 +1072,13 @@ class GoParser(Parser):
         'TYPE COMMA args',
     )
     def args(self, p):
+        # Unlike the lists above, args and key_value_list have to stay right
+        # recursive: the first expression of ``expr COMMA args`` would also be
+        # a valid ``expr COMMA expr`` operand. To still be built in linear time
+        # they are collected back to front and reversed by the rule using them.
         if len(p) > 2:
-            return [p[0]] + p[2]
+            p[2].append(p[0])
+            return p[2]
         elif len(p) == 1:
             return [p[0]]
         else:
@@ -823,7 +1162,7 @@ class GoParser(Parser):
     )
     def expr(self, p):
         if len(p) == 5:
-            if p[2] == GoLexer.COLON:
+            if p[2] == ':':
                 return SliceExpr(p.expr0, None, p.expr1, None, False)
             else:
                 return SliceExpr(p.expr0, p.expr1, None, None, False)
@@ -852,38 +1191,38 @@ class GoParser(Parser):
 
     @_(
         'expr COLON expr',
-        'expr COLON expr COMMA NEWLINE',
+        'expr COLON expr COMMA',
         'expr COLON expr COMMA key_value_list',
-        'expr COLON expr COMMA NEWLINE key_value_list',
     )
     def key_value_list(self, p):
         if hasattr(p, 'key_value_list'):
-            return [KeyValueExpr(p.expr0, p.expr1)] + p.key_value_list
+            p.key_value_list.append(self.span(KeyValueExpr(p.expr0, p.expr1), p, 0, 2))
+            return p.key_value_list
         else:
-            return [KeyValueExpr(p.expr0, p.expr1)]
+            return [self.span(KeyValueExpr(p.expr0, p.expr1), p, 0, 2)]
 
     @_(
         'map_type LBRACE key_value_list RBRACE',
-        'map_type LBRACE NEWLINE key_value_list RBRACE',
         'map_type LBRACE RBRACE',
     )
     def expr(self, p):
         expr = []
         if hasattr(p, 'key_value_list'):
-            expr = p.key_value_list if isinstance(p.key_value_list, list) else [p.key_value_list]
+            expr = p.key_value_list
+            expr.reverse()
         return CompositeLit(p.map_type, expr, False)
 
     @_(
         'array_type LBRACE expr RBRACE',
-        'array_type LBRACE NEWLINE expr RBRACE',
-        'array_type LBRACE expr NEWLINE RBRACE',
-        'array_type LBRACE NEWLINE expr NEWLINE RBRACE',
+        'array_type LBRACE LITERALS RBRACE',
         'array_type LBRACE RBRACE',
     )
     def expr(self, p):
         expr = []
         if hasattr(p, 'expr'):
             expr = p.expr if isinstance(p.expr, list) else [p.expr]
+        elif hasattr(p, 'LITERALS'):
+            expr = p.LITERALS
         return CompositeLit(p.array_type, expr, False)
 
     @_(
@@ -959,7 +1298,7 @@ class GoParser(Parser):
 
     @_('STRING_LITERAL')
     def expr(self, p):
-        return BasicLit(Token.STRING, p.STRING_LITERAL[1:-1])
+        return BasicLit(Token.STRING, p.STRING_LITERAL[1:-1], raw=p.STRING_LITERAL[0] == '`')
 
     @_('TRUE')
     def expr(self, p):
@@ -969,31 +1308,1152 @@ class GoParser(Parser):
     def expr(self, p):
         return BasicLit(Token.FALSE, None)
 
-    @_(
-        'expr COMMA expr',
-        'expr COMMA NEWLINE expr'
-    )
+    @_('expr COMMA expr')
     def expr(self, p):
-        return [p.expr0] + list(flatten(p.expr1))
-
-    @_(
-        'expr COMMA',
-        'expr COMMA NEWLINE'
-    )
+        # The rule is right recursive: the list is built back to front, in
+        # place, and put in order by parse() once another rule takes it.
+        expr = p.expr1
+        if type(expr) is not _Backward:
+            expr = _Backward(reversed(flatten(expr)))
+            self.backward += 1
+        expr.append(p.expr0)
+        return expr
+
+    @_('expr COMMA')
     def expr(self, p):
         return p.expr
 
     @_('MUL IDENT')
     def expr(self, p):
-        return StarExpr(Ident(p.IDENT))
+        return StarExpr(self.span(Ident(p.IDENT), p, 1))
 
     @_('IDENT')
     def expr(self, p):
         return Ident(p.IDENT)
 
 
+def _top_level(items):
+    """Return the parse result for the top level ``items``.
+    """
+    # The span of a File runs up to the end of its last declaration, which
+    # is only known now. Files nest when there are several package clauses.
+    files = []
+    last = items[-1]
+    while isinstance(last, File):
+        files.append(last)
+        last = last.decls[-1] if last.decls else None
+    for file in reversed(files):
+        if file.name._span is not None:
+            # Factory made declarations may have no end
+            end = getattr(file.decls[-1], 'end', None) if file.decls else None
+            if end is None:
+                end = file.name.end
+            file._span = file.name.pos << 32 | end
+    if len(items) == 1:
+        return items[0]
+    else:
+        return tuple(items)
+
+
 lexer = GoLexer()
 parser = GoParser()
 
-def parse(text):
-    return parser.parse(lexer.tokenize(text.lstrip().rstrip() + '\n'))
+
+def tokenize_compact(text, comments=True):
+    """Tokenize ``text`` in bulk into a :class:`CompactTokens`, whose parallel
+    arrays hold the kind and offsets of each token, without the comments
+    unless ``comments``.
+    """
+    return lexer.tokenize_compact(text, comments=comments)
+
+
+MODES = (None, 'imports_only', 'lazy_bodies')
+
+
+def imports_end(text):
+    """Return the offset where the package clause and the import declarations
+    at the top of ``text`` end, scanning no further than the first token after
+    them, or ``None`` if the text ends before any other declaration.
+
+    Comments between the imports and the next declaration are left out, a
+    comment at the end of an import line is kept.
+    """
+    end = 0
+    depth = 0
+    line_start = True
+    trailing = False
+    for _type, start, stop in Scanner().scan(text):
+        if depth:
+            if _type == 'RPAREN':
+                depth -= 1
+        elif line_start:
+            if _type == 'COMMENT':
+                if not trailing:
+                    continue
+            elif _type == 'PACKAGE' or _type == 'IMPORT':
+                line_start = False
+            elif _type != 'SEMICOLON':
+                # A token cut at the end of the text might be part of a longer one
+                return end if stop < len(text) else None
+        elif _type == 'LPAREN':
+            depth += 1
+        elif _type == 'SEMICOLON':
+            line_start = True
+        trailing = _type == 'SEMICOLON' and start == stop
+        end = stop
+    return None
+
+
+def _imports_text(buf):
+    """Decode the start of ``buf`` up to the end of its imports, doubling the
+    decoded prefix until it holds them.
+    """
+    size = 4096
+    while size < len(buf):
+        prefix = buf[:size]
+        try:
+            # Stops at a character cut by the prefix
+            text = codecs.getincrementaldecoder('utf-8')().decode(prefix)
+        except UnicodeDecodeError as e:
+            # Invalid past the imports is fine, str() below raises otherwise
+            text = str(prefix[:e.start], 'utf-8')
+        try:
+            end = imports_end(text)
+        except LexerError:
+            # e.g. a string literal cut by the prefix
+            end = None
+        if end is not None:
+            return text[:end]
+        size *= 2
+    return str(buf, 'utf-8')
+
+
+# Start of a line opening a top level declaration, see _boundaries()
+_decl_re = re.compile(r'^(?:func|type|var|const)\b', re.M)
+
+
+def _boundaries(text, count):
+    """Return the offsets splitting ``text`` in up to ``count`` chunks of about
+    the same size, at the start of lines opening a top level declaration.
+
+    These are only candidates: such a line may as well be in a raw string, a
+    comment or a function literal, see :class:`_Chunk`.
+    """
+    bounds = [0]
+    for i in range(1, count):
+        m = _decl_re.search(text, max(len(text) * i // count, bounds[-1] + 1))
+        if m is None:
+            break
+        bounds.append(m.start())
+    bounds.append(len(text))
+    return bounds
+
+
+class _Chunk():
+    """Iterable over the ``(type, start, end)`` tokens of ``text[start:end]``.
+
+    Once iterated, ``clean`` tells whether ``end`` is a top level boundary:
+    no token spans it and it follows a semicolon out of any bracket.
+    """
+
+    def __init__(self, text, start, end, comments, limits=None):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.comments = comments
+        self.limits = limits
+        self.clean = False
+
+    def __iter__(self):
+        # The limits count the tokens of the chunk only
+        if self.limits is not None:
+            return self.limits.tokens(self._tokens())
+        return self._tokens()
+
+    def _tokens(self):
+        end = self.end
+        last_chunk = end == len(self.text)
+        depth = 0
+        last = 'SEMICOLON'
+        for tok in Scanner().scan(self.text, self.start, self.comments):
+            _type, start, stop = tok
+            if start >= end and not last_chunk:
+                break
+            if stop > end:
+                return
+            if _type in ('LPAREN', 'LBRACK', 'LBRACE'):
+                depth += 1
+            elif _type in ('RPAREN', 'RBRACK', 'RBRACE'):
+                depth -= 1
+            if _type != 'COMMENT':
+                last = _type
+            yield tok
+        self.clean = last_chunk or depth == 0 and last == 'SEMICOLON'
+
+
+_chunk_text = None
+
+
+def _init_chunks(text):
+    global _chunk_text
+    _chunk_text = text
+
+
+def _syntax_error(text, token):
+    # Same errors as the descent parser
+    if token is None:
+        raise ParserError('Unexpected end of input', len(text))
+    line, column = LineTable(text).position(token.index)
+    raise ParserError(
+        'Unexpected %r at line %d, column %d' % (text[token.index:token.end], line, column),
+        token.index
+    )
+
+
+def _items(text, start, end, positions, comments, engine, limits=None):
+    """Parse the top level items of ``text[start:end]``.
+
+    Return them, or ``None`` if ``end`` turns out not to be a top level
+    boundary. Raise ``LexerError`` or ``ParserError`` on syntax errors.
+    """
+    tokens = _Chunk(text, start, end, comments, limits)
+    try:
+        if engine == 'descent':
+            chunk_parser = descent.DescentParser()
+            items, _ = chunk_parser.run(chunk_parser.line, text, tokens, end, positions, comments, False, limits)
+        else:
+            parser.error = partial(_syntax_error, text)
+            try:
+                result = parser.parse(lexer.lex(text, tokens), positions=positions)
+            finally:
+                del parser.error
+            items = [] if result is None else list(result) if isinstance(result, tuple) else [result]
+    except (LexerError, ParserError) as e:
+        # Running out of tokens before end of text is no syntax error
+        if end < len(text) and e.offset is not None and e.offset >= end:
+            return None
+        raise
+    if not tokens.clean:
+        return None
+    return items
+
+
+def _parse_items(text, start, end, positions, comments, engine):
+    """Parse the top level items of ``text[start:end]``.
+
+    Return them, or ``None`` on syntax errors or if ``end`` turns out not to
+    be a top level boundary.
+    """
+    try:
+        return _items(text, start, end, positions, comments, engine)
+    except (LexerError, ParserError):
+        return None
+
+
+def _append_items(items, new_items):
+    """Append the top level ``new_items`` to ``items``, in the innermost
+    ``File`` if any.
+    """
+    for item in new_items:
+        # As in GoParser.line(): everything after a package clause is a declaration of its File.
+        decls = items
+        while decls and isinstance(decls[-1], File):
+            decls = decls[-1].decls
+        decls.append(item)
+
+
+def _parse_chunk(start, end, positions, comments, engine):
+    """Parse the top level items of ``text[start:end]`` in a worker process,
+    see :func:`_parse_items`, and return them pickled.
+    """
+    items = _parse_items(_chunk_text, start, end, positions, comments, engine)
+    return None if items is None else pickle.dumps(items, pickle.HIGHEST_PROTOCOL)
+
+
+def _parse_text_chunk(chunk, start, end, positions, comments, engine):
+    """Same as :func:`_parse_chunk` in a worker the text was not sent to,
+    ``chunk`` being the text from ``start`` to one character past ``end``
+    (to check it is a boundary) unless it is the end of the text.
+    """
+    items = _parse_items(chunk, 0, end - start, positions, comments, engine)
+    if items is None:
+        return None
+    if positions and start:
+        # Offsets in the text rather than in the chunk
+        _shift(items, start)
+    return pickle.dumps(items, pickle.HIGHEST_PROTOCOL)
+
+
+def _parse_parallel(text, positions, comments, engine, workers, executor=None):
+    """Parse the chunks of ``text`` found by :func:`_boundaries` in a pool of
+    ``workers`` processes, or with the ``executor`` given, and merge their
+    top level items in source order.
+
+    Return ``None`` if there are less than two chunks or if one of them does
+    not parse on its own.
+    """
+    bounds = _boundaries(text, workers * 4)
+    if len(bounds) < 3:
+        return None
+    if executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(workers, initializer=_init_chunks, initargs=(text,)) as pool:
+            chunks = list(pool.map(
+                _parse_chunk, bounds[:-1], bounds[1:], repeat(positions), repeat(comments), repeat(engine)
+            ))
+    else:
+        # The chunks go with the tasks, the workers may serve other parses
+        texts = (text[start:end + 1] for start, end in zip(bounds, bounds[1:]))
+        chunks = list(executor.map(
+            _parse_text_chunk, texts, bounds[:-1], bounds[1:], repeat(positions), repeat(comments), repeat(engine)
+        ))
+    if None in chunks:
+        return None
+    items = []
+    # Unpickling allocates the whole tree at once, the collector would keep
+    # scanning it in vain.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for chunk in chunks:
+            _append_items(items, pickle.loads(chunk))
+    finally:
+        if enabled:
+            gc.enable()
+    return _top_level(items)
+
+
+# Lines starting a top level item, where parsing resumes after an error
+_item_start_re = re.compile(r'^(?:package|import|func|type|var|const)\b', re.M)
+
+# Size of the chunks parsed at once when recovering from errors
+RECOVER_CHUNK = 8192
+
+
+def _item_bounds(text, pos, offset):
+    """Return the offsets of the lines of ``text`` after ``pos`` up to
+    ``offset`` where a top level item starts: the line of the first token
+    after a semicolon out of any bracket, comments aside.
+    """
+    bounds = []
+    depth = 0
+    last = 'SEMICOLON'
+    try:
+        for _type, start, _ in Scanner().scan(text, pos):
+            if start > offset:
+                break
+            if _type == 'COMMENT':
+                continue
+            if last == 'SEMICOLON' and depth == 0 and _type != 'SEMICOLON':
+                bound = text.rfind('\n', 0, start) + 1
+                if bound > pos and (not bounds or bound > bounds[-1]):
+                    bounds.append(bound)
+            if _type in ('LPAREN', 'LBRACK', 'LBRACE'):
+                depth += 1
+            elif _type in ('RPAREN', 'RBRACK', 'RBRACE'):
+                depth -= 1
+            last = _type
+    except LexerError:
+        pass
+    return bounds
+
+
+def _skip_error(text, pos, offset, positions, comments, engine):
+    """Return the top level items of ``text`` from ``pos`` before the one
+    the syntax error at ``offset`` is in, and the offset of the next item
+    to resume at (``None`` if no line after the error starts one).
+    """
+    # The item with the error starts at the last item boundary where the
+    # items before it parse.
+    bounds = _item_bounds(text, pos, offset)
+    m = _item_start_re.search(text, offset + 1)
+    resume = None if m is None else m.start()
+    items = []
+    kept = pos
+    for bound in reversed(bounds):
+        chunk = _parse_items(text, pos, bound, positions, comments, engine)
+        if chunk is not None:
+            items = chunk
+            kept = bound
+            break
+    return items, next((bound for bound in bounds if bound > kept), resume)
+
+
+def _chunk_items(text, pos, size, positions, comments, engine, limits=None):
+    """Parse the top level items of the chunk of ``text`` from ``pos`` to the
+    first item starting ``size`` characters further, retried twice larger
+    as long as it ends within an item. Return them and the end of the chunk.
+    Raise ``LexerError`` or ``ParserError`` on syntax errors.
+    """
+    while True:
+        m = _item_start_re.search(text, pos + size)
+        end = len(text) if m is None else m.start()
+        if limits is not None:
+            # Tokens of the chunk are counted again when it is retried
+            count = limits.count
+        items = _items(text, pos, end, positions, comments, engine, limits)
+        if items is not None:
+            return items, end
+        size *= 2
+        if limits is not None:
+            limits.count = count
+
+
+def _parse_recover(text, positions, comments, engine, errors, limits):
+    """Parse the top level items of ``text`` by chunks of about
+    ``RECOVER_CHUNK`` characters, appending the syntax errors to ``errors``
+    and skipping the items they are in.
+    """
+    items = []
+    pos = 0
+    last = None
+    while pos < len(text):
+        try:
+            chunk, pos = _chunk_items(text, pos, RECOVER_CHUNK, positions, comments, engine, limits)
+        except (LexerError, ParserError) as e:
+            offset = pos if e.offset is None else e.offset
+            if offset != last:
+                errors.append(e)
+                last = offset
+            kept, resume = _skip_error(text, pos, offset, positions, comments, engine)
+            _append_items(items, kept)
+            pos = len(text) if resume is None else resume
+            continue
+        _append_items(items, chunk)
+    return _top_level(items) if items else None
+
+
+# Nodes of the ast a factory may build, File, Package, Comment and ValueSpec
+# aside: the reductions read them back to build the enclosing nodes.
+_factory_nodes = tuple(
+    name for name, value in globals().items()
+    if isinstance(value, type) and issubclass(value, Node) and value is not Node
+    and name not in ('File', 'Package', 'Comment', 'ValueSpec')
+)
+
+_factories = weakref.WeakKeyDictionary()
+
+
+class _Production():
+    """Stand-in for a SLY ``Production`` whose action builds its nodes with
+    the constructors of a factory.
+    """
+
+    __slots__ = ('name', 'len', 'namemap', 'func', 'prod')
+
+    def __init__(self, production, func):
+        self.name = production.name
+        self.len = production.len
+        self.namemap = production.namemap
+        self.prod = production.prod
+        self.func = func
+
+
+def _factory_productions(productions, factory):
+    """Return the stand-ins of ``productions`` whose actions call the
+    constructors of ``factory`` (its attributes named after the ast nodes)
+    instead of the ast classes.
+    """
+    try:
+        return _factories[factory]
+    except (KeyError, TypeError):
+        pass
+    for name in ('File', 'Package', 'Comment', 'ValueSpec'):
+        if hasattr(factory, name):
+            raise ValueError('%s nodes cannot be built by a factory' % name)
+    # The actions run unchanged against globals where the ast classes are
+    # replaced by the constructors of the factory.
+    namespace = dict(globals())
+    namespace.update(
+        (name, getattr(factory, name)) for name in _factory_nodes if getattr(factory, name, None) is not None
+    )
+    funcs = {}
+    for p in productions:
+        if p.func is not None and p.func not in funcs:
+            f = p.func
+            funcs[f] = FunctionType(f.__code__, namespace, f.__name__, f.__defaults__, f.__closure__)
+            funcs[f].__qualname__ = f.__qualname__
+    result = [_Production(p, funcs.get(p.func)) for p in productions]
+    try:
+        _factories[factory] = result
+    except TypeError:
+        pass
+    return result
+
+
+def parse(
+    text, positions=True, comments=True, engine='lalr', mode=None, workers=None, errors=None,
+    max_tokens=None, max_depth=None, deadline=None, cancel=None, profile=None, factory=None, executor=None
+):
+    """Parse ``text`` with the LALR parser (``engine='lalr'``) or with the
+    recursive descent parser of :mod:`gopygo.descent` (``engine='descent'``).
+    Both build the same tree, the latter raises ``ParserError`` on syntax errors.
+
+    With ``mode='imports_only'`` only the package clause and the imports are
+    parsed, see :func:`imports_end`: the ``decls`` of the ``File`` are the
+    import ``GenDecl``.
+
+    With ``mode='lazy_bodies'`` function bodies are skipped and parsed on
+    first access to the ``body`` of their ``FuncDecl`` or ``FuncLit``, which
+    ``unload_body()`` drops again.
+
+    With ``workers`` greater than 1, the text is split at top level
+    declarations and the chunks are parsed in a pool of that many
+    processes. The tree is the same as parsed serially, which is what
+    happens when the text cannot be split. ``executor``, a
+    ``concurrent.futures`` executor such as a ``ProcessPoolExecutor``
+    reused across parses, runs the chunks instead of a pool started for
+    the parse; ``workers`` then only sets their number, 4 per worker,
+    ``os.cpu_count()`` by default.
+
+    When ``errors`` is a list, syntax errors do not stop the parse: each
+    ``LexerError`` or ``ParserError`` (with the ``offset`` of the error) is
+    appended to it, the top level item it is in is skipped and the items
+    parsed before and after are returned.
+
+    ``max_tokens``, ``max_depth`` (of parentheses, brackets and braces),
+    ``deadline`` (a ``time.monotonic()`` value) and ``cancel`` (e.g. a
+    ``threading.Event`` set from another thread) limit the resources of
+    the parse, which raises ``LimitError`` once one is exceeded, see
+    :class:`gopygo.limits.Limits`.
+
+    ``profile``, a :class:`gopygo.profiling.ParseProfile`, records the
+    reductions and tokens of the LALR parse (not those of lazy bodies).
+
+    ``factory`` is an object whose attributes named after the nodes of
+    :mod:`gopygo.ast` (``factory.BinaryExpr``...) are called instead of their
+    class, with the same arguments, to build the tree of an LALR parse.
+    Nodes it has no attribute for are built as usual, ``File``,
+    ``Package``, ``Comment`` and ``ValueSpec`` always are. Only the results
+    that are ``gopygo.ast.Node`` instances get positions.
+    """
+    if mode not in MODES:
+        raise ValueError('Unknown parse mode %r' % (mode,))
+    if engine not in ('lalr', 'descent'):
+        raise ValueError('Unknown parser engine %r' % (engine,))
+    limits = None
+    if max_tokens is not None or max_depth is not None or deadline is not None or cancel is not None:
+        limits = Limits(max_tokens, max_depth, deadline, cancel)
+    if (errors is not None or limits is not None) and mode == 'lazy_bodies':
+        raise ValueError('errors and limits do not apply to mode %r' % (mode,))
+    parallel = executor is not None or workers is not None and workers > 1
+    if profile is not None and (engine != 'lalr' or errors is not None or parallel):
+        raise ValueError('profile only applies to serial parses with the lalr engine')
+    if factory is not None and (engine != 'lalr' or errors is not None or parallel or mode == 'lazy_bodies'):
+        raise ValueError('factory only applies to serial, non lazy parses with the lalr engine')
+    if parallel:
+        if mode is not None:
+            raise ValueError('workers do not apply to mode %r' % (mode,))
+        if limits is not None:
+            raise ValueError('workers do not apply to limited parses')
+        if workers is None:
+            workers = os.cpu_count() or 1
+        tree = _parse_parallel(text, positions, comments, engine, workers, executor)
+        if tree is not None:
+            return tree
+    if mode == 'imports_only':
+        end = imports_end(text)
+        if end is not None:
+            text = text[:end]
+    if errors is not None:
+        return _parse_recover(text, positions, comments, engine, errors, limits)
+    lazy = mode == 'lazy_bodies'
+    if engine == 'descent':
+        return descent.parse(text, positions=positions, comments=comments, lazy=lazy, limits=limits)
+    # No need to strip or terminate the text: newlines are not tokens and the
+    # lexer inserts the final semicolon itself.
+    if limits is not None:
+        tokens = lexer.lex(text, limits.tokens(lexer.scan(text, 0, comments)))
+    else:
+        tokens = lexer.tokenize(text, 0, comments, lazy)
+    bodies = partial(_parse_body, text, positions, comments) if lazy else None
+    if profile is None:
+        return parser.parse(tokens, positions=positions, bodies=bodies, factory=factory)
+    start = perf_counter()
+    try:
+        return parser.parse(
+            profile.count_tokens(tokens), positions=positions, bodies=bodies, profile=profile, factory=factory
+        )
+    finally:
+        profile.add_parse(perf_counter() - start)
+
+
+def _parse_body(text, positions, comments, start, end):
+    """Parse the function body spanning ``text[start:end]`` of a lazy parse.
+    """
+    block = LexToken()
+    block.type = 'BLOCK'
+    block.value = None
+    block.index = block.end = start
+    tokens = takewhile(lambda tok: tok.index < end, lexer.tokenize(text, start, comments, lazy=True))
+    bodies = partial(_parse_body, text, positions, comments)
+    return parser.parse(chain((block,), tokens), positions=positions, bodies=bodies)
+
+
+def _start_token(_type):
+    tok = LexToken()
+    tok.type = _type
+    tok.value = None
+    # No position, the span of the fragment starts at its first token
+    tok.index = tok.end = None
+    return tok
+
+
+# Start token and DescentParser rule of each fragment kind
+_fragments = {
+    'expr': (_start_token('START_EXPR'), 'expr'),
+    'stmt': (_start_token('START_STMT'), 'stmt'),
+    'type': (_start_token('START_TYPE'), 'type_expr'),
+    'decl': (_start_token('START_DECL'), 'decl'),
+}
+
+_type_nodes = (Ident, SelectorExpr, StarExpr, ArrayType, MapType, InterfaceType)
+
+
+def _parse_fragment(kind, text, positions, engine):
+    """Parse ``text`` as a fragment of ``kind`` (see ``_fragments``), comments
+    aside. Raise ``ParserError`` on syntax errors with either engine.
+    """
+    start, rule = _fragments[kind]
+    if engine == 'descent':
+        return descent.parse_fragment(rule, text, positions)
+    if engine != 'lalr':
+        raise ValueError('Unknown parser engine %r' % (engine,))
+    parser.error = partial(_syntax_error, text)
+    try:
+        return parser.parse(chain((start,), lexer.tokenize(text, 0, False)), positions=positions)
+    finally:
+        del parser.error
+
+
+def parse_expr(text, positions=True, engine='lalr'):
+    """Parse the expression ``text`` and return its node.
+    """
+    x = _parse_fragment('expr', text, positions, engine)
+    if isinstance(x, list):
+        raise ParserError('Expected one expression, got %d' % len(x), 0)
+    return x
+
+
+def parse_stmt(text, positions=True, engine='lalr'):
+    """Parse the statement ``text`` and return its node.
+    """
+    return _parse_fragment('stmt', text, positions, engine)
+
+
+def parse_type(text, positions=True, engine='lalr'):
+    """Parse the type ``text``: the name of a predeclared type (a ``str``) or
+    the node of the type expression.
+    """
+    _type = _parse_fragment('type', text, positions, engine)
+    if not isinstance(_type, (str, _type_nodes)):
+        raise ParserError('Expected a type, got %s' % type(_type).__name__, 0)
+    return _type
+
+
+def parse_decl(text, positions=True, engine='lalr'):
+    """Parse the declaration ``text`` and return its ``FuncDecl`` or ``GenDecl``.
+    """
+    decl = _parse_fragment('decl', text, positions, engine)
+    if not isinstance(decl, (FuncDecl, GenDecl)):
+        raise ParserError('Expected a declaration, got %s' % type(decl).__name__, 0)
+    return decl
+
+
+def parse_bytes(
+    buf, positions=True, comments=True, engine='lalr', mode=None, workers=None, errors=None,
+    max_tokens=None, max_depth=None, deadline=None, cancel=None, profile=None, factory=None, executor=None
+):
+    """Parse UTF-8 source from any bytes-like object (``bytes``, ``memoryview``, ``mmap``...).
+
+    The buffer is decoded once, which is the only copy of the source made.
+    Positions are offsets into the decoded text. With ``mode='imports_only'``
+    only the start of the buffer holding the imports is decoded.
+    """
+    if mode == 'imports_only':
+        text = _imports_text(buf)
+    else:
+        text = str(buf, 'utf-8')
+    return parse(
+        text, positions=positions, comments=comments, engine=engine, mode=mode, workers=workers, errors=errors,
+        max_tokens=max_tokens, max_depth=max_depth, deadline=deadline, cancel=cancel, profile=profile,
+        factory=factory, executor=executor
+    )
+
+
+def parse_file(
+    path, positions=True, comments=True, engine='lalr', mode=None, workers=None, errors=None,
+    max_tokens=None, max_depth=None, deadline=None, cancel=None, profile=None, factory=None, executor=None
+):
+    """Parse the Go source file at ``path``, read through a memory map.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return parse(
+                '', positions=positions, comments=comments, engine=engine, mode=mode, errors=errors, profile=profile,
+                factory=factory, executor=executor
+            )
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return parse_bytes(
+                buf, positions=positions, comments=comments, engine=engine, mode=mode, workers=workers, errors=errors,
+                max_tokens=max_tokens, max_depth=max_depth, deadline=deadline, cancel=cancel, profile=profile,
+                factory=factory, executor=executor
+            )
+
+
+def reparse(tree, old_text, new_text, comments=True, engine='lalr', edit=None):
+    """Return the tree of ``new_text``, an edit of ``old_text`` whose tree is
+    ``tree``: a ``File`` parsed with positions, not lazily.
+
+    Only the top level declarations touched by the edit are parsed again,
+    the other ones are reused: the positions of those after the edit move
+    in place, ``tree`` should not be used anymore. ``edit``
+    is the ``(start, old_end, new_end)`` range that changed, offsets in
+    ``old_text`` and ``new_text``, found by comparing both texts if not
+    given. When the edit cannot be confined to top level declarations,
+    ``new_text`` is parsed in full.
+    """
+    if edit is None:
+        edit = _edit_range(old_text, new_text)
+    new_tree = _reparse(tree, new_text, edit, comments, engine)
+    if new_tree is None:
+        return parse(new_text, comments=comments, engine=engine)
+    return new_tree
+
+
+def _reparse(tree, text, edit, comments, engine):
+    start, old_end, new_end = edit
+    if not isinstance(tree, File) or tree.name._span is None:
+        return None
+    decls = tree.decls
+    if decls and isinstance(decls[-1], File):
+        return None
+
+    # The text before the edit is unchanged, so the start of the last item
+    # starting before it is still a top level boundary: parse again from
+    # there up to the first item starting after the edit.
+    lo, hi = 0, len(decls)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if decls[mid].pos < start:
+            lo = mid + 1
+        else:
+            hi = mid
+    first = lo - 1
+    if first < 0:
+        return None
+    lo, hi = first, len(decls)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if decls[mid].pos <= old_end:
+            lo = mid + 1
+        else:
+            hi = mid
+    last = lo
+
+    delta = new_end - old_end
+    region_start = decls[first].pos
+    region_end = decls[last].pos + delta if last < len(decls) else len(text)
+    if not text[region_start:region_end].strip(' \t\r\n'):
+        items = []
+    else:
+        items = _parse_items(text, region_start, region_end, True, comments, engine)
+        if items is None or any(isinstance(item, File) for item in items):
+            return None
+
+    moved = decls[last:]
+    if delta:
+        # The nodes of a declaration share an offset, linked to them the
+        # first time it moves, so later edits move it in constant time.
+        for item in moved:
+            offset = item._offset
+            if offset is None:
+                offset = _Offset()
+                _link(item, offset)
+            offset.delta += delta
+    new_tree = File(tree.name)
+    new_tree.imports = tree.imports
+    new_tree.decls = decls[:first] + items + moved
+    return _top_level([new_tree])
+
+
+def _link(node, offset):
+    """Add ``offset`` to the positions of ``node`` and of the nodes below it.
+    """
+    stack = [node]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        node = pop()
+        if isinstance(node, Node):
+            attrs = node.__dict__
+            if '_span' in attrs:
+                attrs['_offset'] = offset
+            extend(attrs.values())
+        elif type(node) is list or type(node) is tuple:
+            extend(node)
+        elif isinstance(node, BasicLitList):
+            if node.starts is not None:
+                node._offset = offset
+
+
+def _shift(node, delta):
+    """Move the positions of ``node`` and of the nodes below it by ``delta``.
+    """
+    # Adds delta to both halves of the spans
+    shift = delta * 0x100000001
+    stack = [node]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        node = pop()
+        if isinstance(node, Node):
+            attrs = node.__dict__
+            if '_span' in attrs:
+                attrs['_span'] += shift
+            extend(attrs.values())
+        elif type(node) is list or type(node) is tuple:
+            extend(node)
+        elif isinstance(node, BasicLitList):
+            if node.starts is not None:
+                node.starts = array(node.starts.typecode, [pos + delta for pos in node.starts])
+
+
+def _edit_range(old_text, new_text):
+    """Return the ``(start, old_end, new_end)`` range where ``old_text`` and
+    ``new_text`` differ.
+    """
+    n = min(len(old_text), len(new_text))
+    start = _common_length(old_text, new_text, n)
+    end = _common_length(old_text, new_text, n - start, reverse=True)
+    return start, len(old_text) - end, len(new_text) - end
+
+
+def _common_length(a, b, n, reverse=False):
+    """Return the length, up to ``n``, of the common prefix of ``a`` and ``b``,
+    or of their common suffix if ``reverse``.
+
+    Slices of doubling length are compared, then the first differing one
+    is bisected, so the cost is about that of comparing the common part.
+    """
+    def same(lo, hi):
+        if reverse:
+            return a[len(a) - hi:len(a) - lo] == b[len(b) - hi:len(b) - lo]
+        return a[lo:hi] == b[lo:hi]
+
+    lo = 0
+    size = 64
+    while lo < n:
+        hi = min(lo + size, n)
+        if not same(lo, hi):
+            break
+        lo = hi
+        size *= 2
+    else:
+        return n
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if same(lo, mid):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+# Lines that may end a top level item: closing a declaration or a block, or
+# starting one that fits on the line.
+_item_end_re = re.compile(r'^(?:[})]|//|/\*|(?:package|import|func|type|var|const)\b).*\n', re.M)
+
+
+def _stream_error(text, e, end):
+    """Tell whether the error ``e`` raised parsing the pending ``text`` of a
+    stream up to ``end`` is a syntax error, rather than text missing yet.
+    """
+    if e.offset is None or e.offset >= end:
+        return False
+    # Raw strings and comments may be closed by the text to come
+    return not (isinstance(e, LexerError) and text.startswith(('`', '/*'), e.offset))
+
+
+class StreamParser():
+    """Push parser for sources received in chunks.
+
+    Text (or UTF-8 bytes) is given to :meth:`feed` as it arrives and
+    :meth:`completed` iterates over the top level items (``File.decls``,
+    with the ``Package`` of package clauses in between) parsed so far, each
+    one as soon as the line closing it is fed. Only the text of the items
+    not completed yet is kept, so memory is bounded by the largest of them.
+    Positions are offsets in the whole stream.
+
+    Syntax errors are found as the lines following them are fed. When
+    ``errors`` is a list, each one is appended to it (with its ``offset``
+    in the stream) and the top level item it is in is skipped, as with
+    ``parse(..., errors=errors)``. Otherwise the rest of the stream is
+    dropped and ``close()``, which parses what remains at the end of the
+    stream, raises the first error.
+    """
+
+    def __init__(self, positions=True, comments=True, engine='lalr', errors=None):
+        if engine not in ('lalr', 'descent'):
+            raise ValueError('Unknown parser engine %r' % (engine,))
+        self.positions = positions
+        self.comments = comments
+        self.engine = engine
+        self.errors = errors
+        self.closed = False
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._text = ''
+        self._base = 0
+        # Lines of the stream before _text, for the line of the errors
+        self._line = 0
+        self._scan = 0
+        # Dropping the text up to the start of the next item, after an error
+        self._skip = False
+        # Stream offset of the last error, not recorded twice
+        self._last = None
+        self._error = None
+        self._items = deque()
+
+    def feed(self, data):
+        """Add the next chunk of the source, ``str`` or UTF-8 bytes.
+        """
+        if self.closed:
+            raise ValueError('feed() on a closed StreamParser')
+        if not isinstance(data, str):
+            data = self._decoder.decode(data)
+        if self._error is not None:
+            return
+        text = self._text + data
+        # Offset past the last complete line
+        complete = text.rfind('\n') + 1
+        start = pos = self._scan
+        if not self._skip:
+            start = 0
+        while True:
+            if self._skip:
+                m = _item_start_re.search(text, pos, complete)
+                if m is None:
+                    start = pos = complete
+                    break
+                start = pos = m.start()
+                self._skip = False
+            m = _item_end_re.search(text, pos)
+            if m is None:
+                break
+            end = pos = m.end()
+            try:
+                items = _items(text, start, end, self.positions, self.comments, self.engine)
+            except (LexerError, ParserError) as e:
+                if not _stream_error(text, e, end):
+                    continue
+                offset = e.offset
+                if offset + self._base != self._last:
+                    self._last = offset + self._base
+                    self._add_error(e, text)
+                if self._error is not None:
+                    start = pos = complete
+                    break
+                kept, resume = _skip_error(text, start, offset, self.positions, self.comments, self.engine)
+                self._emit(kept)
+                if resume is not None:
+                    start = pos = resume
+                else:
+                    # Resume at the next item after the line of the error, not fed yet
+                    start = pos = text.index('\n', offset) + 1
+                    self._skip = True
+                continue
+            if items is not None:
+                self._emit(items)
+                start = end
+        # Resume at the last line, not complete yet
+        self._scan = complete - start
+        self._line += text.count('\n', 0, start)
+        self._text = text[start:]
+        self._base += start
+
+    def close(self):
+        """Parse the rest of the source, to be called once it is all fed.
+        """
+        if self.closed:
+            return
+        self.feed(self._decoder.decode(b'', True))
+        self.closed = True
+        text, self._text = self._text, ''
+        if self._error is not None:
+            raise self._error
+        if self._skip or not text.strip():
+            return
+        items = _parse_items(text, 0, len(text), self.positions, self.comments, self.engine)
+        if items is None:
+            # Parse it again as a whole for the errors
+            errors = [] if self.errors is not None else None
+            try:
+                result = parse(text, self.positions, self.comments, self.engine, errors=errors)
+            except (LexerError, ParserError) as e:
+                self._add_error(e, text)
+                raise self._error
+            for e in errors:
+                self._add_error(e, text)
+            if result is None:
+                return
+            items = list(result) if isinstance(result, tuple) else [result]
+        self._emit(items)
+
+    def _add_error(self, e, text):
+        """Move the syntax error ``e`` in the pending ``text`` to the stream,
+        and record it.
+        """
+        if e.offset is not None:
+            line = self._line + text.count('\n', 0, e.offset) + 1
+            message = re.sub(r'at line \d+', 'at line %d' % line, str(e), count=1)
+            e.args = (message,) + e.args[1:]
+            e.offset += self._base
+        if self.errors is not None:
+            self.errors.append(e)
+        else:
+            self._error = e
+
+    def completed(self):
+        """Iterate over the top level items completed since the last call.
+        """
+        items = self._items
+        while items:
+            yield items.popleft()
+
+    def _emit(self, items, shift=True):
+        for item in items:
+            if item is None:
+                continue
+            if shift and self.positions and self._base:
+                _shift(item, self._base)
+            if isinstance(item, File):
+                # Package clauses are flattened, with the declarations nested in their File
+                self._items.append(item.name)
+                self._emit(item.decls, False)
+            else:
+                self._items.append(item)
+
+
+# Size of the chunks of top level items parsed at once by parse_events()
+EVENT_CHUNK = 8192
+
+
+def _event_items(text, positions, comments, engine):
+    """Yield the top level items of ``text``, parsed by chunks of about
+    ``EVENT_CHUNK`` characters.
+    """
+    pos = 0
+    while pos < len(text):
+        items, pos = _chunk_items(text, pos, EVENT_CHUNK, positions, comments, engine)
+        yield from items
+
+
+def _has_nodes(value):
+    # Whether an attribute holds nodes, which are not in the fields
+    if isinstance(value, Node):
+        return True
+    if type(value) is list or type(value) is tuple or isinstance(value, BasicLitList):
+        return any(isinstance(item, Node) or type(item) is list or type(item) is tuple for item in value)
+    return False
+
+
+def _walk(node, positions):
+    """Yield the enter and leave events of ``node`` and of the nodes below it.
+    """
+    # (True, event) entries are the pending leave events
+    stack = [(False, node)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        leave, node = pop()
+        if leave:
+            yield node
+        elif isinstance(node, Node):
+            kind = type(node).__name__
+            fields = {}
+            children = []
+            for name, value in node.__dict__.items():
+                if _has_nodes(value):
+                    children.append(value)
+                elif name != '_span':
+                    fields[name] = value
+            if positions:
+                fields['pos'] = node.pos
+                fields['end'] = node.end
+            yield 'enter', kind, fields
+            push((True, ('leave', kind, fields)))
+            for value in reversed(children):
+                push((False, value))
+        else:
+            for value in reversed(node):
+                if isinstance(value, Node) or type(value) is list or type(value) is tuple:
+                    push((False, value))
+
+
+def _events(text, positions, comments, engine):
+    # Fields of the Files still open: the declarations of the next chunks
+    # are theirs, so they are only left once the text is all parsed.
+    files = []
+    end = None
+    for item in _event_items(text, positions, comments, engine):
+        while isinstance(item, File):
+            fields = {
+                name: value for name, value in item.__dict__.items()
+                if name not in ('name', 'decls', '_span') and not _has_nodes(value)
+            }
+            if positions:
+                fields['pos'] = item.name.pos
+                fields['end'] = None
+            files.append(fields)
+            yield 'enter', 'File', fields
+            yield from _walk(item.name, positions)
+            end = item.name.end
+            decls = item.decls
+            # A File nested for a second package clause ends the declarations
+            item = decls[-1] if decls and isinstance(decls[-1], File) else None
+            for decl in decls:
+                if decl is not item:
+                    yield from _walk(decl, positions)
+                    end = getattr(decl, 'end', None) or end
+        if item is not None:
+            yield from _walk(item, positions)
+            end = getattr(item, 'end', None) or end
+    for fields in reversed(files):
+        # The end is only known now, the enter event keeps its own fields
+        fields = dict(fields)
+        if positions:
+            fields['end'] = end
+        yield 'leave', 'File', fields
+
+
+def parse_events(text, positions=True, comments=True, engine='lalr', handler=None):
+    """Iterate over the ``(event, kind, fields)`` events of the nodes of
+    ``text`` in source order, without keeping its tree: ``event`` is
+    ``'enter'`` then ``'leave'`` around the events of the nodes below,
+    ``kind`` the name of the :mod:`gopygo.ast` class and ``fields`` a dict
+    of the node attributes that do not hold nodes, with its ``pos`` and
+    ``end`` if ``positions``. The nodes of the other attributes are the
+    events in between, in attribute order, the ``decls`` of a ``File``
+    following its ``Package``.
+
+    The text is parsed by chunks of top level items of about
+    ``EVENT_CHUNK`` characters, whose nodes are dropped once their events
+    are consumed. Syntax errors raise ``LexerError`` or ``ParserError`` once
+    the events of the items before are consumed.
+
+    Given a ``handler``, its ``enter(kind, fields)`` and
+    ``leave(kind, fields)`` methods, if any, are called for the events
+    instead.
+    """
+    if engine not in ('lalr', 'descent'):
+        raise ValueError('Unknown parser engine %r' % (engine,))
+    events = _events(text, positions, comments, engine)
+    if handler is None:
+        return events
+    enter = getattr(handler, 'enter', None)
+    leave = getattr(handler, 'leave', None)
+    for event, kind, fields in events:
+        callback = enter if event == 'enter' else leave
+        if callback is not None:
+            callback(kind, fields)
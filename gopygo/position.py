@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: __init__
+    :synopsis: source positions.
+"""
+
+from array import array
+from bisect import bisect_right
+
+
+class LineTable():
+    """Offsets at which the lines of a source text start.
+
+    The table is built in a single pass on the first lookup, lines and columns
+    are then found with a binary search. Both are 1-based, columns count
+    characters from the start of the line.
+
+    Offsets, as the ``pos`` and ``end`` of the nodes, index the characters
+    of the text. :meth:`byte_offset` and :meth:`char_offset` convert them
+    to and from offsets in its UTF-8 encoding, e.g. that of the file.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._starts = None
+        self._byte_starts = None
+
+    @property
+    def starts(self):
+        if self._starts is None:
+            text = self.text
+            starts = array('I' if len(text) < 2 ** 32 else 'Q', [0])
+            find = text.find
+            append = starts.append
+            i = find('\n')
+            while i >= 0:
+                append(i + 1)
+                i = find('\n', i + 1)
+            self._starts = starts
+        return self._starts
+
+    def line(self, offset: int):
+        return bisect_right(self.starts, offset)
+
+    def position(self, offset: int):
+        """Return the ``(line, column)`` of ``offset``.
+        """
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+    @property
+    def byte_starts(self):
+        """Offsets in the UTF-8 encoding of the text at which the lines start.
+        """
+        if self._byte_starts is None:
+            text = self.text
+            if text.isascii():
+                self._byte_starts = self.starts
+            else:
+                data = text.encode('utf-8')
+                starts = array('I' if len(data) < 2 ** 32 else 'Q', [0])
+                find = data.find
+                append = starts.append
+                i = find(b'\n')
+                while i >= 0:
+                    append(i + 1)
+                    i = find(b'\n', i + 1)
+                self._byte_starts = starts
+        return self._byte_starts
+
+    def byte_offset(self, offset: int):
+        """Return the offset in the UTF-8 encoding of the text of the
+        character ``offset``.
+        """
+        byte_starts = self.byte_starts
+        starts = self.starts
+        if byte_starts is starts:
+            return offset
+        line = bisect_right(starts, offset) - 1
+        return byte_starts[line] + len(self.text[starts[line]:offset].encode('utf-8'))
+
+    def char_offset(self, byte_offset: int):
+        """Return the character offset of ``byte_offset`` in the UTF-8
+        encoding of the text. Raise ``ValueError`` if it is inside a character.
+        """
+        byte_starts = self.byte_starts
+        starts = self.starts
+        if byte_starts is starts:
+            return byte_offset
+        line = bisect_right(byte_starts, byte_offset) - 1
+        start = starts[line]
+        end = starts[line + 1] if line + 1 < len(starts) else len(self.text)
+        data = self.text[start:end].encode('utf-8')[:byte_offset - byte_starts[line]]
+        try:
+            return start + len(data.decode('utf-8'))
+        except UnicodeDecodeError:
+            raise ValueError('Byte offset %d is inside a character' % byte_offset) from None
@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: __init__
+    :synopsis: grammar rule level profile of LALR parses.
+"""
+
+from collections import Counter
+from time import perf_counter
+
+
+class _Production():
+    """Stand-in for a SLY ``Production`` in ``GoParser.parse``, whose action
+    records its calls and time in ``stat``.
+    """
+
+    __slots__ = ('name', 'len', 'namemap', 'func')
+
+    def __init__(self, production, stat):
+        self.name = production.name
+        self.len = production.len
+        self.namemap = production.namemap
+        self.func = None if production.func is None else _timed(production.func, stat)
+
+
+def _timed(func, stat):
+    def timed(parser, p):
+        start = perf_counter()
+        try:
+            return func(parser, p)
+        finally:
+            stat[3] += perf_counter() - start
+            stat[2] += 1
+    return timed
+
+
+def _rule(production):
+    return '%s -> %s' % (production.name, ' '.join(production.prod) or '<empty>')
+
+
+def _method(func):
+    return '%s:%d' % (func.__qualname__, func.__code__.co_firstlineno)
+
+
+class ParseProfile():
+    """Reduction counts and time per production and per action method of
+    ``GoParser``, and token counts per lexer token type, of the parses it is
+    passed to (``gopygo.parse(text, profile=profile)``).
+
+    Only the parses given a profile are instrumented, the others run the
+    plain driver. Times are in seconds, those of productions and methods
+    cover their actions only, not the driver.
+    """
+
+    def __init__(self):
+        # {(name, symbols): [rule, method, count, time]} of the productions,
+        # shared by the stand-ins of any production list of the grammar
+        self._stats = {}
+        # {id(productions): (productions, stand-ins)}
+        self._productions = {}
+        self.clear()
+
+    def clear(self):
+        """Forget what was recorded so far.
+        """
+        self.parses = 0
+        self.time = 0.0
+        self.tokens = Counter()
+        for stat in self._stats.values():
+            stat[2:] = [0, 0.0]
+
+    def productions(self, productions):
+        """Return the stand-ins of the ``productions`` of a grammar, recording
+        their reductions. Productions with the same name and symbols share
+        their record, e.g. those of parses with and without a node factory.
+        """
+        cached = self._productions.get(id(productions))
+        if cached is None or cached[0] is not productions:
+            cached = (productions, [_Production(p, self._stat(p)) for p in productions])
+            self._productions[id(productions)] = cached
+        return cached[1]
+
+    def _stat(self, production):
+        key = (production.name, tuple(production.prod))
+        stat = self._stats.get(key)
+        if stat is None:
+            method = None if production.func is None else _method(production.func)
+            stat = self._stats[key] = [_rule(production), method, 0, 0.0]
+        return stat
+
+    def count_tokens(self, tokens):
+        """Yield the ``LexToken`` ``tokens``, counting them by type.
+        """
+        counts = self.tokens
+        for tok in tokens:
+            counts[tok.type] += 1
+            yield tok
+
+    def add_parse(self, elapsed):
+        self.parses += 1
+        self.time += elapsed
+
+    def rules(self):
+        """Return ``{production: (count, time)}`` of the reduced productions.
+        """
+        return {rule: (count, time) for rule, _, count, time in self._stats.values() if count}
+
+    def methods(self):
+        """Return ``{method: (count, time)}`` of the called action methods,
+        named ``GoParser.<rule>:<line>`` as several share a rule name.
+        """
+        stats = {}
+        for _, method, count, time in self._stats.values():
+            if count:
+                total = stats.get(method, (0, 0.0))
+                stats[method] = (total[0] + count, total[1] + time)
+        return stats
+
+    def as_dict(self):
+        """Return the profile as plain data, e.g. to dump it to JSON.
+        """
+        def entries(stats):
+            return {name: {'count': count, 'time': time} for name, (count, time) in stats.items()}
+
+        return {
+            'parses': self.parses,
+            'time': self.time,
+            'productions': entries(self.rules()),
+            'methods': entries(self.methods()),
+            'tokens': dict(self.tokens),
+        }
+
+    def table(self, sort='time', limit=None):
+        """Return the profile as a text table, productions and methods sorted
+        by decreasing ``sort`` (``'time'`` or ``'count'``), ``limit`` rows each.
+        """
+        if sort not in ('time', 'count'):
+            raise ValueError('Unknown sort key %r' % (sort,))
+        key = (lambda item: item[1][1]) if sort == 'time' else (lambda item: item[1][0])
+        lines = ['%d parses, %.3f ms' % (self.parses, self.time * 1e3)]
+        for title, stats in (('production', self.rules()), ('method', self.methods())):
+            lines.append('')
+            lines.append('%10s %12s %12s  %s' % ('count', 'total ms', 'per call us', title))
+            for name, (count, time) in sorted(stats.items(), key=key, reverse=True)[:limit]:
+                lines.append('%10d %12.3f %12.3f  %s' % (count, time * 1e3, time / count * 1e6, name))
+        lines.append('')
+        lines.append('%10s  %s' % ('count', 'token'))
+        for _type, count in self.tokens.most_common(limit):
+            lines.append('%10d  %s' % (count, _type))
+        return '\n'.join(lines) + '\n'
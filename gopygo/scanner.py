@@ -0,0 +1,412 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: scanner
+    :synopsis: Go source scanner, the token level counterpart of go/scanner.
+
+Iterating the tokens of a source does not need the parser (nor SLY):
+
+    >>> from gopygo.scanner import scan
+    >>> for kind, offset, text in scan('f(x) // x'):
+    ...     print(kind.name, offset, repr(text))
+    IDENT 0 'f'
+    LPAREN 1 '('
+    IDENT 2 'x'
+    RPAREN 3 ')'
+    SEMICOLON 5 ''
+    COMMENT 5 '// x'
+"""
+
+import re
+
+from gopygo.enums import Token
+from gopygo.exceptions import LexerError
+from gopygo.position import LineTable
+
+
+_ident_re = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_space_re = re.compile(r'[ \t\r]+')
+_number_re = re.compile(
+    r'(?:(?P<float>'
+    r'0[xX][0-9a-fA-F_]*\.?[0-9a-fA-F_]*[pP][+-]?[0-9_]+'
+    r'|[0-9][0-9_]*\.[0-9_]*(?:[eE][+-]?[0-9_]+)?'
+    r'|\.[0-9][0-9_]*(?:[eE][+-]?[0-9_]+)?'
+    r'|[0-9][0-9_]*[eE][+-]?[0-9_]+'
+    r')|0[xX][0-9a-fA-F_]+|0[oO][0-7_]+|0[bB][01_]+|[0-9][0-9_]*)'
+    r'(?P<imag>i)?'
+)
+
+# Characters that end the plain run inside an interpreted string or a char literal
+_string_stop_re = re.compile(r'["\\\n$]')
+_char_stop_re = re.compile(r"['\\\n$]")
+# End of a ${...} template inside a literal
+_template_stop_re = re.compile(r'[}\n]')
+
+# Character classes the scanner dispatches on
+_SPACE, _NEWLINE, _IDENT, _NUMBER, _OPERATOR, _CHAR, _STRING, _RAW_STRING, _SLASH, _PERIOD = range(10)
+
+
+class Scanner():
+    """Single-pass scanner yielding ``(type, start, end)`` tuples.
+
+    The scanner dispatches on the first character of each token. Identifiers are
+    scanned once and remapped to keywords through a dict lookup, operators are
+    matched longest first. Token types are the names used by the grammar, see
+    ``KINDS`` for their ``gopygo.enums.Token`` equivalent.
+    """
+
+    keywords = {
+        # Keywords
+        'package': 'PACKAGE',
+        'func': 'FUNC',
+        'return': 'RETURN',
+        'import': 'IMPORT',
+        'var': 'VAR',
+        'const': 'CONST',
+        'type': 'TYPE',
+        'for': 'FOR',
+        'range': 'RANGE',
+        'break': 'BREAK',
+        'continue': 'CONTINUE',
+        'goto': 'GOTO',
+        'fallthrough': 'FALLTHROUGH',
+        'if': 'IF',
+        'else': 'ELSE',
+        'switch': 'SWITCH',
+        'case': 'CASE',
+        'default': 'DEFAULT',
+        'map': 'MAP',
+        'struct': 'STRUCT',
+        'interface': 'INTERFACE',
+        'true': 'TRUE',
+        'false': 'FALSE',
+    }
+
+    types = {
+        # Data types
+        'bool': 'BOOL',
+        'int8': 'INT8',
+        'int16': 'INT16',
+        'int32': 'INT32',
+        'int64': 'INT64',
+        'uint8': 'UINT8',
+        'uint16': 'UINT16',
+        'uint32': 'UINT32',
+        'uint64': 'UINT64',
+        'int': 'INT',
+        'uint': 'UINT',
+        'rune': 'RUNE',
+        'byte': 'BYTE',
+        'uintptr': 'UINTPTR',
+        'float32': 'FLOAT32',
+        'float64': 'FLOAT64',
+        'complex64': 'COMPLEX64',
+        'complex128': 'COMPLEX128',
+        'string': 'STRING',
+    }
+
+    identifiers = dict(keywords, **types)
+
+    operators = {
+        # Operators
+        '+=': 'ADD_ASSIGN',
+        '-=': 'SUB_ASSIGN',
+        '*=': 'MUL_ASSIGN',
+        '/=': 'QUO_ASSIGN',
+        '%=': 'REM_ASSIGN',
+        '&=': 'AND_ASSIGN',
+        '|=': 'OR_ASSIGN',
+        '^=': 'XOR_ASSIGN',
+        '&^=': 'AND_NOT_ASSIGN',
+        '<<=': 'SHL_ASSIGN',
+        '>>=': 'SHR_ASSIGN',
+
+        '&&': 'LAND',
+        '||': 'LOR',
+        '<-': 'ARROW',
+        '++': 'INC',
+        '--': 'DEC',
+        '==': 'EQL',
+        '<<': 'SHL',
+        '>>': 'SHR',
+        '&^': 'AND_NOT',
+        '!=': 'NEQ',
+        '<=': 'LEQ',
+        '>=': 'GEQ',
+        ':=': 'DEFINE',
+        '...': 'ELLIPSIS',
+
+        '+': 'ADD',
+        '-': 'SUB',
+        '*': 'MUL',
+        '/': 'QUO',
+        '%': 'REM',
+        '&': 'AND',
+        '|': 'OR',
+        '^': 'XOR',
+        '<': 'LSS',
+        '>': 'GTR',
+        '=': 'ASSIGN',
+        '!': 'NOT',
+
+        # Delimiters
+        '(': 'LPAREN',
+        '[': 'LBRACK',
+        '{': 'LBRACE',
+        ',': 'COMMA',
+        '.': 'PERIOD',
+
+        ')': 'RPAREN',
+        ']': 'RBRACK',
+        '}': 'RBRACE',
+        ';': 'SEMICOLON',
+        ':': 'COLON',
+    }
+
+    # First character -> character class
+    dispatch = dict.fromkeys(' \t\r', _SPACE)
+    dispatch['\n'] = _NEWLINE
+    dispatch.update(dict.fromkeys('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_', _IDENT))
+    dispatch.update(dict.fromkeys('0123456789', _NUMBER))
+    dispatch.update(dict.fromkeys(''.join(operators), _OPERATOR))
+    dispatch['\''] = _CHAR
+    dispatch['"'] = _STRING
+    dispatch['`'] = _RAW_STRING
+    dispatch['/'] = _SLASH
+    dispatch['.'] = _PERIOD
+
+    # First character -> operators starting with it, longest first
+    operators_by_first = {}
+    for _spelling in sorted(operators, key=len, reverse=True):
+        operators_by_first.setdefault(_spelling[0], []).append((_spelling, operators[_spelling]))
+    del _spelling
+
+    # Tokens that get a semicolon inserted after them when they end a line
+    semicolon_after = frozenset(
+        ['IDENT', 'TRUE', 'FALSE', *types.values()] +
+        ['IMAG_LITERAL', 'FLOAT_LITERAL', 'INT_LITERAL', 'CHAR_LITERAL', 'STRING_LITERAL'] +
+        ['BREAK', 'CONTINUE', 'FALLTHROUGH', 'RETURN', 'INC', 'DEC', 'RPAREN', 'RBRACK', 'RBRACE']
+    )
+
+    def __init__(self):
+        self.index = 0
+
+    def scan(self, text, index=0, comments=True, last=None):
+        """Yield ``(type, start, end)`` for every token of ``text`` from ``index`` on.
+
+        Newlines are not tokens. As in Go, a SEMICOLON is inserted at the end of
+        a line whose last token is in ``semicolon_after``. It spans the newline,
+        or is empty when the line ends with a comment or the text ends.
+        With ``comments=False`` comments are dropped here, before they reach the parser.
+        ``last`` is the type of the token before ``index``, if any, which
+        tells whether one of these SEMICOLON starts at ``index``.
+        """
+        dispatch = self.dispatch
+        identifiers = self.identifiers
+        operators_by_first = self.operators_by_first
+        semicolon_after = self.semicolon_after
+        ident_match = _ident_re.match
+        space_match = _space_re.match
+        number_match = _number_re.match
+        length = len(text)
+
+        try:
+            while index < length:
+                c = text[index]
+                kind = dispatch.get(c)
+                start = index
+
+                if kind == _IDENT:
+                    index = ident_match(text, index).end()
+                    _type = identifiers.get(text[start:index], 'IDENT')
+
+                elif kind == _SPACE:
+                    index = space_match(text, index).end()
+                    continue
+
+                elif kind == _NEWLINE:
+                    index += 1
+                    if last not in semicolon_after:
+                        continue
+                    _type = 'SEMICOLON'
+
+                elif kind == _OPERATOR or kind == _SLASH or kind == _PERIOD:
+                    if kind == _SLASH and text.startswith('//', index):
+                        index = text.find('\n', index)
+                        index = length if index < 0 else index + 1
+                        if last in semicolon_after:
+                            # The comment ends the line, so the semicolon goes before it
+                            yield 'SEMICOLON', start, start
+                        last = 'COMMENT'
+                        if not comments:
+                            continue
+                        _type = 'COMMENT'
+                    elif kind == _PERIOD and index + 1 < length and text[index + 1] in '0123456789':
+                        m = number_match(text, index)
+                        index = m.end()
+                        _type = self._number_type(m)
+                    else:
+                        for spelling, _type in operators_by_first[c]:
+                            if text.startswith(spelling, index):
+                                index += len(spelling)
+                                break
+
+                elif kind == _NUMBER:
+                    m = number_match(text, index)
+                    index = m.end()
+                    _type = self._number_type(m)
+
+                elif kind == _STRING or kind == _CHAR:
+                    stop_search = _string_stop_re.search if kind == _STRING else _char_stop_re.search
+                    end = self._quoted(text, index, stop_search)
+                    if end < 0:
+                        self.error(text, index, 'Unterminated %s literal' % ('string' if kind == _STRING else 'char'))
+                    index = end
+                    _type = 'STRING_LITERAL' if kind == _STRING else 'CHAR_LITERAL'
+
+                elif kind == _RAW_STRING:
+                    end = text.find('`', index + 1)
+                    if end < 0:
+                        self.error(text, index, 'Unterminated raw string literal')
+                    index = end + 1
+                    _type = 'STRING_LITERAL'
+
+                else:
+                    self.error(text, index, "Illegal character '%s'" % c)
+
+                last = _type
+                yield _type, start, index
+
+            if last in semicolon_after:
+                yield 'SEMICOLON', length, length
+        finally:
+            self.index = index
+
+    def scan_bodies(self, text, index=0, comments=True):
+        """Like :meth:`scan`, but yield each function body as a single
+        ``('BODY', start, end)`` token spanning its braces.
+
+        A body is the first brace outside of parentheses, brackets and
+        struct or interface types after ``func``. Its tokens are still scanned
+        to find the matching brace, but not yielded, unless the body is not
+        closed.
+        """
+        tokens = self.scan(text, index, comments)
+        signature = False
+        depth = 0
+        last = None
+        for tok in tokens:
+            _type = tok[0]
+            if not signature:
+                if _type == 'FUNC':
+                    signature = True
+                    depth = 0
+            elif _type in ('LPAREN', 'LBRACK') or _type == 'LBRACE' and last in ('STRUCT', 'INTERFACE'):
+                depth += 1
+            elif _type in ('RPAREN', 'RBRACK', 'RBRACE'):
+                depth -= 1
+            elif depth == 0 and _type == 'SEMICOLON':
+                # A function type, without a body
+                signature = False
+            elif depth == 0 and _type == 'LBRACE':
+                signature = False
+                start = tok[1]
+                for tok in tokens:
+                    _type = tok[0]
+                    if _type == 'LBRACE':
+                        depth += 1
+                    elif _type == 'RBRACE':
+                        if depth == 0:
+                            break
+                        depth -= 1
+                else:
+                    yield from self.scan(text, start, comments)
+                    return
+                tok = ('BODY', start, tok[2])
+            last = _type
+            yield tok
+
+    @staticmethod
+    def _quoted(text, index, stop_search):
+        # Jump from one quote, backslash, newline or template to the next, so
+        # the scan is linear in the literal length whatever the content. A
+        # ${...} template may hold quotes and runs to the first } on its line;
+        # that brace is remembered so a run of unclosed templates is searched
+        # once. Returns -1 if the literal is not closed on its line.
+        i = index + 1
+        close = -1
+        while True:
+            m = stop_search(text, i)
+            if m is None:
+                return -1
+            i = m.end()
+            c = text[i - 1]
+            if c == '\\':
+                if text[i:i + 1] in ('', '\n'):
+                    return -1
+                i += 1
+            elif c == '$':
+                if text[i:i + 1] == '{':
+                    if close < i:
+                        m = _template_stop_re.search(text, i + 1)
+                        close = len(text) if m is None else m.start()
+                    if close < len(text) and text[close] == '}':
+                        i = close + 1
+            elif c == '\n':
+                return -1
+            else:
+                return i
+
+    @staticmethod
+    def _number_type(m):
+        if m.group('imag'):
+            return 'IMAG_LITERAL'
+        elif m.group('float'):
+            return 'FLOAT_LITERAL'
+        else:
+            return 'INT_LITERAL'
+
+    def error(self, text, index, message):
+        line, column = LineTable(text).position(index)
+        raise LexerError('%s at line %d, column %d' % (message, line, column), index)
+
+
+# Scanner token type -> gopygo.enums.Token. Builtin type names are plain
+# identifiers in Go.
+KINDS = dict.fromkeys(Scanner.types.values(), Token.IDENT)
+KINDS.update({
+    'IDENT': Token.IDENT,
+    'IMAG_LITERAL': Token.IMAG,
+    'FLOAT_LITERAL': Token.FLOAT,
+    'INT_LITERAL': Token.INT,
+    'CHAR_LITERAL': Token.CHAR,
+    'STRING_LITERAL': Token.STRING,
+    'COMMENT': Token.COMMENT,
+})
+for _type in set(Scanner.keywords.values()) | set(Scanner.operators.values()):
+    KINDS[_type] = Token[_type]
+del _type
+
+# gopygo.enums.Token -> scanner token type, to resume a scan
+TYPES = {kind: _type for _type, kind in KINDS.items() if kind is not Token.IDENT}
+TYPES[Token.IDENT] = 'IDENT'
+
+
+def scan(text, offset=0, comments=True, previous=None):
+    """Yield ``(kind, offset, text)`` for every token of ``text``, ``kind`` being a ``gopygo.enums.Token``.
+
+    Implicit semicolons are reported as ``Token.SEMICOLON`` with the text
+    ``'\\n'``, or ``''`` at the end of the source and in front of a comment.
+    Comments are skipped if ``comments`` is false.
+
+    Scanning starts at ``offset``, which must be the offset of a token (or
+    of the whitespace before it). ``previous`` is the kind of the token
+    before it, needed to resume at an implicit semicolon: a scan resumed
+    from the offset and the previous kind of the first token not processed
+    yet yields the same tokens as the full scan. Raises ``LexerError``.
+    """
+    kinds = KINDS
+    last = None if previous is None else TYPES[previous]
+    for _type, start, end in Scanner().scan(text, offset, comments, last):
+        yield kinds[_type], start, text[start:end]
@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: __init__
+    :synopsis: persisted LALR parser tables.
+"""
+
+import os
+import json
+import hashlib
+
+import sly
+
+# Bump this whenever the on-disk layout below changes.
+FORMAT_VERSION = 1
+
+CACHE_DIR_ENV = 'GOPYGO_CACHE_DIR'
+
+
+def package_dir():
+    """Return the directory of the package, where the artifacts generated at
+    build time are installed as package data.
+    """
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def cache_dir():
+    """Return the directory the table artifacts are written to when those of
+    the package are missing or outdated.
+
+    Defaults to a per-user cache directory, the installed package may not be
+    writable. ``GOPYGO_CACHE_DIR`` overrides it.
+    """
+    path = os.environ.get(CACHE_DIR_ENV)
+    if path:
+        return path
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'gopygo')
+
+
+def search_path():
+    """Return the directories the table artifacts are read from, in order:
+    ``GOPYGO_CACHE_DIR`` only if set, else the package and the cache directory.
+    """
+    if os.environ.get(CACHE_DIR_ENV):
+        return [cache_dir()]
+    return [package_dir(), cache_dir()]
+
+
+def artifact_path(name, directory=None):
+    return os.path.join(cache_dir() if directory is None else directory, '%s.tables.json' % name)
+
+
+def signature(*parts):
+    """Hash of everything the tables are derived from, plus the format and SLY versions.
+    """
+    payload = json.dumps([FORMAT_VERSION, sly.__version__, parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def grammar_signature(cls):
+    grammar = cls._grammar
+    return signature(
+        'parser',
+        sorted(cls.tokens),
+        getattr(cls, 'precedence', ()),
+        grammar.Start,
+        [(str(p), p.prec) for p in grammar.Productions]
+    )
+
+
+def load(name, sig):
+    """Return the data stored for ``name`` in the first directory of
+    :func:`search_path` where its signature matches ``sig``, else ``None``.
+    """
+    for directory in search_path():
+        try:
+            with open(artifact_path(name, directory), 'r', encoding='utf-8') as f:
+                artifact = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(artifact, dict) and artifact.get('signature') == sig:
+            return artifact.get('data')
+    return None
+
+
+def save(name, sig, data, directory=None):
+    """Atomically write the artifact, to the cache directory by default.
+    Failures are ignored, the tables are then simply rebuilt next time.
+    """
+    path = artifact_path(name, directory)
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'signature': sig, 'data': data}, f, separators=(',', ':'))
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def dump_lrtable(lrtable):
+    return {
+        'action': [[state, actions] for state, actions in lrtable.lr_action.items()],
+        'goto': [[state, gotos] for state, gotos in lrtable.lr_goto.items()],
+        'defaulted': [[state, action] for state, action in lrtable.defaulted_states.items()],
+    }
+
+
+def load_lrtable(grammar, data):
+    """Rebuild an ``LRTable`` from its persisted form without running the LALR construction.
+    """
+    lrtable = sly.yacc.LRTable.__new__(sly.yacc.LRTable)
+    lrtable.grammar = grammar
+    lrtable.lr_productions = grammar.Productions
+    lrtable.lr_action = {state: actions for state, actions in data['action']}
+    lrtable.lr_goto = {state: gotos for state, gotos in data['goto']}
+    lrtable.defaulted_states = {state: action for state, action in data['defaulted']}
+    lrtable.sr_conflicts = []
+    lrtable.rr_conflicts = []
+    return lrtable
+
+
+def write(directory):
+    """Write the artifacts of the parser tables to ``directory``, e.g. that
+    of the package at build time.
+    """
+    from gopygo.parser import GoParser
+
+    save(GoParser.__name__, grammar_signature(GoParser), dump_lrtable(GoParser._lrtable), directory)
+    return [artifact_path(GoParser.__name__, directory)]
@@ -229,6 +229,9 @@ class Generator():
             text = text[:-2]
         return text
 
+    def basic_lit_list(self, node, separator=', ', indent=''):
+        return self.list(list(node), separator=separator, indent=indent)
+
     def for_stmt(self, node):
         text = '%sfor ' % (self.indent * INDENT)
         if node.init is not None:
@@ -320,6 +323,8 @@ class Generator():
 
     def basic_lit(self, node):
         if node.kind == Token.STRING:
+            if node.raw:
+                return '`%s`' % node.value
             return '%s' % json.dumps(node.value)
         elif node.kind == Token.CHAR:
             return '\'%s\'' % node.value
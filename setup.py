@@ -1,4 +1,32 @@
+import os
+import sys
+import subprocess
+
 from setuptools import setup
+from setuptools.command.build_py import build_py
+
+
+class BuildPy(build_py):
+    """Also generate the LALR tables of the parser, installed as package data
+    so that importing the parser does not build nor write them.
+    """
+
+    def run(self):
+        super().run()
+        if not self.dry_run:
+            self.execute(self.build_tables, (), 'generating the parser tables')
+
+    def build_tables(self):
+        target = os.path.join(self.build_lib, 'gopygo')
+        env = dict(os.environ, PYTHONPATH=self.build_lib)
+        env.pop('GOPYGO_CACHE_DIR', None)
+        code = 'import sys, gopygo.tables; gopygo.tables.write(sys.argv[1])'
+        subprocess.check_call([sys.executable, '-c', code, target], env=env)
+        if not os.path.exists(os.path.join(target, 'GoParser.tables.json')):
+            raise RuntimeError('Could not write the parser tables to %s' % target)
+
+    def get_outputs(self, include_bytecode=1):
+        return super().get_outputs(include_bytecode) + [os.path.join(self.build_lib, 'gopygo', 'GoParser.tables.json')]
 
 
 setup(
@@ -27,7 +55,11 @@ AST library based on original go/ast package https://golang.org/pkg/go/ast/
 
 """,
     zip_safe=False,
-    install_requires=['sly'],
+    # The parser builds on private parts of SLY (sly.Parser name mangled
+    # methods, YaccProduction internals), only this version is tested.
+    install_requires=['sly==0.5'],
+    package_data={'gopygo': ['*.tables.json']},
+    cmdclass={'build_py': BuildPy},
     extras_require={
         'dev': [
             'flake8',
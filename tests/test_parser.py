@@ -1,9 +1,37 @@
+import os
+import json
+import pickle
+import sys
+import time
+import threading
+import subprocess
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import pytest
 
-from gopygo import parse, unparse
-from gopygo.exceptions import LexerError
+from gopygo import parse, parse_bytes, parse_file, reparse, unparse, tables, StreamParser
+from gopygo import parse_expr, parse_stmt, parse_type, parse_decl, parse_events, ParseProfile
+from gopygo.parser import GoLexer, GoParser, parser, tokenize_compact, _parse_parallel, _parse_text_chunk, _Chunk
+from gopygo.enums import Token
+from gopygo.position import LineTable
+from gopygo.scanner import Scanner, scan
+from gopygo.ast import (
+    Node, Comment, BasicLit, BasicLitList, File, Package, GenDecl, DeclStmt, FuncDecl,
+    Ident, BinaryExpr, CallExpr, AssignStmt, ForStmt, StarExpr, ArrayType, MapType, SelectorExpr, UnaryExpr
+)
+from gopygo.exceptions import LexerError, ParserError, LimitError
+
 
+@pytest.fixture(params=['lalr', 'descent'])
+def engine(request):
+    """Run the test with each parser engine, also set as ``self.engine``."""
+    if request.instance is not None:
+        request.instance.engine = request.param
+    return request.param
 
+
+@pytest.mark.usefixtures('engine')
 class TestParser():
 
     def setup_method(self):
@@ -12,7 +40,7 @@ class TestParser():
     def parse_unparse(self, expect=None):
         self.program = self.program.lstrip()
 
-        tree = parse(self.program)
+        tree = parse(self.program, engine=self.engine)
         text = unparse(tree)
         if expect is not None:
             assert expect == text
@@ -272,7 +300,7 @@ func main() {
 """
         self.program = self.program[1:]
 
-        tree = parse(self.program)
+        tree = parse(self.program, engine=self.engine)
         text = unparse(tree)
         lines = self.program.split('\n')
         del lines[5]
@@ -812,6 +840,1606 @@ some.Call()
 """
         self.parse_unparse(expect.lstrip())
 
+    def test_039_single_line_blocks(self):
+        self.program = """
+func empty() {}
+func abs(x int) int { if x < 0 { return -x }; return x }
+"""
+        expect = """
+func empty() {
+}
+func abs(x int) int {
+    if x < 0 {
+        return -x
+    }
+    return x
+}
+"""
+        self.parse_unparse(expect.lstrip())
+
+    def test_040_comment_after_brace_and_blank_line_before_brace(self):
+        self.program = """
+func main() { // entry point
+    x := 1
+
+}
+"""
+        expect = """
+func main() {
+    // entry point
+    x := 1
+}
+"""
+        self.parse_unparse(expect.lstrip())
+
+    def test_041_empty_case_clause(self):
+        self.program = """
+switch x {
+case 1:
+case 2:
+    f()
+default:
+    g()
+}
+"""
+        self.parse_unparse()
+
+
+class TestLexer():
+
+    def tokens(self, text):
+        return [(tok.type, tok.value) for tok in GoLexer().tokenize(text)]
+
+    def test_001_keyword_prefixes_are_identifiers(self):
+        assert self.tokens('packages strings intValue trueish format') == [
+            ('IDENT', 'packages'),
+            ('IDENT', 'strings'),
+            ('IDENT', 'intValue'),
+            ('IDENT', 'trueish'),
+            ('IDENT', 'format'),
+            ('SEMICOLON', ''),
+        ]
+        assert self.tokens('package string int true for') == [
+            ('PACKAGE', 'package'),
+            ('STRING', 'string'),
+            ('INT', 'int'),
+            ('TRUE', 'true'),
+            ('FOR', 'for'),
+        ]
+
+    def test_002_longest_operator_match(self):
+        assert [t for t, v in self.tokens('a &^= b <<= c <- d ... e := f')] == [
+            'IDENT', 'AND_NOT_ASSIGN', 'IDENT', 'SHL_ASSIGN', 'IDENT', 'ARROW',
+            'IDENT', 'ELLIPSIS', 'IDENT', 'DEFINE', 'IDENT', 'SEMICOLON'
+        ]
+
+    def test_003_numbers(self):
+        assert self.tokens('42 0x1F 0b101 1_000 3.14 .5 1e9 2.5i 7i') == [
+            ('INT_LITERAL', '42'),
+            ('INT_LITERAL', '0x1F'),
+            ('INT_LITERAL', '0b101'),
+            ('INT_LITERAL', '1_000'),
+            ('FLOAT_LITERAL', '3.14'),
+            ('FLOAT_LITERAL', '.5'),
+            ('FLOAT_LITERAL', '1e9'),
+            ('IMAG_LITERAL', '2.5i'),
+            ('IMAG_LITERAL', '7i'),
+            ('SEMICOLON', ''),
+        ]
+
+    def test_004_offsets(self):
+        toks = list(GoLexer().tokenize('a\n// c\n  b'))
+        assert [(t.type, t.index, t.end) for t in toks] == [
+            ('IDENT', 0, 1),
+            ('SEMICOLON', 1, 2),
+            ('COMMENT', 2, 7),
+            ('IDENT', 9, 10),
+            ('SEMICOLON', 10, 10),
+        ]
+
+    def test_005_identifier_with_type_prefix(self):
+        program = """
+s := strings.Join(parts, ", ")
+"""
+        program = program.lstrip()
+        assert unparse(parse(program)) == program
+
+    def test_006_semicolon_insertion(self):
+        text = 'f(a,\n  b)\nx++\nif x {\n  return\n}\ny := []int{\n  1,\n}\nz = x +\n  1 // sum\n'
+        assert [t for t, v in self.tokens(text)] == [
+            'IDENT', 'LPAREN', 'IDENT', 'COMMA', 'IDENT', 'RPAREN', 'SEMICOLON',
+            'IDENT', 'INC', 'SEMICOLON',
+            'IF', 'IDENT', 'LBRACE', 'RETURN', 'SEMICOLON', 'RBRACE', 'SEMICOLON',
+            'IDENT', 'DEFINE', 'LBRACK', 'RBRACK', 'INT', 'LBRACE', 'INT_LITERAL', 'COMMA', 'RBRACE', 'SEMICOLON',
+            'IDENT', 'ASSIGN', 'IDENT', 'ADD', 'INT_LITERAL', 'SEMICOLON', 'COMMENT',
+        ]
+
+    def test_007_semicolon_before_trailing_comment(self):
+        toks = list(GoLexer().tokenize('a // c\nb\n', comments=False))
+        assert [(t.type, t.index, t.end) for t in toks] == [
+            ('IDENT', 0, 1),
+            ('SEMICOLON', 2, 2),
+            ('IDENT', 7, 8),
+            ('SEMICOLON', 8, 9),
+        ]
+
+
+class TestScanner():
+
+    program = """
+package main
+
+//go:generate stringer -type=Pill
+func main() {
+    s := "x" // trailing
+    var n int
+}
+"""
+
+    def test_001_kinds_offsets_and_text(self):
+        tokens = list(scan('s := "x" // c\nvar n int\n'))
+        assert tokens == [
+            (Token.IDENT, 0, 's'),
+            (Token.DEFINE, 2, ':='),
+            (Token.STRING, 5, '"x"'),
+            (Token.SEMICOLON, 9, ''),
+            (Token.COMMENT, 9, '// c\n'),
+            (Token.VAR, 14, 'var'),
+            (Token.IDENT, 18, 'n'),
+            (Token.IDENT, 20, 'int'),
+            (Token.SEMICOLON, 23, '\n'),
+        ]
+
+    def test_002_without_comments(self):
+        kinds = [kind for kind, offset, text in scan(self.program, comments=False)]
+        assert Token.COMMENT not in kinds
+        assert kinds.count(Token.SEMICOLON) == 4
+
+    def test_003_go_generate_lines(self):
+        lines = [text for kind, offset, text in scan(self.program) if kind == Token.COMMENT]
+        assert [line for line in lines if line.startswith('//go:generate')] == ['//go:generate stringer -type=Pill\n']
+
+    def test_004_resume_from_offset(self):
+        tokens = list(scan(self.program))
+        offset = tokens[5][1]
+        assert list(scan(self.program, offset)) == tokens[5:]
+
+    @pytest.mark.parametrize('comments', [True, False])
+    def test_006_resume_at_every_token(self, comments):
+        programs = (
+            self.program, 'a\nb', 'x // c\ny', 'f(x) /* c */\nreturn',
+            "x := 1.5\ny := 2i\nz := 1e3 // c\nc := 'a'\nd := .5i\ne := 0x1p-2\n",
+        )
+        for program in programs:
+            tokens = list(scan(program, comments=comments))
+            for i, (kind, offset, text) in enumerate(tokens):
+                previous = tokens[i - 1][0] if i else None
+                assert list(scan(program, offset, comments, previous)) == tokens[i:]
+
+    def test_005_does_not_load_the_parser(self):
+        code = 'import sys, gopygo.scanner; print("sly" in sys.modules, "gopygo.parser" in sys.modules)'
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root)
+        assert subprocess.check_output([sys.executable, '-c', code], env=env).decode().split() == ['False', 'False']
+
+
+class TestCompactTokens():
+
+    program = """
+package main
+
+import "fmt"
+
+// Main function
+func main() {
+    x := []int{1, 2}
+    fmt.Println(x[0] + 1.5, "done")
+}
+"""
+
+    def test_001_kinds_and_offsets(self):
+        tokens = tokenize_compact('var n int = 42 // answer\n')
+        assert [tokens.kind(i) for i in range(len(tokens))] == [
+            Token.VAR, Token.IDENT, Token.IDENT, Token.ASSIGN, Token.INT, Token.SEMICOLON, Token.COMMENT
+        ]
+        assert [tokens.value(i) for i in range(len(tokens))] == ['var', 'n', 'int', '=', '42', '', '// answer\n']
+        assert tokens.kinds.itemsize == 1
+        assert tokens.count(Token.IDENT) == 2
+
+    def test_002_newline_is_semicolon(self):
+        tokens = tokenize_compact('a; b\n')
+        assert [tokens.kind(i) for i in range(len(tokens))] == [
+            Token.IDENT, Token.SEMICOLON, Token.IDENT, Token.SEMICOLON
+        ]
+        assert tokens.value(1) == ';'
+        assert tokens.value(3) == '\n'
+
+    def test_003_matches_tokenize(self):
+        text = self.program.lstrip()
+        expected = [(t.type, t.value, t.index, t.end) for t in GoLexer().tokenize(text)]
+        tokens = tokenize_compact(text)
+        assert [(t.type, t.value, t.index, t.end) for t in tokens.tokens()] == expected
+
+    def test_004_feeds_the_parser(self):
+        text = self.program.lstrip()
+        tree = parser.parse(tokenize_compact(text).tokens())
+        assert unparse(tree) == unparse(parse(text))
+
+
+class TestPositions():
+
+    program = """
+package main
+
+import "fmt"
+
+func main() {
+    total := 1 + 2
+    fmt.Println(total)
+}
+"""
+
+    def test_001_node_spans(self):
+        tree = parse(self.program)
+        main = tree.decls[1]
+        assert self.program[main.pos:main.end].startswith('func main() {')
+        assert self.program[main.pos:main.end].endswith('}')
+        assign = main.body.list[0]
+        assert self.program[assign.pos:assign.end] == 'total := 1 + 2'
+        assert self.program[assign.rhs.pos:assign.rhs.end] == '1 + 2'
+        call = main.body.list[1].expr
+        assert self.program[call.pos:call.end] == 'fmt.Println(total)'
+
+    def test_002_line_and_column(self):
+        tree = parse(self.program)
+        lines = LineTable(self.program)
+        call = tree.decls[1].body.list[1].expr
+        assert lines.position(call.pos) == (8, 5)
+        assert lines.position(tree.decls[1].pos) == (6, 1)
+        assert lines.line(len(self.program)) == 10
+
+    def test_003_without_positions(self):
+        tree = parse(self.program, positions=False)
+        assert tree.decls[1].pos is None
+        assert tree.decls[1].end is None
+
+    def test_004_lexer_error_position(self):
+        with pytest.raises(LexerError, match=r"Illegal character '~' at line 2, column 6") as e:
+            parse('x := 1\ny := ~x\n')
+        assert e.value.offset == 12
+
+    @pytest.mark.parametrize('engine', ['lalr', 'descent'])
+    def test_005_every_node_has_a_span(self, engine):
+        program = """
+package main
+
+import "fmt"
+import . "./somelib"
+import (
+    "testing"
+    other "./somelib"
+)
+
+type person struct {
+    name string
+    next *person
+    func() int
+}
+
+type geometry interface {
+    area() float64
+    scale() *geometry
+    sides() ...int
+}
+
+type empty interface {}
+
+func sum(values ...int) (total int) {
+    // Accumulate the values.
+    var count int = 0
+    const limit = 10
+    type pair struct {
+        a int
+    }
+    p := *q
+    table := map[string]int{
+        "a": 1,
+        "b": 2,
+    }
+    return fmt.Sprint(count, limit, table, p)
+}
+"""
+        for text in (program, TestEngines.program):
+            for node in walk(parse(text, engine=engine)):
+                assert node.pos is not None and node.end is not None, node
+
+
+def walk(node):
+    """Yield ``node`` and every AST node reachable from it."""
+    if isinstance(node, (list, tuple, BasicLitList)):
+        for elt in node:
+            yield from walk(elt)
+    elif isinstance(node, Node):
+        yield node
+        for value in vars(node).values():
+            yield from walk(value)
+
+
+class TestComments():
+
+    program = """
+// Package doc
+package main
+
+import "fmt"
+
+// Main function
+func main() {
+    // Comment inside function body
+    total := 1 + 2 // trailing comment
+    fmt.Println(total)
+    // Last comment
+}
+"""
+
+    def test_001_comments_are_kept_by_default(self):
+        tree = parse(self.program)
+        assert any(isinstance(node, Comment) for node in walk(tree))
+
+    def test_002_comments_dropped(self):
+        tree = parse(self.program, comments=False)
+        assert not any(isinstance(node, Comment) for node in walk(tree))
+        assert unparse(tree) == """package main
+
+import "fmt"
+
+func main() {
+    total := 1 + 2
+    fmt.Println(total)
+}
+"""
+
+    def test_003_compact_tokens_without_comments(self):
+        tokens = tokenize_compact('a := 1 // one\n// two\nb()\n', comments=False)
+        assert [tokens.value(i) for i in range(len(tokens))] == ['a', ':=', '1', '', 'b', '(', ')', '\n']
+
+
+class TestEngines():
+
+    program = """
+package main
+
+import (
+    "fmt"
+    m "math"
+)
+
+type Point struct {
+    X int
+    Y *int
+}
+
+func sum(values ...int) (total int) {
+    for _, v := range values {
+        total += v * 2 - -v
+    }
+    return total
+}
+
+func main() {
+    // print a few values
+    xs := []int{1, 2, 3}
+    seen := map[string]bool{"a": true, "b": false}
+    switch n := len(xs); n {
+    case 1, 2:
+        fmt.Println(xs[1:], seen["a"], m.Sqrt(2))
+    default:
+        fmt.Println(sum(xs...) == 12 && n > 0)
+    }
+}
+"""
+
+    def test_001_same_tree(self):
+        lalr = parse(self.program)
+        descent = parse(self.program, engine='descent')
+        assert unparse(descent) == unparse(lalr)
+        assert [(type(n), n.pos, n.end) for n in walk(descent)] == [(type(n), n.pos, n.end) for n in walk(lalr)]
+
+    def test_002_syntax_error(self):
+        with pytest.raises(ParserError, match=r"Unexpected '\)' at line 2, column 10") as e:
+            parse('x := 1\ny := (1 +)\n', engine='descent')
+        assert e.value.offset == 16
+
+    def test_003_unknown_engine(self):
+        with pytest.raises(ValueError):
+            parse('x := 1', engine='earley')
+
+    @staticmethod
+    def spine(node, attr):
+        """Return the nodes found following ``attr`` from ``node``."""
+        nodes = []
+        while isinstance(node, Node):
+            nodes.append((type(node).__name__, node.pos, node.end))
+            node = getattr(node, attr, None)
+        return nodes
+
+    @pytest.mark.parametrize('text, attr', [
+        ('x = %s\n' % ' == '.join('a%d' % i for i in range(5000)), 'y'),
+        ('x = a0 + %s\n' % ' || '.join('a%d' % i for i in range(5000)), 'y'),
+        ('x = %sy\n' % ('!' * 5000), 'x'),
+        ('x = %sy\n' % ('-^' * 2500), 'x'),
+        ('x = %sy%s\n' % ('(' * 5000, ')' * 5000), 'x'),
+        ('if a {\n}%s else {\n}\n' % ''.join(' else if b%d {\n}' % i for i in range(5000)), '_else'),
+    ], ids=['comparisons', 'or', 'not', 'unary', 'parentheses', 'else_if'])
+    def test_004_long_chains(self, text, attr):
+        lalr = parse(text)
+        descent = parse(text, engine='descent')
+        if attr != '_else':
+            lalr, descent = lalr.rhs, descent.rhs
+        assert len(self.spine(descent, attr)) >= 5000
+        assert self.spine(descent, attr) == self.spine(lalr, attr)
+
+    def test_005_long_lists(self):
+        text = 'var x = []int{%s}\n\nfunc f() {\n    a, b = %s\n}\n' % (
+            ', '.join('a%d' % i for i in range(5000)), ', '.join('b%d' % i for i in range(5000)))
+        lalr = parse(text)
+        descent = parse(text, engine='descent')
+        assert len(descent[0].decl.specs[0].values[0].elts) == 5000
+        assert unparse(descent) == unparse(lalr)
+        assert [(type(n), n.pos, n.end) for n in walk(descent)] == [(type(n), n.pos, n.end) for n in walk(lalr)]
+
+
+class TestInput():
+
+    program = """
+package main
+
+import "fmt"
+
+func main() {
+    fmt.Println("héllo")
+}
+"""
+
+    def test_001_no_trailing_newline(self):
+        assert unparse(parse('x := 1')) == 'x := 1\n'
+        assert unparse(parse('\n\n  x := 1  \n\n\n')) == 'x := 1\n'
+
+    def test_002_parse_bytes(self):
+        data = self.program.encode('utf-8')
+        expected = unparse(parse(self.program))
+        assert unparse(parse_bytes(data)) == expected
+        assert unparse(parse_bytes(bytearray(data))) == expected
+        assert unparse(parse_bytes(memoryview(data))) == expected
+
+    def test_003_parse_file(self, tmp_path):
+        path = tmp_path / 'main.go'
+        path.write_bytes(self.program.encode('utf-8'))
+        tree = parse_file(str(path))
+        assert unparse(tree) == unparse(parse(self.program))
+        call = tree.decls[1].body.list[0].expr
+        assert self.program[call.pos:call.end] == 'fmt.Println("héllo")'
+
+    def test_004_byte_offsets(self):
+        data = self.program.encode('utf-8')
+        call = parse_bytes(data).decls[1].body.list[0].expr
+        lines = LineTable(self.program)
+        start, end = lines.byte_offset(call.pos), lines.byte_offset(call.end)
+        assert data[start:end] == 'fmt.Println("héllo")'.encode('utf-8')
+        assert (lines.char_offset(start), lines.char_offset(end)) == (call.pos, call.end)
+        for offset in range(len(self.program) + 1):
+            assert lines.char_offset(lines.byte_offset(offset)) == offset
+        with pytest.raises(ValueError):
+            lines.char_offset(data.index('é'.encode('utf-8')) + 1)
+        ascii = LineTable('x := 1\ny := 2\n')
+        assert ascii.byte_offset(9) == ascii.char_offset(9) == 9
+
+
+@pytest.mark.usefixtures('engine')
+class TestImportsOnly():
+
+    program = """
+package main
+
+import "fmt" // fmt
+import (
+    "os"
+    s "strings"
+)
+
+// main does
+func main() {
+    fmt.Println("héllo")
+}
+"""
+
+    header = """
+package main
+
+import "fmt"
+
+// fmt
+import (
+    "os"
+    s "strings"
+)
+"""
+
+    def test_001_imports(self):
+        program = self.program.lstrip()
+        tree = parse(program, engine=self.engine, mode='imports_only')
+        assert unparse(tree) == self.header.lstrip()
+        assert [type(decl).__name__ for decl in tree.decls] == ['GenDecl', 'Comment', 'GenDecl']
+        assert program[tree.pos:tree.end] == program[:program.index('\n\n// main')]
+        tree = parse(program, comments=False, engine=self.engine, mode='imports_only')
+        assert [decl.tok for decl in tree.decls] == ['import', 'import']
+
+    def test_002_header_only(self):
+        for program in ('package main\n', 'package main\n\nimport "fmt"\n', self.header.lstrip()):
+            assert unparse(parse(program, engine=self.engine, mode='imports_only')) == unparse(parse(program))
+
+    def test_003_stops_lexing(self):
+        program = self.program.lstrip() + '"unterminated\n'
+        with pytest.raises(LexerError):
+            parse(program, engine=self.engine)
+        assert unparse(parse(program, engine=self.engine, mode='imports_only')) == self.header.lstrip()
+
+    def test_004_stops_decoding(self, tmp_path):
+        # Neither decoded nor scanned past the imports
+        data = self.program.lstrip().encode('utf-8') + b'\xff' + b'x := 1\n' * 100000
+        assert unparse(parse_bytes(data, engine=self.engine, mode='imports_only')) == self.header.lstrip()
+        path = tmp_path / 'main.go'
+        path.write_bytes(data)
+        assert unparse(parse_file(str(path), engine=self.engine, mode='imports_only')) == self.header.lstrip()
+
+    def test_005_prefix(self):
+        # The imports do not fit in the first decoded prefix
+        program = 'package main\n\nimport (\n' + '    "fmt"\n' * 2000 + ')\n\nfunc main() {\n}\n'
+        tree = parse_bytes(program.encode('utf-8'), engine=self.engine, mode='imports_only')
+        assert len(tree.decls) == 1
+        assert len(tree.decls[0].specs) == 2000
+
+    def test_006_unknown_mode(self):
+        with pytest.raises(ValueError):
+            parse(self.program, engine=self.engine, mode='declarations_only')
+
+
+@pytest.mark.usefixtures('engine')
+class TestLazyBodies():
+
+    program = """
+package main
+
+import "fmt"
+
+func closure(x int) func() int {
+    fmt.Println("}")
+    return func() int {
+        return x
+    }
+}
+
+func point(x int) int {
+    return x
+}
+"""
+
+    def test_001_body(self):
+        program = self.program.lstrip()
+        tree = parse(program, engine=self.engine, mode='lazy_bodies')
+        func = tree.decls[1]
+        assert func.name == 'closure'
+        assert 'body' not in vars(func)
+        assert program[func.pos:func.end].startswith('func closure(x int)')
+        assert program[func.body.pos:func.body.end].startswith('{\n    fmt.Println("}")')
+        assert 'body' in vars(func)
+        lit = func.body.list[1].results[0]
+        assert 'body' not in vars(lit)
+        assert program[lit.body.pos:lit.body.end] == '{\n        return x\n    }'
+        assert unparse(tree) == unparse(parse(program))
+        assert [(type(n), n.pos, n.end) for n in walk(tree)] == [(type(n), n.pos, n.end) for n in walk(parse(program))]
+
+    def test_002_unload_body(self):
+        func = parse(self.program, engine=self.engine, mode='lazy_bodies').decls[1]
+        body = func.body
+        func.unload_body()
+        assert 'body' not in vars(func)
+        assert func.body is not body
+        assert unparse(func.body) == unparse(body)
+        func = parse(self.program, engine=self.engine).decls[1]
+        body = func.body
+        func.unload_body()
+        assert func.body is body
+
+    def test_003_scan_bodies(self):
+        program = 'var f func(int) int\nfunc g(p struct{ x int }) interface{ M() } { return p }\nfunc h() {'
+        tokens = [(_type, program[start:end]) for _type, start, end in Scanner().scan_bodies(program)]
+        # No body for function types, nor for unclosed bodies
+        assert [text for _type, text in tokens if _type == 'BODY'] == ['{ return p }']
+        assert tokens[-1] == ('LBRACE', '{')
+
+    def test_004_no_positions(self):
+        tree = parse(self.program, positions=False, engine=self.engine, mode='lazy_bodies')
+        assert tree.decls[2].body.pos is None
+        assert unparse(tree) == unparse(parse(self.program))
+
+    def test_005_syntax_error(self):
+        if self.engine != 'descent':
+            pytest.skip('The LALR engine recovers from syntax errors')
+        tree = parse('func f() {\n    x := \n}\n', engine=self.engine, mode='lazy_bodies')
+        with pytest.raises(ParserError):
+            tree.body
+
+
+@pytest.mark.usefixtures('engine')
+class TestWorkers():
+
+    program = """
+package main
+
+import "fmt"
+
+// One
+func one() int {
+    return 1
+}
+
+var x int
+
+func two() {
+    fmt.Println("two")
+}
+
+const c = 3
+
+func three(a int, b int) int {
+    return a + b*c
+}
+
+type T struct {
+    x int
+}
+"""
+
+    def assert_same(self, program, tree):
+        expected = parse(program, engine=self.engine)
+        assert unparse(tree) == unparse(expected)
+        assert [(type(n), n.pos, n.end) for n in walk(tree)] == [(type(n), n.pos, n.end) for n in walk(expected)]
+
+    def test_001_same_tree(self):
+        program = self.program.lstrip()
+        tree = _parse_parallel(program, True, True, self.engine, 2)
+        assert tree is not None
+        self.assert_same(program, tree)
+        program += 'package other\n\n' + program[len('package main\n'):]
+        tree = _parse_parallel(program, True, True, self.engine, 2)
+        assert tree is not None
+        self.assert_same(program, tree)
+        self.assert_same(program, parse(program, engine=self.engine, workers=2))
+
+    def test_002_no_positions(self):
+        tree = parse(self.program, positions=False, comments=False, engine=self.engine, workers=2)
+        assert unparse(tree) == unparse(parse(self.program, comments=False))
+        assert tree.pos is None
+
+    def test_003_fallback(self):
+        # A declaration keyword starting a line of a raw string is no boundary
+        program = self.program.lstrip().replace('var x int', 'var x = `\nfunc two() {\n`')
+        chunk = _Chunk(program, 0, program.index('func two() {\n`'), True)
+        list(chunk)
+        assert not chunk.clean
+        chunk = _Chunk(program, 0, program.index('const c'), True)
+        list(chunk)
+        assert chunk.clean
+        self.assert_same(program, parse(program, engine=self.engine, workers=2))
+
+    def test_004_syntax_error(self):
+        if self.engine != 'descent':
+            pytest.skip('The LALR engine recovers from syntax errors')
+        program = self.program.lstrip().replace('return 1', 'return 1 +')
+        with pytest.raises(ParserError):
+            parse(program, engine=self.engine, workers=2)
+
+    def test_005_mode(self):
+        with pytest.raises(ValueError):
+            parse(self.program, engine=self.engine, mode='lazy_bodies', workers=2)
+
+    def test_006_executor(self):
+        program = self.program.lstrip()
+        with ProcessPoolExecutor(2) as pool:
+            for _ in range(2):
+                tree = _parse_parallel(program, True, True, self.engine, 2, pool)
+                assert tree is not None
+                self.assert_same(program, tree)
+            self.assert_same(program, parse(program, engine=self.engine, executor=pool))
+        # Not a boundary inside a raw string
+        program = program.replace('var x int', 'var x = `\nfunc two() {\n`')
+        with ThreadPoolExecutor(2) as pool:
+            self.assert_same(program, parse(program, engine=self.engine, workers=2, executor=pool))
+            with pytest.raises(ValueError):
+                parse(program, engine=self.engine, max_tokens=1000, executor=pool)
+
+    def test_007_chunk_offsets(self):
+        import tracemalloc
+
+        program = self.program.lstrip()
+        start = program.index('func two')
+        end = program.index('const c')
+        expected = [(type(n), n.pos, n.end) for n in walk(parse(program, engine=self.engine).decls)
+                    if n.pos is not None and start <= n.pos < end]
+        # The chunk is parsed on its own, whatever its offset in the text
+        base = 10 ** 8
+        tracemalloc.start()
+        try:
+            chunk = _parse_text_chunk(program[start:end + 1], base + start, base + end, True, True, self.engine)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert peak < base // 100
+        items = pickle.loads(chunk)
+        assert [(type(n), n.pos - base, n.end - base) for n in walk(items)] == expected
+
+
+@pytest.mark.usefixtures('engine')
+class TestReparse():
+
+    program = """
+package main
+
+import "fmt"
+
+// One
+func one() int {
+    return 1
+}
+
+var x int
+
+func two() {
+    fmt.Println("two")
+}
+
+func three(a int, b int) int {
+    return a + b
+}
+"""
+
+    def reparse(self, old, new, **kwargs):
+        tree = parse(old, engine=self.engine)
+        decls = list(tree.decls)
+        new_tree = reparse(tree, old, new, engine=self.engine, **kwargs)
+        expected = parse(new, engine=self.engine)
+        assert unparse(new_tree) == unparse(expected)
+        assert [(type(n), n.pos, n.end) for n in walk(new_tree)] == [(type(n), n.pos, n.end) for n in walk(expected)]
+        return decls, new_tree.decls
+
+    def test_001_edit_body(self):
+        program = self.program.lstrip()
+        old, new = self.reparse(program, program.replace('"two"', '"deux"'))
+        assert [a is b for a, b in zip(old, new)] == [True, True, True, True, False, True]
+
+    def test_002_moved_declarations(self):
+        program = self.program.lstrip()
+        old, new = self.reparse(program, program.replace('return 1', 'return 1 + 2*3'))
+        assert [a is b for a, b in zip(old, new)] == [True, True, False, True, True, True]
+
+    def test_003_new_declaration(self):
+        program = self.program.lstrip()
+        old, new = self.reparse(program, program.replace('var x int\n', 'var x int\nvar y int\n'))
+        assert len(new) == len(old) + 1
+        assert new[0] is old[0] and new[-2:] == old[-2:]
+        old, new = self.reparse(program, program.replace('var x int\n', ''))
+        assert len(new) == len(old) - 1
+
+    def test_004_edit(self):
+        program = self.program.lstrip()
+        start = program.index('"two"')
+        new = program[:start] + '"deux"' + program[start + 5:]
+        old, new = self.reparse(program, new, edit=(start, start + 5, start + 6))
+        assert new[-1] is old[-1]
+
+    def test_005_fallback(self):
+        program = self.program.lstrip()
+        for new in (
+            program.replace('package main', 'package other'),
+            program.replace('var x int', 'var x = `\nfunc y() {\n`'),
+            program.replace('var x int', 'L:'),
+        ):
+            self.reparse(program, new)
+
+    def test_006_successive_edits(self):
+        program = self.program.lstrip().replace('var x int', 'var x = []int{1, -2}')
+        tree = parse(program, engine=self.engine)
+        for old, new in (('return 1', 'return 12'), ('"two"', '"2"'), ('// One', '// 1'), ('a + b', 'a+b')):
+            text = program.replace(old, new)
+            tree = reparse(tree, program, text, engine=self.engine)
+            program = text
+            expected = parse(program, engine=self.engine)
+            assert [(type(n), n.pos, n.end) for n in walk(tree)] == [(type(n), n.pos, n.end) for n in walk(expected)]
+
+    def test_007_edit_time(self):
+        def edit_time(funcs):
+            program = 'package main\n\n' + 'func f() {\n    x := []int{1, 2}\n    g(x[0], "s")\n}\n\n' * funcs
+            tree = parse(program, engine=self.engine)
+            start = program.index('1')
+            best = None
+            for i in range(6):
+                # One character inserted then removed at the start, all the
+                # declarations after it move.
+                text = program[:start] + 'x' + program[start:] if i % 2 == 0 else program[:start] + program[start + 1:]
+                edit = (start, start, start + 1) if i % 2 == 0 else (start, start + 1, start)
+                t = time.perf_counter()
+                tree = reparse(tree, program, text, engine=self.engine, edit=edit)
+                elapsed = time.perf_counter() - t
+                program = text
+                # The first edit links the moved declarations to their offsets
+                if i:
+                    best = elapsed if best is None else min(best, elapsed)
+            return best
+
+        small = edit_time(20)
+        large = edit_time(4000)
+        assert large < small * 10
+
+
+@pytest.mark.usefixtures('engine')
+class TestStreamParser():
+
+    program = """
+package main
+
+import "fmt"
+
+// Café
+func one() int {
+    return 1
+}
+
+var s = `
+func x() {
+`
+
+func two() {
+    fmt.Println("two")
+}
+"""
+
+    def items(self, items):
+        for item in items:
+            if isinstance(item, File):
+                yield item.name
+                yield from self.items(item.decls)
+            else:
+                yield item
+
+    def spans(self, items):
+        return [(type(n), n.pos, n.end) for item in items for n in walk(item)]
+
+    def stream(self, chunks):
+        stream = StreamParser(engine=self.engine)
+        items = []
+        for chunk in chunks:
+            stream.feed(chunk)
+            items.extend(stream.completed())
+        stream.close()
+        items.extend(stream.completed())
+        return items
+
+    def test_001_chunks(self):
+        program = self.program.lstrip()
+        expected = self.spans(self.items([parse(program, engine=self.engine)]))
+        data = program.encode()
+        for size in (1, 2, 5, 64, len(data)):
+            # Split in the middle of tokens, of the raw string and of 'é'
+            items = self.stream(data[i:i + size] for i in range(0, len(data), size))
+            assert self.spans(items) == expected
+        items = self.stream(program[i:i + 3] for i in range(0, len(program), 3))
+        assert self.spans(items) == expected
+        assert [type(item) for item in items] == [Package, GenDecl, Comment, FuncDecl, DeclStmt, FuncDecl]
+
+    def test_002_completed(self):
+        program = self.program.lstrip()
+        stream = StreamParser(engine=self.engine)
+        stream.feed(program[:program.index('var s')])
+        assert [type(item) for item in stream.completed()] == [Package, GenDecl, Comment, FuncDecl]
+        assert list(stream.completed()) == []
+        stream.feed(program[program.index('var s'):program.index('func x')])
+        assert list(stream.completed()) == []
+        stream.feed(program[program.index('func x'):])
+        assert [type(item) for item in stream.completed()] == [DeclStmt, FuncDecl]
+        # Only the text of the pending items is kept
+        assert stream._text == ''
+        stream.close()
+        assert list(stream.completed()) == []
+
+    def test_003_error(self):
+        stream = StreamParser(engine='descent')
+        stream.feed('package main\n\nfunc f() {\n    x := \n}\n')
+        assert [type(item) for item in stream.completed()] == [Package]
+        with pytest.raises(ParserError):
+            stream.close()
+        with pytest.raises(ValueError):
+            stream.feed('')
+
+    def test_004_recover(self):
+        funcs = ''.join('func f%d() {\n    x := %d\n}\n\n' % (i, i) for i in range(2000))
+        program = 'package main\n\n' + funcs.replace('x := 0\n', 'x := \n', 1)
+        errors = []
+        stream = StreamParser(engine=self.engine, errors=errors)
+        names = []
+        for i in range(0, len(program), 4096):
+            stream.feed(program[i:i + 4096])
+            # The text after the error is not held
+            assert len(stream._text) < 100
+            names.extend(item.name for item in stream.completed() if isinstance(item, FuncDecl))
+        stream.close()
+        assert names == ['f%d' % i for i in range(1, 2000)]
+        expected = []
+        parse(program, engine=self.engine, errors=expected)
+        assert [(str(e), e.offset) for e in errors] == [(str(e), e.offset) for e in expected]
+        assert errors[0].offset == program.index('}')
+
+    def test_005_error_later(self):
+        program = self.program.lstrip() + 'func three() {\n    x := \n}\n' + 'func four() {\n}\n' * 1000
+        stream = StreamParser(engine=self.engine)
+        for i in range(0, len(program), 64):
+            stream.feed(program[i:i + 64])
+            assert len(stream._text) < 100
+        assert [type(item) for item in stream.completed()] == [Package, GenDecl, Comment, FuncDecl, DeclStmt, FuncDecl]
+        with pytest.raises(ParserError, match='line 19, column 1') as e:
+            stream.close()
+        assert e.value.offset == program.index('}', program.index('func three'))
+
+
+@pytest.mark.usefixtures('engine')
+class TestFragments():
+
+    def test_001_expr(self):
+        x = parse_expr(' a + f(b)*c ', engine=self.engine)
+        assert type(x) is BinaryExpr
+        assert (x.pos, x.end) == (1, 11)
+        assert type(parse_expr('f(x);', engine=self.engine)) is CallExpr
+        assert type(parse_expr('x', engine=self.engine)) is Ident
+        with pytest.raises(ParserError):
+            parse_expr('a, b', engine=self.engine)
+
+    def test_002_stmt(self):
+        stmt = parse_stmt('x := 1', engine=self.engine)
+        assert type(stmt) is AssignStmt
+        assert (stmt.pos, stmt.end) == (0, 6)
+        stmt = parse_stmt('for i := 0; i < 10; i++ {\n    x++\n}', engine=self.engine)
+        assert type(stmt) is ForStmt
+        assert type(parse_stmt('var x int', engine=self.engine)) is DeclStmt
+
+    def test_003_type(self):
+        assert parse_type('int', engine=self.engine) == 'int'
+        for text, _type in (
+            ('*int', StarExpr),
+            ('[]int', ArrayType),
+            ('map[string]int', MapType),
+            ('Foo', Ident),
+            ('fmt.Stringer', SelectorExpr),
+        ):
+            x = parse_type(text, engine=self.engine)
+            assert type(x) is _type
+            assert (x.pos, x.end) == (0, len(text))
+        for text in ('a + b', 'int(x)'):
+            with pytest.raises(ParserError):
+                parse_type(text, engine=self.engine)
+
+    def test_004_decl(self):
+        for text, _type in (
+            ('func f(a int) int {\n    return a\n}', FuncDecl),
+            ('import "fmt"', GenDecl),
+            ('var x = 1', GenDecl),
+            ('type T struct {\n    a int\n}', GenDecl),
+        ):
+            decl = parse_decl(text, engine=self.engine)
+            assert type(decl) is _type
+            assert (decl.pos, decl.end) == (0, len(text))
+        with pytest.raises(ParserError):
+            parse_decl('x := 1', engine=self.engine)
+
+    def test_005_errors(self):
+        for entry in (parse_expr, parse_stmt, parse_type, parse_decl):
+            with pytest.raises(ParserError, match='Unexpected end of input'):
+                entry('', engine=self.engine)
+        with pytest.raises(ParserError, match=r"Unexpected '\)' at line 2, column 4"):
+            parse_expr('f(\n1 )) + 1', engine=self.engine)
+
+
+@pytest.mark.usefixtures('engine')
+class TestErrorRecovery():
+
+    program = """
+package main
+
+import "fmt"
+
+func one() int {
+    return 1
+}
+
+func two() {
+    fmt.Println("two"
+}
+
+var x int
+
+func three() {
+    y := := 3
+}
+
+func four() string {
+    return "four"
+}
+"""
+
+    def names(self, tree):
+        return [decl.name if isinstance(decl, FuncDecl) else type(decl).__name__ for decl in tree.decls]
+
+    def test_001_clean(self):
+        program = self.program.lstrip()
+        program = program.replace('"two"\n', '"two")\n').replace(':= :=', ':=')
+        errors = []
+        tree = parse(program, engine=self.engine, errors=errors)
+        assert errors == []
+        assert unparse(tree) == unparse(parse(program, engine=self.engine))
+
+    def test_002_errors(self):
+        program = self.program.lstrip()
+        errors = []
+        tree = parse(program, engine=self.engine, errors=errors)
+        assert type(tree) is File and tree.name.name == 'main'
+        assert self.names(tree) == ['GenDecl', 'one', 'DeclStmt', 'four']
+        assert [type(error) for error in errors] == [ParserError, ParserError]
+        offsets = [program.index('\n}', program.index('"two"')), program.index(':= :=') + 3]
+        assert [error.offset for error in errors] == offsets
+        assert str(errors[1]) == "Unexpected ':=' at line 16, column 10"
+
+    def test_003_lexer_error(self):
+        program = self.program.lstrip().replace('"two"\n', '"two)\n')
+        errors = []
+        tree = parse(program, engine=self.engine, errors=errors)
+        assert self.names(tree) == ['GenDecl', 'one', 'DeclStmt', 'four']
+        assert type(errors[0]) is LexerError
+        assert errors[0].offset == program.index('"two')
+
+    def test_004_chunks(self, monkeypatch):
+        monkeypatch.setattr('gopygo.parser.RECOVER_CHUNK', 16)
+        program = self.program.lstrip()
+        errors = []
+        tree = parse(program, engine=self.engine, errors=errors)
+        assert self.names(tree) == ['GenDecl', 'one', 'DeclStmt', 'four']
+        assert len(errors) == 2
+        program = program.replace('"two"\n', '"two")\n').replace(':= :=', ':=')
+        assert unparse(parse(program, engine=self.engine, errors=errors)) == unparse(parse(program, engine=self.engine))
+        assert len(errors) == 2
+
+    def test_005_lazy_bodies(self):
+        with pytest.raises(ValueError):
+            parse(self.program, engine=self.engine, mode='lazy_bodies', errors=[])
+
+    def test_006_misspelled_keyword(self):
+        program = self.program.lstrip().replace('"two"\n', '"two")\n').replace(':= :=', ':=')
+        program = program.replace('func three', 'fucn three')
+        errors = []
+        tree = parse(program, engine=self.engine, errors=errors)
+        assert self.names(tree) == ['GenDecl', 'one', 'two', 'DeclStmt', 'four']
+        assert [error.offset for error in errors] == [program.index('three')]
+        stream = StreamParser(engine=self.engine, errors=[])
+        stream.feed(program)
+        stream.close()
+        names = [item.name if isinstance(item, FuncDecl) else type(item).__name__ for item in stream.completed()]
+        assert names == ['Package', 'GenDecl'] + self.names(tree)[1:]
+
+
+@pytest.mark.usefixtures('engine')
+class TestLimits():
+
+    program = """
+package main
+
+func main() {
+    x := f((a + b) * [2]int{1, 2}[0])
+}
+"""
+
+    def test_001_max_tokens(self):
+        count = len(list(scan(self.program)))
+        parse(self.program, engine=self.engine, max_tokens=count)
+        with pytest.raises(LimitError, match='More than 10 tokens') as e:
+            parse(self.program, engine=self.engine, max_tokens=10)
+        assert e.value.limit == 'max_tokens'
+        assert e.value.offset == [start for _, start, _ in scan(self.program)][10]
+
+    def test_002_max_depth(self):
+        parse(self.program, engine=self.engine, max_depth=3)
+        with pytest.raises(LimitError) as e:
+            parse(self.program, engine=self.engine, max_depth=2)
+        assert e.value.limit == 'max_depth'
+        assert e.value.offset == self.program.index('(a')
+        with pytest.raises(LimitError):
+            parse('x := ' + '(' * 10000 + '1' + ')' * 10000, engine=self.engine, max_depth=100)
+
+    def test_003_deadline(self):
+        with pytest.raises(LimitError, match='Deadline exceeded') as e:
+            parse(self.program, engine=self.engine, deadline=time.monotonic() - 1)
+        assert e.value.limit == 'deadline'
+        parse(self.program, engine=self.engine, deadline=time.monotonic() + 60)
+
+    def test_004_cancel(self):
+        cancel = threading.Event()
+        parse(self.program, engine=self.engine, cancel=cancel)
+        cancel.set()
+        with pytest.raises(LimitError, match='Parse cancelled'):
+            parse(self.program, engine=self.engine, cancel=cancel)
+        # From another thread, during the parse
+        program = 'package main\n' + 'func f() {\n    x := a + b\n}\n' * 20000
+        cancel = threading.Event()
+        timer = threading.Timer(0.01, cancel.set)
+        timer.start()
+        try:
+            with pytest.raises(LimitError) as e:
+                parse(program, engine=self.engine, cancel=cancel)
+        finally:
+            timer.cancel()
+        assert e.value.limit == 'cancel'
+        assert 0 < e.value.offset < len(program)
+
+    def test_005_errors(self):
+        errors = []
+        with pytest.raises(LimitError):
+            parse(self.program + 'func (\n', engine=self.engine, errors=errors, max_depth=2)
+        with pytest.raises(ValueError):
+            parse(self.program, engine=self.engine, mode='lazy_bodies', max_tokens=10)
+
+    def test_006_errors_max_tokens(self):
+        # One function over several recovery chunks, retried at the lines
+        # starting like a top level item
+        program = 'package main\n\nfunc main() {\n' + 'var x = a + b\n' * 2000 + '}\n'
+        count = len(list(scan(program)))
+        parse(program, engine=self.engine, max_tokens=count, errors=[])
+        with pytest.raises(LimitError):
+            parse(program, engine=self.engine, max_tokens=count - 1, errors=[])
+
+    def test_007_max_depth_unary(self):
+        program = 'x := ' + '!' * 5000 + 'y\n'
+        assert parse(program, engine=self.engine, max_depth=100).rhs.op == '!'
+        program = 'x := ' + '(-' * 5000 + '1' + ')' * 5000 + '\n'
+        with pytest.raises(LimitError) as e:
+            parse(program, engine=self.engine, max_depth=100)
+        assert e.value.limit == 'max_depth'
+        if self.engine == 'descent':
+            # Beyond the interpreter stack
+            with pytest.raises(LimitError) as e:
+                parse(program, engine=self.engine)
+            assert e.value.limit == 'max_depth'
+
+
+class TestProfile():
+
+    program = """
+package main
+
+func main() {
+    x := f((a + b) * [2]int{1, 2}[0])
+    if x > 0 {
+        x--
+    }
+}
+"""
+
+    def test_001_counts(self):
+        profile = ParseProfile()
+        tree = parse(self.program, profile=profile)
+        assert unparse(tree) == unparse(parse(self.program))
+        assert profile.parses == 1 and profile.time > 0
+        assert profile.tokens == Counter(tok.type for tok in GoLexer().tokenize(self.program))
+        rules = profile.rules()
+        assert rules['if_stmt -> IF expr block_stmt'][0] == 1
+        assert rules['expr -> IDENT'][0] == 5
+        assert all(count > 0 and time >= 0 for count, time in rules.values())
+
+    def test_002_methods(self):
+        profile = ParseProfile()
+        parse(self.program, profile=profile)
+        methods = profile.methods()
+        assert sum(count for count, _ in methods.values()) == sum(count for count, _ in profile.rules().values())
+        assert any(name.startswith('GoParser.if_stmt:') for name in methods)
+        # Parses add up until cleared
+        rules = profile.rules()
+        parse(self.program, profile=profile)
+        assert profile.parses == 2
+        assert {rule: count for rule, (count, _) in profile.rules().items()} == \
+            {rule: 2 * count for rule, (count, _) in rules.items()}
+        profile.clear()
+        assert profile.parses == 0 and not profile.rules() and not profile.methods() and not profile.tokens
+
+    def test_003_export(self):
+        profile = ParseProfile()
+        parse(self.program, profile=profile)
+        data = json.loads(json.dumps(profile.as_dict()))
+        assert data['parses'] == 1
+        assert data['productions']['expr -> IDENT']['count'] == 5
+        assert data['tokens']['IDENT'] == profile.tokens['IDENT']
+        table = profile.table(sort='count', limit=3)
+        assert 'production' in table and 'method' in table and 'token' in table
+        lines = table.splitlines()
+        start = lines.index(next(line for line in lines if line.endswith('production')))
+        assert len(lines[start + 1:lines.index('', start)]) == 3
+        assert lines[start + 1].endswith('expr -> IDENT')
+        with pytest.raises(ValueError):
+            profile.table(sort='name')
+
+    def test_004_disabled(self):
+        profile = ParseProfile()
+        parse(self.program, profile=profile)
+        rules = profile.rules()
+        parse(self.program)
+        assert profile.rules() == rules and profile.parses == 1
+        with pytest.raises(ValueError):
+            parse(self.program, engine='descent', profile=profile)
+        with pytest.raises(ValueError):
+            parse(self.program, errors=[], profile=profile)
+
+    def test_005_factory(self):
+        class Factory():
+            CallExpr = type('CallExpr', (CallExpr,), {})
+
+        def counts(profile):
+            return Counter({rule: count for rule, (count, _) in profile.rules().items()})
+
+        plain, factory = ParseProfile(), ParseProfile()
+        parse(self.program, profile=plain)
+        parse(self.program, profile=factory, factory=Factory)
+        # Parses with and without a factory add up in the same productions
+        profile = ParseProfile()
+        for kwargs in ({}, {'factory': Factory}, {}):
+            parse(self.program, profile=profile, **kwargs)
+        assert counts(profile) == counts(plain) + counts(plain) + counts(factory)
+        assert profile.methods().keys() == plain.methods().keys() | factory.methods().keys()
+
+
+class TestFactory():
+
+    program = """
+package main
+
+func main() {
+    x := a + b*2
+    y := []int{1, 2}
+}
+"""
+
+    def test_001_tuples(self):
+        class Factory():
+            BinaryExpr = staticmethod(lambda x, op, y: ('binary', x, op, y))
+            Ident = staticmethod(lambda name: name)
+            BasicLit = staticmethod(lambda kind, value, raw=False: value)
+
+        body = parse(self.program, factory=Factory).decls[0].body.list
+        assert body[0].lhs == 'x'
+        assert body[0].rhs == ('binary', 'a', '+', ('binary', 'b', '*', '2'))
+        # Literals are not compacted into a BasicLitList of ast nodes
+        assert body[1].rhs.elts == ['1', '2']
+        assert self.program[body[0].pos:body[0].end] == 'x := a + b*2'
+
+    def test_002_subclasses(self):
+        class Factory():
+            # Same name, the unparser dispatches on it
+            CallExpr = type('CallExpr', (CallExpr,), {})
+
+        program = 'package main\n\nimport "fmt"\n\nfunc main() {\n    fmt.Println(f(1))\n}\n'
+        tree = parse(program, factory=Factory)
+        call = tree.decls[1].body.list[0].expr
+        assert type(call) is Factory.CallExpr and type(call.args[0]) is Factory.CallExpr
+        assert program[call.pos:call.end] == 'fmt.Println(f(1))'
+        assert unparse(tree) == unparse(parse(program))
+        # The default parse is not affected
+        assert type(parse(program).decls[1].body.list[0].expr) is CallExpr
+
+    def test_003_errors(self):
+        class Factory():
+            Ident = staticmethod(lambda name: name)
+
+        class FileFactory():
+            File = staticmethod(lambda name: name)
+
+        with pytest.raises(ValueError):
+            parse(self.program, factory=FileFactory)
+        with pytest.raises(ValueError):
+            parse(self.program, engine='descent', factory=Factory)
+        with pytest.raises(ValueError):
+            parse(self.program, mode='lazy_bodies', factory=Factory)
+        with pytest.raises(ValueError):
+            parse(self.program, errors=[], factory=Factory)
+
+
+@pytest.mark.usefixtures('engine')
+class TestEvents():
+
+    program = """
+package main
+
+import "fmt"
+
+func main() {
+    fmt.Println("Hello, World!")
+    fmt.Println(strings.ToUpper("x"))
+}
+"""
+
+    def test_001_events(self):
+        events = list(parse_events(self.program, engine=self.engine))
+        kinds = [kind for event, kind, _ in events if event == 'enter']
+        assert kinds[:4] == ['File', 'Package', 'GenDecl', 'ImportSpec']
+        assert kinds.count('CallExpr') == 3
+        # Balanced, the leave events get the fields of their enter event,
+        # a File its end too
+        stack = []
+        for event, kind, fields in events:
+            if event == 'enter':
+                stack.append((kind, fields))
+            elif kind == 'File':
+                assert stack.pop() == (kind, dict(fields, end=None))
+            else:
+                assert stack.pop() == (kind, fields)
+        assert not stack
+        event, kind, fields = events[-1]
+        assert (event, kind, fields['pos'], fields['end']) == ('leave', 'File', 1, len(self.program) - 1)
+        assert events[0][2]['end'] is None
+        i = next(i for i, (event, kind, fields) in enumerate(events) if kind == 'CallExpr')
+        call = events[i][2]
+        assert self.program[call['pos']:call['end']] == 'fmt.Println("Hello, World!")'
+        # The nodes of the fields are the events in between
+        assert 'fun' not in call and 'args' not in call
+        assert events[i + 1][:2] == ('enter', 'SelectorExpr')
+        assert (events[i + 1][2]['x'], events[i + 1][2]['sel']) == ('fmt', 'Println')
+
+    def test_002_chunks(self, monkeypatch):
+        program = self.program + ''.join('\nfunc f%d() {\n    x := %d\n}\n' % (i, i) for i in range(20))
+
+        def positions(events):
+            return [(event, kind, fields.get('pos'), fields.get('end')) for event, kind, fields in events]
+
+        expected = positions(parse_events(program, engine=self.engine))
+        monkeypatch.setattr('gopygo.parser.EVENT_CHUNK', 16)
+        assert positions(parse_events(program, engine=self.engine)) == expected
+        assert [kind for _, kind, _ in parse_events(program, positions=False, engine=self.engine)] == \
+            [kind for _, kind, _, _ in expected]
+
+    def test_003_handler(self):
+        class Handler():
+            def __init__(self):
+                self.calls = Counter()
+                self.last = None
+
+            def enter(self, kind, fields):
+                if kind == 'SelectorExpr' and self.last == 'CallExpr':
+                    self.calls['%s.%s' % (fields['x'], fields['sel'])] += 1
+                self.last = kind
+
+        handler = Handler()
+        assert parse_events(self.program, engine=self.engine, handler=handler) is None
+        assert handler.calls == {'fmt.Println': 2, 'strings.ToUpper': 1}
+
+    def test_004_errors(self, monkeypatch):
+        monkeypatch.setattr('gopygo.parser.EVENT_CHUNK', 16)
+        events = parse_events(self.program + '\nfunc (\n', engine=self.engine)
+        kinds = []
+        with pytest.raises(ParserError):
+            for event, kind, _ in events:
+                kinds.append(kind)
+        assert kinds.count('FuncDecl') == 2
+
+
+class TestLiteralScanning():
+
+    def scan_time(self, text):
+        best = None
+        for _ in range(3):
+            t = time.perf_counter()
+            try:
+                for _ in GoLexer().tokenize(text):
+                    pass
+            except LexerError:
+                pass
+            elapsed = time.perf_counter() - t
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def assert_linear(self, make, n=2000, factor=8):
+        small = self.scan_time(make(n))
+        large = self.scan_time(make(n * factor))
+        # Linear growth gives ~factor, quadratic growth factor ** 2.
+        assert large < small * factor * 3
+
+    def test_001_many_quotes_and_braces_on_one_line(self):
+        self.assert_linear(lambda n: 'f(' + '"${", "}", ' * n + ')\n')
+
+    def test_002_unterminated_string_with_escapes(self):
+        self.assert_linear(lambda n: '"' + '\\"${' * n + '\n')
+
+    def test_003_char_literals_with_braces(self):
+        self.assert_linear(lambda n: "x := f(" + "'${', '}', " * n + ")\n")
+
+    def test_004_unterminated_string_of_templates(self):
+        # Exponential for the former \$\{.*\} alternative: 18 repetitions took ~10 s.
+        self.assert_linear(lambda n: 'x := "' + '${}' * n + '\n')
+
+    def test_005_long_raw_string(self):
+        self.assert_linear(lambda n: 'x := `' + 'a"${}\\\n' * n + '`\n')
+
+    def test_006_raw_string(self):
+        program = """
+query := `SELECT *
+FROM "table"
+WHERE a = '\\n'`
+fmt.Println(query, `C:\\path`)
+"""
+        program = program.lstrip()
+        assert unparse(parse(program)) == program
+
+    def test_007_unterminated_literals(self):
+        for program in ('x := "abc\n', 'x := "ab\ncd"\n', "x := 'a\n", 'x := `abc\n'):
+            with pytest.raises(LexerError, match=r'Unterminated'):
+                parse(program)
+
+    def test_008_templates(self):
+        program = 'x := "${"name"}"\ny := "$a" + "${a}" + "${ {}"\nc := \'${\'}\'\n'
+        assert [t.value for t in GoLexer().tokenize(program) if t.type.endswith('_LITERAL')] == [
+            '"${"name"}"', '"$a"', '"${a}"', '"${ {}"', "'${'}'"
+        ]
+        assert parse_expr('"${"name"}"').value == '${"name"}'
+
+    def test_009_many_unclosed_templates(self):
+        self.assert_linear(lambda n: 'x := "' + '${"' * n + '"\n')
+
+
+@pytest.mark.usefixtures('engine')
+class TestCompactLiterals():
+
+    program = """
+package main
+
+var table = []byte{
+    0x1f,
+    0x8b,
+    'c',
+    1.5,
+    2i,
+    "s",
+    `r`,
+}
+"""
+
+    def elts(self, text, **kwargs):
+        tree = parse(text.lstrip(), engine=self.engine, **kwargs)
+        return tree.decls[0].decl.specs[0].values[0].elts
+
+    def test_001_elements(self):
+        text = self.program.lstrip()
+        elts = self.elts(text)
+        assert isinstance(elts, BasicLitList)
+        assert len(elts) == 7
+        assert [elt.kind for elt in elts] == [
+            Token.INT, Token.INT, Token.CHAR, Token.FLOAT, Token.IMAG, Token.STRING, Token.STRING
+        ]
+        assert [text[elt.pos:elt.end] for elt in elts] == ['0x1f', '0x8b', "'c'", '1.5', '2i', '"s"', '`r`']
+        assert elts[2].value == 'c'
+        assert (elts[-2].value, elts[-2].raw) == ('s', False)
+        assert (elts[-1].value, elts[-1].raw) == ('r', True)
+        assert [elt.value for elt in elts[1:3]] == ['0x8b', 'c']
+        with pytest.raises(IndexError):
+            elts[7]
+
+    def test_002_unparse(self):
+        program = self.program.lstrip()
+        assert unparse(parse(program, engine=self.engine)) == program
+
+    def test_003_no_positions(self):
+        elts = self.elts(self.program, positions=False)
+        assert elts.starts is None
+        assert elts[0].pos is None
+
+    def test_004_fallback(self):
+        for text in (
+            'package main\n\nvar t = []int{1, x}\n',
+            'package main\n\nvar t = []int{x, 1}\n',
+            'package main\n\nvar t = []int{1 + 2, 3}\n',
+            'package main\n\nvar t = []int{}\n',
+            'package main\n\nvar t = []int{-x, 1}\n',
+            'package main\n\nvar t = []int{1, -"s"}\n',
+        ):
+            elts = self.elts(text)
+            assert isinstance(elts, list)
+
+    def test_005_memory(self):
+        import tracemalloc
+
+        n = 20000
+        text = 'package main\n\nvar t = []int{\n' + '    1234, "abcd",\n' * (n // 2) + '}\n'
+        tracemalloc.start()
+        try:
+            elts = self.elts(text)
+            compact = tracemalloc.get_traced_memory()[0]
+            lits = list(elts)
+            full = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        assert all(isinstance(lit, BasicLit) for lit in lits)
+        # The materialized BasicLit nodes cost more than ten times the compact storage.
+        assert full - compact > 10 * (sys.getsizeof(elts.kinds) + sys.getsizeof(elts.values)
+                                      + sys.getsizeof(elts.bounds) + sys.getsizeof(elts.starts))
+
+    def test_006_negative_numbers(self):
+        text = 'package main\n\nvar t = []float64{-1, 2, -0.5, -1i}\n'
+        elts = self.elts(text)
+        assert isinstance(elts, BasicLitList)
+        assert [text[elt.pos:elt.end] for elt in elts] == ['-1', '2', '-0.5', '-1i']
+        assert [type(elt) for elt in elts] == [UnaryExpr, BasicLit, UnaryExpr, UnaryExpr]
+        assert (elts[0].op, elts[0].x.value, text[elts[0].x.pos:elts[0].x.end]) == ('-', '1', '1')
+        # Same nodes as parsed one by one
+        fallback = self.elts(text.replace('}', ', x}'))
+        assert isinstance(fallback, list)
+        assert [(type(n), n.pos, n.end) for n in walk(list(elts))] == [
+            (type(n), n.pos, n.end) for n in walk(fallback[:-1])
+        ]
+        assert isinstance(self.elts(text.replace('-0.5', '- 0.5')), list)
+
+
+class TestScaling():
+
+    def parse_time(self, text, engine):
+        best = None
+        for _ in range(3):
+            t = time.perf_counter()
+            parse(text, engine=engine)
+            elapsed = time.perf_counter() - t
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def assert_linear(self, make, engine, n=500, factor=8):
+        small = self.parse_time(make(n), engine)
+        large = self.parse_time(make(n * factor), engine)
+        # Linear growth gives ~factor, quadratic growth factor ** 2.
+        assert large < small * factor * 3
+
+    @pytest.mark.parametrize('engine', ['lalr', 'descent'])
+    def test_001_long_function_body(self, engine):
+        def make(n):
+            return 'package main\n\nfunc main() {\n' + '    x := 1\n    // one\n' * (n // 2) + '}\n'
+
+        tree = parse(make(10000), engine=engine)
+        assert len(tree.decls[0].body.list) == 10000
+        self.assert_linear(make, engine, n=1250)
+
+    @pytest.mark.parametrize('engine', ['lalr', 'descent'])
+    @pytest.mark.parametrize('make', [
+        lambda n: 'package main\n\nimport (\n' + '    "fmt"\n' * n + ')\n',
+        lambda n: 'f(' + 'x, ' * n + ')\n',
+        lambda n: 'type T struct {\n' + '    x int\n' * n + '}\n',
+        lambda n: 'switch x {\n' + 'case 1:\n    f()\n' * n + '}\n',
+        lambda n: 'm := map[string]int{\n' + '    "a": 1,\n' * n + '}\n',
+        lambda n: 't := []byte{\n' + '    0x1f, 0x8b,\n' * n + '}\n',
+        lambda n: 'f(' + 'x + 1, ' * n + 'x)\n',
+        lambda n: 'x' + ', x' * n + ' = 1' + ', 1' * n + '\n',
+        lambda n: 't := []int{\n' + '    -1, -2,\n' * n + '}\n',
+    ], ids=['imports', 'args', 'fields', 'cases', 'map', 'literals', 'calls', 'assign', 'signed'])
+    def test_002_long_lists(self, engine, make):
+        self.assert_linear(make, engine)
+
+    @pytest.mark.parametrize('engine', ['lalr', 'descent'])
+    def test_003_many_top_level_declarations(self, engine):
+        def make(n):
+            return 'package main\n\n' + 'var x int\n\n// f\nfunc f() {\n}\n\n' * (n // 3)
+
+        tree = parse(make(3000), engine=engine)
+        assert len(tree.decls) == 3000
+        assert tree.end == len(make(3000)) - 2
+        self.assert_linear(make, engine, n=600)
+
 
 class TestExceptions():
 
@@ -825,3 +2453,95 @@ package ~
             match=r"Illegal character '~'"
         ):
             parse(program)
+
+
+class TestTables():
+
+    def test_001_artifact_roundtrip(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(tables.CACHE_DIR_ENV, str(tmp_path))
+        sig = tables.signature('test', [1, 2, 3])
+        tables.save('Test', sig, {'a': [1, 2]})
+        assert tables.load('Test', sig) == {'a': [1, 2]}
+        assert tables.load('Test', tables.signature('test', [1, 2])) is None
+
+    def test_002_corrupt_artifact(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(tables.CACHE_DIR_ENV, str(tmp_path))
+        with open(tables.artifact_path('Test'), 'w') as f:
+            f.write('{not json')
+        assert tables.load('Test', tables.signature('test')) is None
+
+    def test_003_lrtable_roundtrip(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(tables.CACHE_DIR_ENV, str(tmp_path))
+        sig = tables.grammar_signature(GoParser)
+        tables.save('GoParser', sig, tables.dump_lrtable(GoParser._lrtable))
+        lrtable = tables.load_lrtable(GoParser._grammar, tables.load('GoParser', sig))
+        assert lrtable.lr_action == GoParser._lrtable.lr_action
+        assert lrtable.lr_goto == GoParser._lrtable.lr_goto
+        assert lrtable.defaulted_states == GoParser._lrtable.defaulted_states
+
+    def test_004_package_then_cache(self, monkeypatch, tmp_path):
+        monkeypatch.delenv(tables.CACHE_DIR_ENV, raising=False)
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+        monkeypatch.setenv('LOCALAPPDATA', str(tmp_path / 'cache'))
+        monkeypatch.setattr(tables, 'package_dir', lambda: str(tmp_path / 'package'))
+        assert tables.search_path() == [str(tmp_path / 'package'), str(tmp_path / 'cache' / 'gopygo')]
+        sig = tables.signature('test')
+        tables.save('Test', sig, 'package', str(tmp_path / 'package'))
+        tables.save('Test', sig, 'cache')
+        assert tables.load('Test', sig) == 'package'
+        # Outdated package data
+        tables.save('Test', tables.signature('old'), 'package', str(tmp_path / 'package'))
+        assert tables.load('Test', sig) == 'cache'
+
+    def test_005_write(self, monkeypatch, tmp_path):
+        assert tables.write(str(tmp_path)) == [str(tmp_path / 'GoParser.tables.json')]
+        monkeypatch.setenv(tables.CACHE_DIR_ENV, str(tmp_path))
+        assert tables.load('GoParser', tables.grammar_signature(GoParser)) == tables.dump_lrtable(GoParser._lrtable)
+
+
+class TestLazyImport():
+
+    # Budget for ``import gopygo`` plus an ``unparse`` call, measured in a fresh interpreter.
+    IMPORT_BUDGET = 0.2
+
+    SNIPPET = """
+import sys
+import time
+t = time.perf_counter()
+import gopygo
+from gopygo.ast import File, Package
+text = gopygo.unparse(File(Package('main')))
+elapsed = time.perf_counter() - t
+assert text == 'package main\\n', text
+print(elapsed, 'sly' in sys.modules, 'gopygo.parser' in sys.modules)
+"""
+
+    def run(self, snippet):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root)
+        return subprocess.check_output([sys.executable, '-c', snippet], env=env).decode().split()
+
+    def test_001_unparse_does_not_load_parser(self):
+        elapsed, sly_loaded, parser_loaded = self.run(self.SNIPPET)
+        assert sly_loaded == 'False'
+        assert parser_loaded == 'False'
+
+    def test_002_import_time_budget(self):
+        best = min(float(self.run(self.SNIPPET)[0]) for _ in range(3))
+        assert best < self.IMPORT_BUDGET
+
+    def test_003_parse_loads_on_first_use(self):
+        out = self.run(
+            "import sys, gopygo\n"
+            "print('gopygo.parser' in sys.modules)\n"
+            "tree = gopygo.parse('package main')\n"
+            "print('gopygo.parser' in sys.modules, gopygo.unparse(tree).strip())\n"
+        )
+        assert out == ['False', 'True', 'package', 'main']
+
+    def test_004_process_pool_loads_on_first_use(self):
+        out = self.run(
+            "import sys, gopygo.parser\n"
+            "print('concurrent.futures.process' in sys.modules)\n"
+        )
+        assert out == ['False']